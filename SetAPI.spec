@@ -679,6 +679,15 @@ module SetAPI {
                             in the set. The ref_path for each item is either
                                 ref_path_to_set;item_ref  (if ref_path_to_set is given) or
                                 set_ref;item_ref
+        types - optional list of set types to list (e.g. KBaseSets.ReadsSet), by default
+                            all KBaseSets set types and the legacy KBaseRNASeq
+                            RNASeqSampleSet, RNASeqAlignmentSet and
+                            RNASeqExpressionSet types are listed
+        limit - optional maximum number of sets to return, if set the sets are
+                            returned in a stable order (by workspace id, then
+                            object id) and next_cursor is set when there are more
+        cursor - optional next_cursor from a previous call with the same
+                            parameters, to get the next page of sets
     */
     typedef structure {
         string workspace;
@@ -686,6 +695,9 @@ module SetAPI {
         boolean include_set_item_info;
         boolean include_metadata;
         boolean include_set_item_ref_paths;
+        list<string> types;
+        int limit;
+        string cursor;
     } ListSetParams;
 
     /*
@@ -712,8 +724,14 @@ module SetAPI {
 
 
 
+    /*
+        sets - the top-level sets, or one page of them if limit was given
+        next_cursor - set when limit was given and there are more sets, pass it as
+                            cursor to get the next page
+    */
     typedef structure {
         list <SetInfo> sets;
+        string next_cursor;
     } ListSetResult;
 
     /* Use to get the top-level sets in a WS. Optionally can include
@@ -749,4 +767,80 @@ module SetAPI {
     funcdef get_set_items(GetSetItemsParams params)
                   returns(GetSetItemsResult result) authentication optional;
 
+    /*
+        set_refs - the sets to get, each either directly (ref) or via a ref path
+                            (ref_path_to_set), of any of the KBaseSets set types
+        include_item_info - 1 or 0, if 1 additionally provides workspace info (with
+                            metadata) for each item of each set
+        include_set_item_ref_paths - 1 or 0, if 1, additionally provides ref_path for each item
+                            in each set. The ref_path for each item is either
+                                ref_path_to_set;item_ref  (if ref_path_to_set is given) or
+                                set_ref;item_ref
+    */
+    typedef structure {
+        list <SetReference> set_refs;
+        boolean include_item_info;
+        boolean include_set_item_ref_paths;
+    } GetSetsParams;
+
+    /*
+        ref - the ref of the set, as given in set_refs
+        data - the set data, as returned by the get_*_set_v1 method for its type
+        info - the Workspace object_info tuple for the set
+        error - set instead of data and info when the set could not be fetched,
+                            e.g. because it does not exist, is not accessible
+                            or is not a KBaseSets set (the KBaseRNASeq sets some
+                            get_*_set_v1 methods also read are not supported)
+    */
+    typedef structure {
+        ws_obj_id ref;
+        UnspecifiedObject data;
+        Workspace.object_info info;
+        string error;
+    } GetSetsSetResult;
+
+    typedef structure {
+        list <GetSetsSetResult> sets;
+    } GetSetsResult;
+
+    /* Use to get many sets, of mixed KBaseSets set types, in one call. The
+    position in the return 'sets' list will match the position in the input
+    set_refs list. A set that can't be fetched gets an error, the other sets
+    are still returned. */
+    funcdef get_sets(GetSetsParams params)
+                  returns(GetSetsResult result) authentication optional;
+
+    /*
+        set_type - the KBaseSets type of the set, e.g. KBaseSets.ReadsSet
+        workspace - workspace name or ID to save the set to
+        output_object_name - workspace object name of the set
+        data - the set, as for the save_*_set_v1 method of its type
+    */
+    typedef structure {
+        string set_type;
+        string workspace;
+        string output_object_name;
+        UnspecifiedObject data;
+    } SetToSave;
+
+    typedef structure {
+        list <SetToSave> sets;
+    } SaveSetsParams;
+
+    typedef structure {
+        ws_obj_id set_ref;
+        Workspace.object_info set_info;
+    } SavedSet;
+
+    typedef structure {
+        list <SavedSet> sets;
+    } SaveSetsResult;
+
+    /* Use to save many sets, of any KBaseSets set types, at once. All the sets
+    are validated before any is saved, then they are saved with as few Workspace
+    calls as possible. The position in the return 'sets' list will match the
+    position in the input sets list. */
+    funcdef save_sets(SaveSetsParams params)
+                  returns(SaveSetsResult result) authentication required;
+
 };
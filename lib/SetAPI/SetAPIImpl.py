@@ -6,13 +6,24 @@ from SetAPI.differentialexpressionmatrix.DifferentialExpressionMatrixSetInterfac
     DifferentialExpressionMatrixSetInterfaceV1
 from SetAPI.expression.ExpressionSetInterfaceV1 import ExpressionSetInterfaceV1
 from SetAPI.featureset.FeatureSetSetInterfaceV1 import FeatureSetSetInterfaceV1
+from SetAPI.generic.BulkSetInterfaceV1 import BulkSetInterfaceV1
+from SetAPI.generic.CachedWorkspaceClient import CachedWorkspaceClient
 from SetAPI.generic.DynamicServiceCache import DynamicServiceCache
 from SetAPI.generic.GenericSetNavigator import GenericSetNavigator
+from SetAPI.generic.ObjectInfoCache import ObjectInfoCache
+from SetAPI.generic.RequestWorkspaceClient import RequestWorkspaceClient, WorkspaceCallStats
+from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
+from SetAPI.generic.SingleFlight import SingleFlight
+from SetAPI.generic.WorkspaceSetIndex import WorkspaceSetIndex
 from SetAPI.genome.GenomeSetInterfaceV1 import GenomeSetInterfaceV1
 from SetAPI.reads.ReadsSetInterfaceV1 import ReadsSetInterfaceV1
 from SetAPI.readsalignment.ReadsAlignmentSetInterfaceV1 import ReadsAlignmentSetInterfaceV1
 from SetAPI.sampleset.SampleSetInterface import SampleSetInterface
 from SetAPI.sampleset.SampleSearchUtils import SamplesSearchUtils
+from SetAPI import jsoncodec, tracing
+from SetAPI.metrics import CountingClient, Metrics
+from SetAPI.generic import baseclient as generic_baseclient
+from installed_clients import baseclient as installed_baseclient
 from installed_clients.WorkspaceClient import Workspace
 
 
@@ -39,6 +50,23 @@ class SetAPI:
     GIT_COMMIT_HASH = "3ea7e513dbf833b3c6d599973601987b5a6deec1"
 
     #BEGIN_CLASS_HEADER
+    def _get_workspace_client(self, ctx):
+        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        if ctx.get('workspace_calls') is not None:
+            # the server reports the Workspace calls each request makes
+            ws = CountingClient(ws, ctx['workspace_calls'])
+        ws = CachedWorkspaceClient(ws, self.object_info_cache, token=ctx['token'],
+                                   chunk_size=self.object_info_chunk_size,
+                                   max_parallel_chunks=self.object_info_max_parallel_chunks,
+                                   single_flight=self.workspace_single_flight)
+        if self.workspace_request_coalescing:
+            # repeated lookups within this request go to the Workspace once
+            ws = RequestWorkspaceClient(ws, totals=self.workspace_call_stats)
+        return ws
+
+    def _observe_service_call(self, method, seconds, bytes_sent, bytes_received, error):
+        self.metrics.observe_outbound_call(method, seconds, bytes_sent, bytes_received, error)
+        tracing.record(method, seconds)
     #END_CLASS_HEADER
 
     # config contains contents of config file in a hash or None if it couldn't
@@ -51,6 +79,69 @@ class SetAPI:
           self.search_url = config.get('search-url')
         else:
           self.search_url = config.get('kbase-endpoint') + '/searchapi2/rpc'
+        # object_info of versioned refs never changes, so it is shared across requests
+        self.object_info_cache = ObjectInfoCache(
+            max_bytes=int(config.get('object-info-cache-max-bytes', 64 * 1024 * 1024)),
+            access_ttl_seconds=int(config.get('object-info-cache-access-ttl-seconds', 60)))
+        # object info lookups for large sets are split into concurrent chunks
+        self.object_info_chunk_size = int(config.get('object-info-chunk-size', 1000))
+        self.object_info_max_parallel_chunks = int(
+            config.get('object-info-max-parallel-chunks', 4))
+        # concurrent requests fetching the same immutable objects share one fetch
+        self.workspace_single_flight = None
+        if config.get('workspace-single-flight', 'true').lower() == 'true':
+            self.workspace_single_flight = SingleFlight()
+        # counts of the Workspace calls made and saved by all requests
+        self.workspace_call_stats = WorkspaceCallStats()
+        self.workspace_request_coalescing = config.get('workspace-request-coalescing',
+                                                       'true').lower() == 'true'
+        # all Workspace/Service Wizard clients share keep-alive connection pools per host
+        pool_params = {
+            'pool_size': int(config.get('http-pool-size', 10)),
+            'max_retries': int(config.get('http-max-retries', 2)),
+            'backoff_factor': float(config.get('http-retry-backoff-factor', 0.2)),
+            'keep_alive': config.get('http-keep-alive', 'true').lower() == 'true',
+            'accept_compressed': config.get('http-accept-compressed', 'true').lower() == 'true'
+        }
+        installed_baseclient.configure_connection_pool(**pool_params)
+        generic_baseclient.configure_connection_pool(**pool_params)
+        # orjson, when installed, for requests, responses and Workspace calls
+        self.json_codec = jsoncodec.get_codec(config.get('json-codec', 'auto'))
+        jsoncodec.set_codec(self.json_codec)
+        installed_baseclient.configure_json_codec(self.json_codec)
+        generic_baseclient.configure_json_codec(self.json_codec)
+        # request metrics are added by the server, see SetAPI.metrics
+        self.metrics = Metrics()
+        installed_baseclient.configure_call_observer(self._observe_service_call)
+        generic_baseclient.configure_call_observer(self._observe_service_call)
+        self.metrics.add_counter('setapi_object_info_cache_hits_total',
+                                 lambda: self.object_info_cache.hits,
+                                 'object_info lookups answered by the cache')
+        self.metrics.add_counter('setapi_object_info_cache_misses_total',
+                                 lambda: self.object_info_cache.misses,
+                                 'object_info lookups the cache could not answer')
+        self.metrics.add_counter('setapi_workspace_request_calls_total',
+                                 lambda: {(('kind', kind),): count for kind, count
+                                          in self.workspace_call_stats.snapshot().items()},
+                                 'Workspace calls made by requests, and how those not sent '
+                                 'to the Workspace were saved (see RequestWorkspaceClient)')
+        self.list_objects_prefetch = int(config.get('list-objects-prefetch', 4))
+        self.list_objects_adaptive = config.get('list-objects-adaptive-window',
+                                                'true').lower() == 'true'
+        # save_sets splits its save_objects calls by object count and data size
+        self.save_sets_chunk_size = int(config.get('save-sets-chunk-size', 100))
+        self.save_sets_chunk_max_bytes = int(config.get('save-sets-chunk-max-bytes', 50000000))
+        # sets found per workspace, so list_sets only rescans what changed
+        self.set_index = None
+        set_index_max_workspaces = int(config.get('set-index-max-workspaces', 1000))
+        if set_index_max_workspaces > 0:
+            self.set_index = WorkspaceSetIndex(
+                max_workspaces=set_index_max_workspaces,
+                max_age_seconds=int(config.get('set-index-max-age-seconds', 600)))
+        if self.workspace_single_flight is not None:
+            self.metrics.add_counter('setapi_single_flight_shared_total',
+                                     lambda: self.workspace_single_flight.shared,
+                                     'Workspace fetches answered by a concurrent identical fetch')
         #END_CONSTRUCTOR
         pass
 
@@ -186,7 +277,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: result
         #BEGIN get_differential_expression_matrix_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         demsi = DifferentialExpressionMatrixSetInterfaceV1(ws)
         result = demsi.get_differential_expression_matrix_set(ctx, params)
         #END get_differential_expression_matrix_set_v1
@@ -322,7 +413,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: result
         #BEGIN save_differential_expression_matrix_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         demsi = DifferentialExpressionMatrixSetInterfaceV1(ws)
         result = demsi.save_differential_expression_matrix_set(ctx, params)
         #END save_differential_expression_matrix_set_v1
@@ -456,7 +547,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: returnVal
         #BEGIN get_feature_set_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         fssi = FeatureSetSetInterfaceV1(ws)
         returnVal = fssi.get_feature_set_set(ctx, params)
         #END get_feature_set_set_v1
@@ -586,7 +677,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: result
         #BEGIN save_feature_set_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         fssi = FeatureSetSetInterfaceV1(ws)
         result = fssi.save_feature_set_set(ctx, params)
         #END save_feature_set_set_v1
@@ -725,7 +816,7 @@ class SetAPI:
         # return variables are: returnVal
         #BEGIN get_expression_set_v1
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         esi = ExpressionSetInterfaceV1(ws)
         returnVal = esi.get_expression_set(ctx, params)
 
@@ -860,7 +951,7 @@ class SetAPI:
         # return variables are: result
         #BEGIN save_expression_set_v1
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         esi = ExpressionSetInterfaceV1(ws)
         result = esi.save_expression_set(ctx, params)
 
@@ -1002,7 +1093,7 @@ class SetAPI:
         # return variables are: returnVal
         #BEGIN get_reads_alignment_set_v1
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rasi = ReadsAlignmentSetInterfaceV1(ws)
         returnVal = rasi.get_reads_alignment_set(ctx, params)
 
@@ -1136,7 +1227,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: result
         #BEGIN save_reads_alignment_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rasi = ReadsAlignmentSetInterfaceV1(ws)
         result = rasi.save_reads_alignment_set(ctx, params)
         #END save_reads_alignment_set_v1
@@ -1272,7 +1363,7 @@ class SetAPI:
         # return variables are: result
         #BEGIN get_reads_set_v1
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rsi = ReadsSetInterfaceV1(ws)
         result = rsi.get_reads_set(ctx, params)
 
@@ -1403,7 +1494,7 @@ class SetAPI:
         # return variables are: result
         #BEGIN save_reads_set_v1
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rsi = ReadsSetInterfaceV1(ws)
         result = rsi.save_reads_set(ctx, params)
 
@@ -1536,7 +1627,7 @@ class SetAPI:
         # return variables are: result
         #BEGIN get_assembly_set_v1
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rsi = AssemblySetInterfaceV1(ws)
         result = rsi.get_assembly_set(ctx, params)
 
@@ -1664,7 +1755,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: result
         #BEGIN save_assembly_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rsi = AssemblySetInterfaceV1(ws)
         result = rsi.save_assembly_set(ctx, params)
 
@@ -1850,7 +1941,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: result
         #BEGIN get_genome_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rsi = GenomeSetInterfaceV1(ws)
         result = rsi.get_genome_set(ctx, params)
         #END get_genome_set_v1
@@ -2034,7 +2125,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: result
         #BEGIN save_genome_set_v1
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         rsi = GenomeSetInterfaceV1(ws)
         result = rsi.save_genome_set(ctx, params)
         #END save_genome_set_v1
@@ -2108,7 +2199,7 @@ class SetAPI:
         # ctx is the context object
         # return variables are: returnVal
         #BEGIN create_sample_set
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         ssi = SampleSetInterface(ws)
         returnVal = ssi.create_sample_set(ctx, params)
         #END create_sample_set
@@ -2172,15 +2263,27 @@ class SetAPI:
            affects DP raw data as well), include_set_item_ref_paths - 1 or 0,
            if 1, additionally provides ref_path for each item in the set. The
            ref_path for each item is either ref_path_to_set;item_ref  (if
-           ref_path_to_set is given) or set_ref;item_ref) -> structure:
-           parameter "workspace" of String, parameter "workspaces" of String,
-           parameter "include_set_item_info" of type "boolean" (A boolean. 0
-           = false, 1 = true.), parameter "include_metadata" of type
-           "boolean" (A boolean. 0 = false, 1 = true.), parameter
+           ref_path_to_set is given) or set_ref;item_ref types - optional
+           list of set types to list (e.g. KBaseSets.ReadsSet), by default
+           all KBaseSets set types and the legacy KBaseRNASeq
+           RNASeqSampleSet, RNASeqAlignmentSet and RNASeqExpressionSet types
+           are listed limit - optional maximum number of sets to return, if
+           set the sets are returned in a stable order (by workspace id, then
+           object id) and next_cursor is set when there are more cursor -
+           optional next_cursor from a previous call with the same
+           parameters, to get the next page of sets) -> structure: parameter
+           "workspace" of String, parameter "workspaces" of String, parameter
+           "include_set_item_info" of type "boolean" (A boolean. 0 = false, 1
+           = true.), parameter "include_metadata" of type "boolean" (A
+           boolean. 0 = false, 1 = true.), parameter
            "include_set_item_ref_paths" of type "boolean" (A boolean. 0 =
-           false, 1 = true.)
-        :returns: instance of type "ListSetResult" -> structure: parameter
-           "sets" of list of type "SetInfo" (ref - the workspace object ref
+           false, 1 = true.), parameter "types" of list of String, parameter
+           "limit" of Long, parameter "cursor" of String
+        :returns: instance of type "ListSetResult" (sets - the top-level
+           sets, or one page of them if limit was given next_cursor - set
+           when limit was given and there are more sets, pass it as cursor to
+           get the next page) -> structure: parameter "sets" of list of type
+           "SetInfo" (ref - the workspace object ref
            for the set info - the Workspace object_info tuple for the set
            items - the SetItemInfo for each of the items in the set) ->
            structure: parameter "ref" of type "ws_obj_id" (The workspace ID
@@ -2277,14 +2380,18 @@ class SetAPI:
            kbasetest:my_workspace.), parameter "chsum" of String, parameter
            "size" of Long, parameter "meta" of type "usermeta" (User provided
            metadata about an object. Arbitrary key-value pairs provided by
-           the user.) -> mapping from String to String
+           the user.) -> mapping from String to String, parameter
+           "next_cursor" of String
         """
         # ctx is the context object
         # return variables are: result
         #BEGIN list_sets
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
-        gsn = GenericSetNavigator(ws, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
+        gsn = GenericSetNavigator(ws, token=ctx['token'],
+                                  list_objects_prefetch=self.list_objects_prefetch,
+                                  list_objects_adaptive=self.list_objects_adaptive,
+                                  set_index=self.set_index)
         result = gsn.list_sets(params)
 
         #END list_sets
@@ -2416,7 +2523,7 @@ class SetAPI:
         # return variables are: result
         #BEGIN get_set_items
 
-        ws = Workspace(self.workspaceURL, token=ctx['token'])
+        ws = self._get_workspace_client(ctx)
         gsn = GenericSetNavigator(ws)
         result = gsn.get_set_items(params)
 
@@ -2428,9 +2535,193 @@ class SetAPI:
                              'result is not type dict as required.')
         # return the results
         return [result]
+    def get_sets(self, ctx, params):
+        """
+        Use to get many sets, of mixed KBaseSets set types, in one call. The
+        position in the return 'sets' list will match the position in the
+        input set_refs list. A set that can't be fetched gets an error, the
+        other sets are still returned.
+        :param params: instance of type "GetSetsParams" (set_refs - the sets
+           to get, each either directly (ref) or via a ref path
+           (ref_path_to_set), of any of the KBaseSets set types
+           include_item_info - 1 or 0, if 1 additionally provides workspace
+           info (with metadata) for each item of each set
+           include_set_item_ref_paths - 1 or 0, if 1, additionally provides
+           ref_path for each item in each set. The ref_path for each item is
+           either ref_path_to_set;item_ref  (if ref_path_to_set is given) or
+           set_ref;item_ref) -> structure: parameter "set_refs" of list of
+           type "SetReference" (include_set_item_ref_paths - 1 or 0, if 1,
+           additionally provides ref_path for each item in the set. The
+           ref_path for each item is either ref_path_to_set;item_ref  (if
+           ref_path_to_set is given) or set_ref;item_ref) -> structure:
+           parameter "ref" of type "ws_obj_id" (The workspace ID for a any
+           data object. @id ws), parameter "ref_path_to_set" of list of type
+           "ws_obj_id" (The workspace ID for a any data object. @id ws),
+           parameter "include_item_info" of type "boolean" (A boolean. 0 =
+           false, 1 = true.), parameter "include_set_item_ref_paths" of type
+           "boolean" (A boolean. 0 = false, 1 = true.)
+        :returns: instance of type "GetSetsResult" -> structure: parameter
+           "sets" of list of type "GetSetsSetResult" (ref - the ref of the
+           set, as given in set_refs data - the set data, as returned by the
+           get_*_set_v1 method for its type info - the Workspace object_info
+           tuple for the set error - set instead of data and info when the
+           set could not be fetched, e.g. because it does not exist, is not
+           accessible or is not a KBaseSets set (the KBaseRNASeq sets some
+           get_*_set_v1 methods also read are not supported)) -> structure:
+           parameter "ref" of type "ws_obj_id" (The workspace ID for a any
+           data object. @id ws), parameter "data" of unspecified object,
+           parameter "info" of type "object_info" (Information about an
+           object, including user provided metadata. obj_id objid - the numerical id of the object.
+           obj_name name - the name of the object. type_string type - the
+           type of the object. timestamp save_date - the save date of the
+           object. obj_ver ver - the version of the object. username saved_by
+           - the user that saved or copied the object. ws_id wsid - the
+           workspace containing the object. ws_name workspace - the workspace
+           containing the object. string chsum - the md5 checksum of the
+           object. int size - the size of the object in bytes. usermeta meta
+           - arbitrary user-supplied metadata about the object.) -> tuple of
+           size 11: parameter "objid" of type "obj_id" (The unique, permanent
+           numerical ID of an object.), parameter "name" of type "obj_name"
+           (A string used as a name for an object. Any string consisting of
+           alphanumeric characters and the characters |._- that is not an
+           integer is acceptable.), parameter "type" of type "type_string" (A
+           type string. Specifies the type and its version in a single string
+           in the format [module].[typename]-[major].[minor]: module - a
+           string. The module name of the typespec containing the type.
+           typename - a string. The name of the type as assigned by the
+           typedef statement. major - an integer. The major version of the
+           type. A change in the major version implies the type has changed
+           in a non-backwards compatible way. minor - an integer. The minor
+           version of the type. A change in the minor version implies that
+           the type has changed in a way that is backwards compatible with
+           previous type definitions. In many cases, the major and minor
+           versions are optional, and if not provided the most recent version
+           will be used. Example: MyModule.MyType-3.1), parameter "save_date"
+           of type "timestamp" (A time in the format YYYY-MM-DDThh:mm:ssZ,
+           where Z is either the character Z (representing the UTC timezone)
+           or the difference in time to UTC in the format +/-HHMM, eg:
+           2012-12-17T23:24:06-0500 (EST time) 2013-04-03T08:56:32+0000 (UTC
+           time) 2013-04-03T08:56:32Z (UTC time)), parameter "version" of
+           Long, parameter "saved_by" of type "username" (Login name of a
+           KBase user account.), parameter "wsid" of type "ws_id" (The
+           unique, permanent numerical ID of a workspace.), parameter
+           "workspace" of type "ws_name" (A string used as a name for a
+           workspace. Any string consisting of alphanumeric characters and
+           "_", ".", or "-" that is not an integer is acceptable. The name
+           may optionally be prefixed with the workspace owner's user name
+           and a colon, e.g. kbasetest:my_workspace.), parameter "chsum" of
+           String, parameter "size" of Long, parameter "meta" of type
+           "usermeta" (User provided metadata about an object. Arbitrary
+           key-value pairs provided by the user.) -> mapping from String to
+           String, parameter "error" of String
+        """
+        # ctx is the context object
+        # return variables are: result
+        #BEGIN get_sets
+
+        ws = self._get_workspace_client(ctx)
+        si = SetInterfaceV1(ws)
+        # the KBaseSets sets as their own get_*_set_v1 methods would return them
+        result = si.get_sets(params, normalizers={
+            'KBaseSets.ReadsSet': ReadsSetInterfaceV1(ws)._normalize_read_set_data,
+            'KBaseSets.AssemblySet': AssemblySetInterfaceV1(ws)._normalize_assembly_set_data,
+            'KBaseSets.GenomeSet': GenomeSetInterfaceV1(ws)._normalize_genome_set_data,
+            'KBaseSets.FeatureSetSet':
+                FeatureSetSetInterfaceV1(ws)._normalize_feature_set_set_data
+        })
+
+        #END get_sets
+
+        # At some point might do deeper type checking...
+        if not isinstance(result, dict):
+            raise ValueError('Method get_sets return value ' +
+                             'result is not type dict as required.')
+        # return the results
+        return [result]
+    def save_sets(self, ctx, params):
+        """
+        Use to save many sets, of any KBaseSets set types, at once. All the sets
+        are validated before any is saved, then they are saved with as few Workspace
+        calls as possible. The position in the return 'sets' list will match the
+        position in the input sets list.
+        :param params: instance of type "SaveSetsParams" -> structure:
+           parameter "sets" of list of type "SetToSave" (set_type - the
+           KBaseSets type of the set, e.g. KBaseSets.ReadsSet workspace -
+           workspace name or ID to save the set to output_object_name -
+           workspace object name of the set data - the set, as for the
+           save_*_set_v1 method of its type) -> structure: parameter
+           "set_type" of String, parameter "workspace" of String, parameter
+           "output_object_name" of String, parameter "data" of unspecified
+           object
+        :returns: instance of type "SaveSetsResult" -> structure: parameter
+           "sets" of list of type "SavedSet" -> structure: parameter
+           "set_ref" of type "ws_obj_id" (The workspace ID for a any data
+           object. @id ws), parameter "set_info" of type "object_info"
+           (Information about an object, including user provided metadata.
+           obj_id objid - the numerical id of the object. obj_name name - the
+           name of the object. type_string type - the type of the object.
+           timestamp save_date - the save date of the object. obj_ver ver -
+           the version of the object. username saved_by - the user that saved
+           or copied the object. ws_id wsid - the workspace containing the
+           object. ws_name workspace - the workspace containing the object.
+           string chsum - the md5 checksum of the object. int size - the size
+           of the object in bytes. usermeta meta - arbitrary user-supplied
+           metadata about the object.) -> tuple of size 11: parameter "objid"
+           of type "obj_id" (The unique, permanent numerical ID of an
+           object.), parameter "name" of type "obj_name" (A string used as a
+           name for an object. Any string consisting of alphanumeric
+           characters and the characters |._- that is not an integer is
+           acceptable.), parameter "type" of type "type_string" (A type
+           string. Specifies the type and its version in a single string in
+           the format [module].[typename]-[major].[minor]: module - a string.
+           The module name of the typespec containing the type. typename - a
+           string. The name of the type as assigned by the typedef statement.
+           major - an integer. The major version of the type. A change in the
+           major version implies the type has changed in a non-backwards
+           compatible way. minor - an integer. The minor version of the type.
+           A change in the minor version implies that the type has changed in
+           a way that is backwards compatible with previous type definitions.
+           In many cases, the major and minor versions are optional, and if
+           not provided the most recent version will be used. Example:
+           MyModule.MyType-3.1), parameter "save_date" of type "timestamp" (A
+           time in the format YYYY-MM-DDThh:mm:ssZ, where Z is either the
+           character Z (representing the UTC timezone) or the difference in
+           time to UTC in the format +/-HHMM, eg: 2012-12-17T23:24:06-0500
+           (EST time) 2013-04-03T08:56:32+0000 (UTC time)
+           2013-04-03T08:56:32Z (UTC time)), parameter "version" of Long,
+           parameter "saved_by" of type "username" (Login name of a KBase
+           user account.), parameter "wsid" of type "ws_id" (The unique,
+           permanent numerical ID of a workspace.), parameter "workspace" of
+           type "ws_name" (A string used as a name for a workspace. Any
+           string consisting of alphanumeric characters and "_", ".", or "-"
+           that is not an integer is acceptable. The name may optionally be
+           prefixed with the workspace owner's user name and a colon, e.g.
+           kbasetest:my_workspace.), parameter "chsum" of String, parameter
+           "size" of Long, parameter "meta" of type "usermeta" (User provided
+           metadata about an object. Arbitrary key-value pairs provided by
+           the user.) -> mapping from String to String
+        """
+        # ctx is the context object
+        # return variables are: result
+        #BEGIN save_sets
+
+        ws = self._get_workspace_client(ctx)
+        bsi = BulkSetInterfaceV1(ws, chunk_size=self.save_sets_chunk_size,
+                                 chunk_max_bytes=self.save_sets_chunk_max_bytes)
+        result = bsi.save_sets(ctx, params)
+
+        #END save_sets
+
+        # At some point might do deeper type checking...
+        if not isinstance(result, dict):
+            raise ValueError('Method save_sets return value ' +
+                             'result is not type dict as required.')
+        # return the results
+        return [result]
     def status(self, ctx):
         #BEGIN_STATUS
         returnVal = {'state': "OK", 'message': "", 'version': self.VERSION,
-                     'git_url': self.GIT_URL, 'git_commit_hash': self.GIT_COMMIT_HASH}
+                     'git_url': self.GIT_URL, 'git_commit_hash': self.GIT_COMMIT_HASH,
+                     'metrics': self.metrics.snapshot()}
         #END_STATUS
         return [returnVal]
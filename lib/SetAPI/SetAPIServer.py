@@ -5,7 +5,10 @@ import json
 import os
 import random as _random
 import sys
+import threading
+import time
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
 from getopt import getopt, GetoptError
 from multiprocessing import Process
 from os import environ
@@ -18,6 +21,8 @@ from jsonrpcbase import ServerError as JSONServerError
 
 from biokbase import log
 from SetAPI.authclient import KBaseAuth as _KBaseAuth
+from SetAPI import compression, jsoncodec, tracing
+from SetAPI.metrics import CallCounts
 
 try:
     from ConfigParser import ConfigParser
@@ -69,20 +74,54 @@ class JSONObjectEncoder(json.JSONEncoder):
 
 class JSONRPCServiceCustom(JSONRPCService):
 
+    def __init__(self, batch_concurrency=True, batch_max_workers=10,
+                 batch_max_per_request=5):
+        """
+        Arguments:
+        batch_concurrency -- run the members of a batch request concurrently.
+                             If False, they are run one after another.
+        batch_max_workers -- the number of threads shared by all batches
+        batch_max_per_request -- the maximum number of members of a single
+                                 batch that may run at the same time
+        """
+        super(JSONRPCServiceCustom, self).__init__()
+        self.batch_concurrency = batch_concurrency
+        self.batch_max_workers = batch_max_workers
+        self.batch_max_per_request = batch_max_per_request
+        self._batch_executor = None
+        self._batch_executor_lock = threading.Lock()
+
     def call(self, ctx, jsondata):
         """
-        Calls jsonrpc service's method and returns its return value in a JSON
-        string or None if there is none.
+        Calls jsonrpc service's method and returns its return value as UTF-8
+        encoded JSON or None if there is none.
 
         Arguments:
         jsondata -- remote method call in jsonrpc format
         """
         result = self.call_py(ctx, jsondata)
         if result is not None:
-            return json.dumps(result, cls=JSONObjectEncoder)
+            return jsoncodec.dumps(result)
 
         return None
 
+    def call_chunks(self, ctx, jsondata, chunk_size):
+        """
+        Like call, but a return value larger than chunk_size is returned as an
+        iterator of UTF-8 encoded JSON chunks of about chunk_size bytes,
+        encoded as they are read. Smaller values are returned as bytes. A
+        value that can't be encoded raises here if it is in the first chunk,
+        and otherwise while the chunks are read.
+
+        Arguments:
+        jsondata -- remote method call in jsonrpc format
+        chunk_size -- the size of the chunks in bytes
+        """
+        result = self.call_py(ctx, jsondata)
+        if result is None:
+            return None
+        return jsoncodec.dumps_chunked(result, chunk_size)
+
     def _call_method(self, ctx, request):
         """Calls given method with given params and returns it value."""
         method = self.method_data[request['method']]['method']
@@ -154,6 +193,13 @@ class JSONRPCServiceCustom(JSONRPCService):
             return respond
         elif isinstance(rdata, list) and rdata:
             # It's a batch.
+            if self.batch_concurrency and len(rdata) > 1:
+                responds = [respond for respond in self._call_batch_concurrently(ctx, rdata)
+                            if respond is not None]
+                if responds:
+                    return responds
+                return None
+
             requests = []
             responds = []
 
@@ -178,12 +224,90 @@ class JSONRPCServiceCustom(JSONRPCService):
             # empty dict, list or wrong type
             raise InvalidRequestError
 
+    def _call_batch_concurrently(self, ctx, rdata):
+        """
+        Runs the members of a batch on the shared thread pool and returns
+        their responses in request order. A member that fails gets an error
+        response of its own rather than failing the whole batch.
+        """
+        executor = self._get_batch_executor()
+        slots = threading.BoundedSemaphore(self.batch_max_per_request)
+
+        def run(request_):
+            try:
+                return self._handle_batch_member(ctx, request_)
+            finally:
+                slots.release()
+
+        results = []
+        for rdata_ in rdata:
+            request_ = self._get_default_vals()
+            try:
+                self._fill_request(request_, rdata_)
+            except JSONRPCError as jre:
+                results.append(self._get_batch_member_error(request_, jre))
+                continue
+            slots.acquire()
+            results.append(executor.submit(tracing.wrap(run), request_))
+        return [r.result() if isinstance(r, Future) else r for r in results]
+
+    def _handle_batch_member(self, ctx, request):
+        try:
+            return self._handle_request(self._get_batch_member_context(ctx, request),
+                                        request)
+        except JSONRPCError as jre:
+            return self._get_batch_member_error(request, jre)
+        except Exception:
+            err = JSONServerError()
+            err.message = 'Unexpected Server Error'
+            err.data = 'An unexpected server error occurred'
+            err.code = 0
+            err.trace = traceback.format_exc()
+            return self._get_batch_member_error(request, err)
+
+    def _get_batch_member_context(self, ctx, request):
+        # members run at the same time, so each gets its own copy of the context
+        member_ctx = MethodContext(ctx._logger)
+        member_ctx.update(ctx)
+        member_ctx['module'], member_ctx['method'] = request['method'].split('.')
+        member_ctx['call_id'] = request['id']
+        member_ctx['provenance'] = [{'service': member_ctx['module'],
+                                     'method': member_ctx['method'],
+                                     'method_params': request['params']
+                                     }]
+        return member_ctx
+
+    def _get_batch_member_error(self, request, jre):
+        # Do not respond to notifications.
+        if request['id'] is None:
+            return None
+        trace = jre.trace if hasattr(jre, 'trace') else None
+        error = {'code': jre.code,
+                 'name': jre.message,
+                 'message': jre.data
+                 }
+        respond = {'error': error, 'id': request['id']}
+        self._fill_ver(request['jsonrpc'], respond)
+        if 'jsonrpc' in respond:
+            error['data'] = trace
+        else:
+            error['error'] = trace
+        return respond
+
+    def _get_batch_executor(self):
+        with self._batch_executor_lock:
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(
+                    max_workers=self.batch_max_workers)
+            return self._batch_executor
+
     def _handle_request(self, ctx, request):
         """Handles given request and returns its response."""
         if 'types' in self.method_data[request['method']]:
             self._validate_params_types(request['method'], request['params'])
 
-        result = self._call_method(ctx, request)
+        with tracing.span(request['method']):
+            result = self._call_method(ctx, request)
 
         # Do not respond to notifications.
         if request['id'] is None:
@@ -336,7 +460,11 @@ class Application(object):
             submod, ip_address=True, authuser=True, module=True, method=True,
             call_id=True, logfile=self.userlog.get_log_file())
         self.serverlog.set_log_level(6)
-        self.rpc_service = JSONRPCServiceCustom()
+        batch_config = config or {}
+        self.rpc_service = JSONRPCServiceCustom(
+            batch_concurrency=batch_config.get('batch-concurrency', 'true') == 'true',
+            batch_max_workers=int(batch_config.get('batch-max-workers', 10)),
+            batch_max_per_request=int(batch_config.get('batch-max-per-request', 5)))
         self.method_authentication = dict()
         self.rpc_service.add(impl_SetAPI.get_differential_expression_matrix_set_v1,
                              name='SetAPI.get_differential_expression_matrix_set_v1',
@@ -410,16 +538,59 @@ class Application(object):
                              name='SetAPI.get_set_items',
                              types=[dict])
         self.method_authentication['SetAPI.get_set_items'] = 'optional'  # noqa
+        self.rpc_service.add(impl_SetAPI.get_sets,
+                             name='SetAPI.get_sets',
+                             types=[dict])
+        self.method_authentication['SetAPI.get_sets'] = 'optional'  # noqa
+        self.rpc_service.add(impl_SetAPI.save_sets,
+                             name='SetAPI.save_sets',
+                             types=[dict])
+        self.method_authentication['SetAPI.save_sets'] = 'required'  # noqa
         self.rpc_service.add(impl_SetAPI.status,
                              name='SetAPI.status',
                              types=[dict])
         authurl = config.get(AUTH) if config else None
-        self.auth_client = _KBaseAuth(authurl)
+        auth_config = config or {}
+        self.auth_client = _KBaseAuth(
+            authurl,
+            cache_maxsize=int(auth_config.get('auth-token-cache-size', 2000)),
+            cache_ttl_sec=int(auth_config.get('auth-token-cache-ttl-seconds', 300)),
+            cache_invalid_ttl_sec=int(auth_config.get(
+                'auth-invalid-token-cache-ttl-seconds', 30)))
+        response_config = config or {}
+        self.response_compression = response_config.get(
+            'response-compression', 'true') == 'true'
+        self.compression_min_bytes = int(response_config.get(
+            'response-compression-min-bytes', 1024))
+        self.compression_stream_bytes = int(response_config.get(
+            'response-compression-stream-bytes', 1048576))
+        self.compression_level = int(response_config.get(
+            'response-compression-level', 6))
+        self.response_chunk_bytes = int(response_config.get(
+            'response-chunk-bytes', 262144))
+        self.metrics = impl_SetAPI.metrics
+        self.metrics_endpoint = response_config.get('metrics-endpoint', 'true') == 'true'
+        # off, on-request (when the request has an X-SetAPI-Timing header) or always
+        self.request_tracing = response_config.get('request-tracing', 'on-request')
+        token_cache = self.auth_client._cache
+        self.metrics.add_counter('setapi_auth_token_cache_hits_total', lambda: token_cache.hits,
+                                 'Token validations answered by the token cache')
+        self.metrics.add_counter('setapi_auth_token_cache_misses_total',
+                                 lambda: token_cache.misses,
+                                 'Token validations sent to the auth service')
 
     def __call__(self, environ, start_response):
         # Context object, equivalent to the perl impl CallContext
         ctx = MethodContext(self.userlog)
         ctx['client_ip'] = getIPAddress(environ)
+        if (self.metrics_endpoint and environ['REQUEST_METHOD'] == 'GET' and
+                environ.get('PATH_INFO', '').rstrip('/') == '/metrics'):
+            return self.serve_metrics(start_response)
+        start_time = time.time()
+        # counted by the Workspace clients the Impl makes for this request
+        ctx['workspace_calls'] = CallCounts()
+        metrics_method = 'unknown'
+        timing = None
         status = '500 Internal Server Error'
 
         try:
@@ -429,11 +600,11 @@ class Application(object):
         if environ['REQUEST_METHOD'] == 'OPTIONS':
             # we basically do nothing and just return headers
             status = '200 OK'
-            rpc_result = ""
+            rpc_result = b''
         else:
             request_body = environ['wsgi.input'].read(body_size)
             try:
-                req = json.loads(request_body)
+                req = jsoncodec.loads(request_body)
             except ValueError as ve:
                 err = {'error': {'code': -32700,
                                  'name': "Parse error",
@@ -442,25 +613,35 @@ class Application(object):
                        }
                 rpc_result = self.process_error(err, ctx, {'version': '1.1'})
             else:
-                ctx['module'], ctx['method'] = req['method'].split('.')
-                ctx['call_id'] = req['id']
-                ctx['rpc_context'] = {
-                    'call_stack': [{'time': self.now_in_utc(),
-                                    'method': req['method']}
-                                   ]
-                }
-                prov_action = {'service': ctx['module'],
-                               'method': ctx['method'],
-                               'method_params': req['params']
-                               }
-                ctx['provenance'] = [prov_action]
+                # for a batch, the context describes the first call; each
+                # member gets its own method and provenance when it is run
+                first_req = req[0] if isinstance(req, list) and req else req
+                if not isinstance(first_req, dict):
+                    first_req = {}
                 try:
+                    self.check_request_shape(req)
+                    ctx['module'], ctx['method'] = first_req['method'].split('.')
+                    # only the names of served methods become metrics labels, so
+                    # clients can't add series without bound
+                    if isinstance(req, list):
+                        metrics_method = 'batch'
+                    elif first_req['method'] in self.rpc_service.method_data:
+                        metrics_method = ctx['method']
+                    ctx['call_id'] = first_req.get('id')
+                    ctx['rpc_context'] = {
+                        'call_stack': [{'time': self.now_in_utc(),
+                                        'method': first_req['method']}
+                                       ]
+                    }
+                    prov_action = {'service': ctx['module'],
+                                   'method': ctx['method'],
+                                   'method_params': first_req.get('params')
+                                   }
+                    ctx['provenance'] = [prov_action]
                     token = environ.get('HTTP_AUTHORIZATION')
                     # parse out the method being requested and check if it
                     # has an authentication requirement
-                    method_name = req['method']
-                    auth_req = self.method_authentication.get(
-                        method_name, 'none')
+                    auth_req = self.get_auth_requirement(req)
                     if auth_req != 'none':
                         if token is None and auth_req == 'required':
                             err = JSONServerError()
@@ -487,7 +668,20 @@ class Application(object):
                         self.log(log.INFO, ctx, 'X-Forwarded-For: ' +
                                  environ.get('HTTP_X_FORWARDED_FOR'))
                     self.log(log.INFO, ctx, 'start method')
-                    rpc_result = self.rpc_service.call(ctx, req)
+                    if (self.request_tracing == 'always' or
+                            (self.request_tracing == 'on-request' and
+                             environ.get('HTTP_X_SETAPI_TIMING'))):
+                        timing = tracing.start_trace(metrics_method)
+                    try:
+                        if self.response_chunk_bytes > 0:
+                            rpc_result = self.rpc_service.call_chunks(
+                                ctx, req, self.response_chunk_bytes)
+                        else:
+                            rpc_result = self.rpc_service.call(ctx, req)
+                    finally:
+                        tracing.stop_trace(timing)
+                    if timing is not None:
+                        self.log(log.INFO, ctx, timing.to_log_message())
                     self.log(log.INFO, ctx, 'end method')
                     status = '200 OK'
                 except JSONRPCError as jre:
@@ -497,7 +691,7 @@ class Application(object):
                                      }
                            }
                     trace = jre.trace if hasattr(jre, 'trace') else None
-                    rpc_result = self.process_error(err, ctx, req, trace)
+                    rpc_result = self.process_error(err, ctx, first_req, trace)
                 except Exception:
                     err = {'error': {'code': 0,
                                      'name': 'Unexpected Server Error',
@@ -505,7 +699,7 @@ class Application(object):
                                                 'occurred',
                                      }
                            }
-                    rpc_result = self.process_error(err, ctx, req,
+                    rpc_result = self.process_error(err, ctx, first_req,
                                                     traceback.format_exc())
 
         # print('Request method was %s\n' % environ['REQUEST_METHOD'])
@@ -517,16 +711,112 @@ class Application(object):
         if rpc_result:
             response_body = rpc_result
         else:
-            response_body = ''
+            response_body = b''
 
         response_headers = [
             ('Access-Control-Allow-Origin', '*'),
             ('Access-Control-Allow-Headers', environ.get(
                 'HTTP_ACCESS_CONTROL_REQUEST_HEADERS', 'authorization')),
-            ('content-type', 'application/json'),
-            ('content-length', str(len(response_body)))]
+            ('content-type', 'application/json')]
+        if timing is not None:
+            response_headers.append(('X-SetAPI-Timing', timing.to_header()))
+            response_headers.append(('Access-Control-Expose-Headers', 'X-SetAPI-Timing'))
+        # results larger than a chunk are sent as they are encoded, without
+        # a content-length
+        streamed = not isinstance(response_body, bytes)
+        encoding = None
+        if self.response_compression:
+            response_headers.append(('Vary', 'Accept-Encoding'))
+            if streamed or len(response_body) >= self.compression_min_bytes:
+                encoding = compression.choose_encoding(
+                    environ.get('HTTP_ACCEPT_ENCODING'))
+        if streamed:
+            if encoding is not None:
+                response_headers.append(('content-encoding', encoding))
+                response_body = compression.compress_iter(
+                    response_body, encoding, self.compression_level)
+            response = response_body
+        elif encoding is None:
+            response_headers.append(('content-length', str(len(response_body))))
+            response = [response_body]
+        else:
+            response_headers.append(('content-encoding', encoding))
+            if len(response_body) < self.compression_stream_bytes:
+                response_body = compression.compress(
+                    response_body, encoding, self.compression_level)
+                response_headers.append(('content-length', str(len(response_body))))
+                response = [response_body]
+            else:
+                # large bodies are sent as they're compressed, without a
+                # content-length
+                response = compression.compress_chunks(
+                    response_body, encoding, self.compression_level)
         start_response(status, response_headers)
-        return [response_body.encode('utf8')]
+        return self.record_request(metrics_method, ctx, start_time, body_size,
+                                   status, response)
+
+    def record_request(self, method, ctx, start_time, bytes_in, status, response):
+        """
+        Adds a request to the metrics and returns its response. The bytes of a
+        streamed response are counted as it is sent.
+        """
+        bytes_out = sum(len(b) for b in response) if isinstance(response, list) else 0
+        self.metrics.observe_request(
+            method, time.time() - start_time, bytes_in, bytes_out,
+            error=not status.startswith('200'),
+            workspace_calls=ctx['workspace_calls'].snapshot())
+        if isinstance(response, list):
+            return response
+        return self._count_response_bytes(method, ctx, response)
+
+    def _count_response_bytes(self, method, ctx, chunks):
+        sent = 0
+        try:
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        except Exception:
+            # the status has been sent, so the server closes the connection
+            # instead, leaving the client a truncated body that won't parse
+            self.metrics.inc('setapi_request_errors_total', (('method', method),))
+            self.log(log.ERR, ctx, 'Response failed after ' + str(sent) + ' bytes: ' +
+                     traceback.format_exc())
+            raise
+        finally:
+            self.metrics.add_response_bytes(method, sent)
+
+    def serve_metrics(self, start_response):
+        body = self.metrics.to_prometheus().encode('utf-8')
+        start_response('200 OK', [
+            ('content-type', 'text/plain; version=0.0.4; charset=utf-8'),
+            ('content-length', str(len(body)))])
+        return [body]
+
+    def check_request_shape(self, req):
+        """
+        Raises an invalid request error unless req is a request, or a non
+        empty list of them, and the first has a method of the form
+        Module.method. Other problems with the members of a batch are
+        answered by each member's own error.
+        """
+        reqs = req if isinstance(req, list) else [req]
+        if not reqs or not all(isinstance(r, dict) for r in reqs):
+            err = InvalidRequestError()
+            err.data = 'The request must be an object, or a non-empty list of objects'
+            raise err
+        method = reqs[0].get('method')
+        if not isinstance(method, str) or len(method.split('.')) != 2:
+            err = InvalidRequestError()
+            err.data = ('The request must have a "method" of the form Module.method, not ' +
+                        repr(method))
+            raise err
+
+    def get_auth_requirement(self, req):
+        # a batch needs the strictest authentication of any of its members
+        levels = ['none', 'optional', 'required']
+        reqs = req if isinstance(req, list) else [req]
+        return max([self.method_authentication.get(r.get('method'), 'none')
+                    for r in reqs], key=levels.index)
 
     def process_error(self, error, context, request, trace=None):
         if trace:
@@ -544,7 +834,7 @@ class Application(object):
         else:
             error['version'] = '1.0'
             error['error']['error'] = trace
-        return json.dumps(error)
+        return jsoncodec.dumps(error)
 
     def now_in_utc(self):
         # noqa Taken from http://stackoverflow.com/questions/3401428/how-to-get-an-isoformat-datetime-string-including-the-default-timezone @IgnorePep8
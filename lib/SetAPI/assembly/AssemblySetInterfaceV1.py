@@ -1,3 +1,4 @@
+from SetAPI import tracing
 from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
 
 
@@ -7,6 +8,7 @@ class AssemblySetInterfaceV1:
         self.ws = workspace_client
         self.setInterface = SetInterfaceV1(workspace_client)
 
+    @tracing.traced
     def save_assembly_set(self, ctx, params):
         if 'data' in params:
             self._validate_assembly_set_data(params['data'])
@@ -24,6 +26,7 @@ class AssemblySetInterfaceV1:
             'set_info': info
         }
 
+    @tracing.traced
     def _validate_assembly_set_data(self, data):
         # TODO: add checks that only one copy of each assembly data is in the set
 
@@ -37,6 +40,7 @@ class AssemblySetInterfaceV1:
         if 'description' not in data:
             data['description'] = ''
 
+    @tracing.traced
     def get_assembly_set(self, ctx, params):
         self._check_get_assembly_set_params(params)
 
@@ -9,47 +9,76 @@ import time as _time
 import requests as _requests
 import threading as _threading
 import hashlib
+from collections import OrderedDict as _OrderedDict
 
 
 class TokenCache(object):
-    ''' A basic cache for tokens. '''
+    '''
+    A basic LRU cache for tokens. Valid tokens are kept for ttl_sec, and tokens
+    the auth service rejected for invalid_ttl_sec, so a client retrying with a
+    bad token doesn't reach the auth service on every call. Only a hash of each
+    token is kept.
+    '''
 
     _MAX_TIME_SEC = 5 * 60  # 5 min
+    _MAX_INVALID_TIME_SEC = 30
 
-    _lock = _threading.RLock()
-
-    def __init__(self, maxsize=2000):
-        self._cache = {}
+    def __init__(self, maxsize=2000, ttl_sec=_MAX_TIME_SEC,
+                 invalid_ttl_sec=_MAX_INVALID_TIME_SEC):
+        self._cache = _OrderedDict()
         self._maxsize = maxsize
-        self._halfmax = maxsize / 2  # int division to round down
+        self._ttl_sec = ttl_sec
+        self._invalid_ttl_sec = invalid_ttl_sec
+        self._lock = _threading.Lock()
+        self.hits = 0
+        self.misses = 0
 
-    def get_user(self, token):
-        token = hashlib.sha256(token).hexdigest()
+    def get(self, token):
+        '''
+        Returns (user, error) for a cached token, where user is None if the
+        token is invalid and error is the reason, or None if the token is not
+        cached.
+        '''
+        key = self._hash(token)
+        now = _time.time()
         with self._lock:
-            usertime = self._cache.get(token)
-        if not usertime:
-            return None
+            entry = self._cache.get(key)
+            if entry is None or now > entry[2]:
+                if entry is not None:
+                    del self._cache[key]
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
 
-        user, intime = usertime
-        if _time.time() - intime > self._MAX_TIME_SEC:
-            return None
-        return user
+    def get_user(self, token):
+        entry = self.get(token)
+        return entry[0] if entry else None
 
     def add_valid_token(self, token, user):
         if not token:
             raise ValueError('Must supply token')
         if not user:
             raise ValueError('Must supply user')
-        token = hashlib.sha256(token).hexdigest()
+        self._add(token, (user, None, _time.time() + self._ttl_sec))
+
+    def add_invalid_token(self, token, error):
+        if not token:
+            raise ValueError('Must supply token')
+        self._add(token, (None, error, _time.time() + self._invalid_ttl_sec))
+
+    def _add(self, token, entry):
+        key = self._hash(token)
         with self._lock:
-            self._cache[token] = [user, _time.time()]
-            if len(self._cache) > self._maxsize:
-                for i, (t, _) in enumerate(sorted(self._cache.items(),
-                                                  key=lambda (_, v): v[1])):
-                    if i <= self._halfmax:
-                        del self._cache[t]
-                    else:
-                        break
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _hash(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
 
 
 class KBaseAuth(object):
@@ -59,21 +88,27 @@ class KBaseAuth(object):
 
     _LOGIN_URL = 'https://kbase.us/services/auth/api/legacy/KBase/Sessions/Login'
 
-    def __init__(self, auth_url=None):
+    def __init__(self, auth_url=None, cache_maxsize=2000,
+                 cache_ttl_sec=TokenCache._MAX_TIME_SEC,
+                 cache_invalid_ttl_sec=TokenCache._MAX_INVALID_TIME_SEC):
         '''
         Constructor
         '''
         self._authurl = auth_url
         if not self._authurl:
             self._authurl = self._LOGIN_URL
-        self._cache = TokenCache()
+        self._cache = TokenCache(maxsize=cache_maxsize, ttl_sec=cache_ttl_sec,
+                                 invalid_ttl_sec=cache_invalid_ttl_sec)
 
     def get_user(self, token):
         if not token:
             raise ValueError('Must supply token')
-        user = self._cache.get_user(token)
-        if user:
-            return user
+        cached = self._cache.get(token)
+        if cached:
+            user, error = cached
+            if user:
+                return user
+            raise ValueError(error)
 
         d = {'token': token, 'fields': 'user_id'}
         ret = _requests.post(self._authurl, data=d)
@@ -82,9 +117,13 @@ class KBaseAuth(object):
                 err = ret.json()
             except:
                 ret.raise_for_status()
-            raise ValueError('Error connecting to auth service: {} {}\n{}'
-                             .format(ret.status_code, ret.reason,
-                                     err['error']['message']))
+            error = ('Error connecting to auth service: {} {}\n{}'
+                     .format(ret.status_code, ret.reason,
+                             err['error']['message']))
+            # only a rejected token is cached, not a rate limit or other failure
+            if ret.status_code == 401:
+                self._cache.add_invalid_token(token, error)
+            raise ValueError(error)
 
         user = ret.json()['user_id']
         self._cache.add_valid_token(token, user)
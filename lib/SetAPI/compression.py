@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+'''
+gzip and deflate compression of HTTP responses, negotiated from the request's
+Accept-Encoding header.
+'''
+import zlib
+
+# in order of preference when the client accepts both equally
+ENCODINGS = ('gzip', 'deflate')
+
+_ALIASES = {'x-gzip': 'gzip'}
+
+
+def choose_encoding(accept_encoding):
+    '''
+    Returns 'gzip' or 'deflate', whichever the Accept-Encoding header value
+    gives the highest q, or None if it accepts neither.
+    '''
+    if not accept_encoding:
+        return None
+    qvalues = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[_ALIASES.get(coding, coding)] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = qvalues.get(encoding, qvalues.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compressor(encoding, level):
+    # gzip has a gzip header and trailer, HTTP deflate is zlib wrapped
+    wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+    return zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+
+def compress(body, encoding, level=6):
+    ''' Returns the bytes body compressed with the encoding. '''
+    compressor = _compressor(encoding, level)
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_chunks(body, encoding, level=6, chunk_size=256 * 1024):
+    '''
+    Compresses the bytes body a chunk at a time, yielding the compressed
+    output as it's produced, so a large response can be sent while the rest
+    is still being compressed.
+    '''
+    view = memoryview(body)
+    return compress_iter((view[start:start + chunk_size]
+                          for start in range(0, len(view), chunk_size)),
+                         encoding, level)
+
+
+def compress_iter(chunks, encoding, level=6):
+    ''' Compresses an iterable of bytes chunks, yielding the compressed output. '''
+    compressor = _compressor(encoding, level)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
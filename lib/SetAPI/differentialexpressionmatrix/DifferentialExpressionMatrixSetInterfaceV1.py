@@ -1,6 +1,7 @@
 """
 An interface for handling sets of Expression objects.
 """
+from SetAPI import tracing
 from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
 from SetAPI.util import check_reference
 
@@ -10,6 +11,7 @@ class DifferentialExpressionMatrixSetInterfaceV1:
         self.workspace_client = workspace_client
         self.set_interface = SetInterfaceV1(workspace_client)
 
+    @tracing.traced
     def save_differential_expression_matrix_set(self, ctx, params):
         if 'data' in params and params['data'] is not None:
             self._validate_differential_expression_matrix_set_data(params['data'])
@@ -28,7 +30,8 @@ class DifferentialExpressionMatrixSetInterfaceV1:
             'set_info': info
         }
 
-    def _validate_differential_expression_matrix_set_data(self, data):
+    @tracing.traced
+    def _validate_differential_expression_matrix_set_data(self, data, item_infos=None):
         # Normalize the object, make empty strings where necessary
         if "description" not in data:
             data["description"] = ""
@@ -49,12 +52,17 @@ class DifferentialExpressionMatrixSetInterfaceV1:
         # Genome key in the object metadata). Make a set out of them.
         # If there's more than 1 item in the set, then either those items are bad, or they're
         # aligned against different genomes.
-        info = self.workspace_client.get_object_info3({"objects": ref_list, "includeMetadata": 1})
-        num_genomes = len(set([item[10].get("Genome", None) for item in info["infos"]]))
+        if item_infos is None:
+            infos = self.workspace_client.get_object_info3(
+                {"objects": ref_list, "includeMetadata": 1})["infos"]
+        else:
+            infos = [item_infos[r] for r in refs]
+        num_genomes = len(set([item[10].get("Genome", None) for item in infos]))
         if num_genomes > 1:
             raise ValueError("All Differential Expression Matrix objects in the set must use "
                              "the same genome reference.")
 
+    @tracing.traced
     def get_differential_expression_matrix_set(self, ctx, params):
         self._check_get_differential_expression_matrix_set_params(params)
 
@@ -1,7 +1,7 @@
 """
 An interface for handling sets of Expression objects.
 """
-from SetAPI import util
+from SetAPI import tracing, util
 from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
 
 
@@ -10,6 +10,7 @@ class ExpressionSetInterfaceV1:
         self.workspace_client = workspace_client
         self.set_interface = SetInterfaceV1(workspace_client)
 
+    @tracing.traced
     def save_expression_set(self, ctx, params):
         if 'data' in params and params['data'] is not None:
             self._validate_expression_set_data(params['data'])
@@ -27,7 +28,8 @@ class ExpressionSetInterfaceV1:
             'set_info': info
         }
 
-    def _validate_expression_set_data(self, data):
+    @tracing.traced
+    def _validate_expression_set_data(self, data, item_infos=None):
         # Normalize the object, make empty strings where necessary
         if "description" not in data:
             data["description"] = ""
@@ -48,14 +50,19 @@ class ExpressionSetInterfaceV1:
         # the object metadata). Make a set out of them.
         # If there's 0 or more than 1 item in the set, then either those items are bad, or they're
         # aligned against different genomes.
-        info = self.workspace_client.get_object_info3({"objects": ref_list, "includeMetadata": 1})
-        num_genomes = len(set([item[10]["genome_id"] for item in info["infos"]]))
+        if item_infos is None:
+            infos = self.workspace_client.get_object_info3(
+                {"objects": ref_list, "includeMetadata": 1})["infos"]
+        else:
+            infos = [item_infos[r] for r in refs]
+        num_genomes = len(set([item[10]["genome_id"] for item in infos]))
         if num_genomes == 0 or num_genomes > 1:
             raise ValueError("All Expression objects in the set must use "
                              "the same genome reference.")
 
+    @tracing.traced
     def get_expression_set(self, ctx, params):
-        set_type, obj_spec = self._check_get_expression_set_params(params)
+        obj_spec = self._check_get_expression_set_params(params)
 
         include_item_info = False
         if 'include_item_info' in params:
@@ -71,19 +78,20 @@ class ExpressionSetInterfaceV1:
         if 'ref_path_to_set' in params:
             ref_path_to_set = params['ref_path_to_set']
 
+        obj_data = self.set_interface.get_set_object(params['ref'], ref_path_to_set)
+        set_type = obj_data["info"][2]
+
         if "KBaseSets" in set_type:
             # If it's a KBaseSets type, then we know the usual interface will work...
             return self.set_interface.get_set(
                 params['ref'],
                 include_item_info,
                 ref_path_to_set,
-                include_set_item_ref_paths
+                include_set_item_ref_paths,
+                ws_data=obj_data
             )
         else:
-            # ...otherwise, we need to fetch it directly from the workspace and tweak it into the
-            # expected return object
-
-            obj_data = self.workspace_client.get_objects2({"objects": [obj_spec]})["data"][0]
+            # ...otherwise, we need to tweak it into the expected return object
 
             obj = obj_data["data"]
             obj_info = obj_data["info"]
@@ -128,8 +136,5 @@ class ExpressionSetInterfaceV1:
         if 'include_item_info' in params:
             if params['include_item_info'] not in [0, 1]:
                 raise ValueError('"include_item_info" parameter field can only be set to 0 or 1')
-        obj_spec = util.build_ws_obj_selector(params.get('ref'),
-                                              params.get('ref_path_to_set', []))
-        info = self.workspace_client.get_object_info3({"objects": [obj_spec]})
-
-        return info["infos"][0][2], obj_spec
+        return util.build_ws_obj_selector(params.get('ref'),
+                                          params.get('ref_path_to_set', []))
@@ -1,6 +1,7 @@
 """
 An interface for saving and retrieving Sets of FeatureSets.
 """
+from SetAPI import tracing
 from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
 from SetAPI.util import check_reference
 
@@ -10,6 +11,7 @@ class FeatureSetSetInterfaceV1:
         self.ws = workspace_client
         self.set_interface = SetInterfaceV1(workspace_client)
 
+    @tracing.traced
     def save_feature_set_set(self, ctx, params):
         if 'data' in params and params['data'] is not None:
             self._validate_feature_set_set_data(params['data'])
@@ -27,6 +29,7 @@ class FeatureSetSetInterfaceV1:
             'set_info': info
         }
 
+    @tracing.traced
     def _validate_feature_set_set_data(self, data):
         if 'items' not in data:
             raise ValueError('"items" list must be defined in data to save a FeatureSetSet')
@@ -38,6 +41,7 @@ class FeatureSetSetInterfaceV1:
         if 'description' not in data:
             data['description'] = ''
 
+    @tracing.traced
     def get_feature_set_set(self, ctx, params):
         self._check_get_feature_set_set_params(params)
 
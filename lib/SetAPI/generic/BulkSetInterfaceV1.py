@@ -0,0 +1,116 @@
+"""
+An interface for saving many sets, of any of the KBaseSets types, at once.
+"""
+from SetAPI.assembly.AssemblySetInterfaceV1 import AssemblySetInterfaceV1
+from SetAPI.differentialexpressionmatrix.DifferentialExpressionMatrixSetInterfaceV1 import \
+    DifferentialExpressionMatrixSetInterfaceV1
+from SetAPI.expression.ExpressionSetInterfaceV1 import ExpressionSetInterfaceV1
+from SetAPI.featureset.FeatureSetSetInterfaceV1 import FeatureSetSetInterfaceV1
+from SetAPI import tracing
+from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
+from SetAPI.genome.GenomeSetInterfaceV1 import GenomeSetInterfaceV1
+from SetAPI.reads.ReadsSetInterfaceV1 import ReadsSetInterfaceV1
+from SetAPI.readsalignment.ReadsAlignmentSetInterfaceV1 import ReadsAlignmentSetInterfaceV1
+
+
+class BulkSetInterfaceV1:
+
+    # set types whose validators check the metadata of their items, given as a
+    # dict of item ref -> info looked up once for all the sets
+    ITEM_INFO_SET_TYPES = ['KBaseSets.ExpressionSet',
+                           'KBaseSets.ReadsAlignmentSet',
+                           'KBaseSets.DifferentialExpressionMatrixSet']
+
+    def __init__(self, workspace_client, chunk_size=100, chunk_max_bytes=50000000):
+        self.ws = workspace_client
+        self.set_interface = SetInterfaceV1(workspace_client)
+        self.chunk_size = chunk_size
+        self.chunk_max_bytes = chunk_max_bytes
+        genome_set_interface = GenomeSetInterfaceV1(workspace_client)
+        # the same validation (and normalization) as the save_*_set_v1 methods
+        self.validators = {
+            'KBaseSets.ReadsSet':
+                ReadsSetInterfaceV1(workspace_client)._validate_reads_set_data,
+            'KBaseSets.AssemblySet':
+                AssemblySetInterfaceV1(workspace_client)._validate_assembly_set_data,
+            'KBaseSets.GenomeSet':
+                lambda data: genome_set_interface._validate_genome_set_data(data, False),
+            'KBaseSets.FeatureSetSet':
+                FeatureSetSetInterfaceV1(workspace_client)._validate_feature_set_set_data,
+            'KBaseSets.ExpressionSet':
+                ExpressionSetInterfaceV1(workspace_client)._validate_expression_set_data,
+            'KBaseSets.ReadsAlignmentSet':
+                ReadsAlignmentSetInterfaceV1(
+                    workspace_client)._validate_reads_alignment_set_data,
+            'KBaseSets.DifferentialExpressionMatrixSet':
+                DifferentialExpressionMatrixSetInterfaceV1(
+                    workspace_client)._validate_differential_expression_matrix_set_data
+        }
+
+    @tracing.traced
+    def save_sets(self, ctx, params):
+        """
+        Validates all the sets in params['sets'], then saves them with as few
+        save_objects calls as possible. Nothing is saved if any set is invalid.
+        """
+        self._check_save_sets_params(params)
+        sets = params['sets']
+
+        item_refs = []
+        for s in sets:
+            if self._get_base_type(s['set_type']) in self.ITEM_INFO_SET_TYPES:
+                item_refs.extend(item['ref'] for item in s['data'].get('items', [])
+                                 if 'ref' in item)
+        item_infos = self._get_item_infos(item_refs)
+
+        for idx, s in enumerate(sets):
+            try:
+                self._validate_set(s, item_infos)
+            except ValueError as e:
+                raise ValueError('Set ' + str(idx) + ' ("' + str(s.get('output_object_name')) +
+                                 '") is not valid: ' + str(e))
+
+        infos = self.set_interface.save_sets([(s['set_type'], s) for s in sets],
+                                             ctx['provenance'],
+                                             chunk_size=self.chunk_size,
+                                             chunk_max_bytes=self.chunk_max_bytes)
+        return {'sets': [{
+            'set_ref': str(info[6]) + '/' + str(info[0]) + '/' + str(info[4]),
+            'set_info': info
+        } for info in infos]}
+
+    def _check_save_sets_params(self, params):
+        if 'sets' not in params or not isinstance(params['sets'], list):
+            raise ValueError('"sets" parameter field providing a list of sets is required')
+        for idx, s in enumerate(params['sets']):
+            if self._get_base_type(s.get('set_type')) not in self.validators:
+                raise ValueError('Set ' + str(idx) + ' has an unsupported "set_type": ' +
+                                 str(s.get('set_type')) + '. Supported types are: ' +
+                                 ', '.join(sorted(self.validators)))
+            if not isinstance(s.get('data'), dict):
+                raise ValueError('Set ' + str(idx) + ' needs a "data" field specifying the set')
+
+    def _validate_set(self, s, item_infos):
+        set_type = self._get_base_type(s['set_type'])
+        if set_type not in self.ITEM_INFO_SET_TYPES:
+            self.validators[set_type](s['data'])
+            return
+        for item in s['data'].get('items', []):
+            if 'ref' in item and item_infos.get(item['ref']) is None:
+                raise ValueError('Item ' + item['ref'] + ' does not exist or is not accessible')
+        self.validators[set_type](s['data'], item_infos)
+
+    @tracing.traced
+    def _get_item_infos(self, refs):
+        refs = list(dict.fromkeys(refs))
+        if not refs:
+            return {}
+        infos = self.ws.get_object_info3({'objects': [{'ref': ref} for ref in refs],
+                                          'includeMetadata': 1,
+                                          'ignoreErrors': 1})['infos']
+        return dict(zip(refs, infos))
+
+    @staticmethod
+    def _get_base_type(set_type):
+        # e.g. KBaseSets.ReadsSet-2.0 -> KBaseSets.ReadsSet
+        return str(set_type).split('-')[0]
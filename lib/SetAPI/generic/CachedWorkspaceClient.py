@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from SetAPI import tracing
+
+
+class CachedWorkspaceClient:
+    '''
+    Wraps a Workspace client so that object info lookups on immutable (versioned)
+    references are served from an ObjectInfoCache where possible. Every info the
+    Workspace does return, from get_object_info3/get_object_info_new,
+    get_objects2 or list_objects, is added to the cache.
+
+    Lookups of more than chunk_size objects (if > 0) are split into several
+    get_object_info3 calls of at most chunk_size objects, up to max_parallel_chunks
+    of them running at a time, so large sets stay within the Workspace request
+    size limits. The results are merged back in the requested order.
+
+    If given a SingleFlight, concurrent get_objects2 calls for the same immutable
+    objects with the same options, from any request, share one Workspace call.
+    A request served with the result of another request's call first checks
+    that its own token can read the objects (with ignoreErrors, the ones it
+    can't read are set to None), which is answered from the cache when the
+    token has recently read their workspaces.
+
+    Any other method is passed straight through to the wrapped client.
+    '''
+
+    def __init__(self, workspace_client, object_info_cache, token=None, chunk_size=0,
+                 max_parallel_chunks=1, single_flight=None):
+        self._ws = workspace_client
+        self._single_flight = single_flight
+        self._cache = object_info_cache
+        self._token = token
+        self._chunk_size = chunk_size
+        self._max_parallel_chunks = max_parallel_chunks
+
+    def __getattr__(self, name):
+        return getattr(self._ws, name)
+
+    def get_object_info3(self, params, context=None):
+        infos, paths = self._get_object_infos(params, context)
+        return {'infos': infos, 'paths': paths}
+
+    def get_object_info_new(self, params, context=None):
+        infos, _ = self._get_object_infos(params, context)
+        return infos
+
+    def get_objects2(self, params, context=None):
+        objects = params.get('objects', [])
+        if self._single_flight is not None and objects and \
+                all(self._cache.cache_key(obj_selector) is not None for obj_selector in objects):
+            result, shared = self._single_flight.do(
+                json.dumps(params, sort_keys=True),
+                lambda: self._ws.get_objects2(params, context))
+            if shared:
+                # raises the Workspace error if this token can't read the objects,
+                # or with ignoreErrors leaves out the ones it can't read
+                infos = self.get_object_info_new(
+                    {'objects': objects, 'ignoreErrors': params.get('ignoreErrors', 0)},
+                    context)
+                for idx, obj_info in enumerate(infos):
+                    if obj_info is None:
+                        result['data'][idx] = None
+        else:
+            result = self._ws.get_objects2(params, context)
+        for obj_selector, obj_data in zip(objects, result['data']):
+            if obj_data is None:
+                continue
+            key = self._cache.cache_key(obj_selector)
+            if key is not None:
+                self._cache.add(key, obj_data['info'], self._token)
+        return result
+
+    def list_objects(self, params, context=None):
+        obj_info_list = self._ws.list_objects(params, context)
+        if params.get('includeMetadata', 0) == 1:
+            for obj_info in obj_info_list:
+                self._cache.add(self._cache.info_to_key(obj_info), obj_info, self._token)
+        return obj_info_list
+
+    def _get_object_infos(self, params, context):
+        '''
+        Looks up the infos for params['objects'], only sending the objects that
+        can't be answered from the cache to the Workspace. Returns the infos and
+        the resolved reference paths, in the same order as the requested objects.
+        '''
+        objects = params.get('objects', [])
+        include_metadata = params.get('includeMetadata', 0) == 1
+        infos = [None] * len(objects)
+        paths = [None] * len(objects)
+        missing = []
+        for idx, obj_selector in enumerate(objects):
+            key = self._cache.cache_key(obj_selector)
+            obj_info = self._cache.get(key, self._token) if key is not None else None
+            if obj_info is None:
+                missing.append(idx)
+                continue
+            if not include_metadata:
+                obj_info[10] = None
+            infos[idx] = obj_info
+            # every element of a versioned ref path is already absolute
+            paths[idx] = key.split(';')
+
+        if missing:
+            ws_params = dict(params)
+            ws_params['objects'] = [objects[idx] for idx in missing]
+            if not include_metadata:
+                # fetch metadata anyway so the result can be cached for all callers
+                ws_params['includeMetadata'] = 1
+            ret = self._get_object_info3_chunked(ws_params, context)
+            for pos, idx in enumerate(missing):
+                obj_info = ret['infos'][pos]
+                if obj_info is not None:
+                    self._cache.add(self._cache.cache_key(objects[idx]), obj_info,
+                                    self._token)
+                    if not include_metadata:
+                        obj_info[10] = None
+                infos[idx] = obj_info
+                paths[idx] = ret['paths'][pos]
+        return infos, paths
+
+    def _get_object_info3_chunked(self, params, context):
+        objects = params['objects']
+        if self._chunk_size <= 0 or len(objects) <= self._chunk_size:
+            return self._ws.get_object_info3(params, context)
+
+        chunk_params = []
+        for start in range(0, len(objects), self._chunk_size):
+            chunk_params.append(dict(params, objects=objects[start:start + self._chunk_size]))
+        if self._max_parallel_chunks > 1:
+            with ThreadPoolExecutor(max_workers=min(self._max_parallel_chunks,
+                                                    len(chunk_params))) as executor:
+                futures = [executor.submit(tracing.wrap(self._ws.get_object_info3), p, context)
+                           for p in chunk_params]
+                # re-raises the error of the first failed chunk, if any
+                chunk_results = [f.result() for f in futures]
+        else:
+            chunk_results = [self._ws.get_object_info3(p, context) for p in chunk_params]
+
+        ret = {'infos': [], 'paths': []}
+        for chunk_result in chunk_results:
+            ret['infos'].extend(chunk_result['infos'])
+            ret['paths'].extend(chunk_result['paths'])
+        return ret
@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import random
+import threading
 import time
+from collections import OrderedDict
 
 try:
     # baseclient and this client are in a package
@@ -11,37 +15,116 @@ except:
 
 
 class DynamicServiceCache:
+    '''
+    Calls a dynamic service at the URL the Service Wizard gives for it.
 
-    def __init__(self, sw_url, service_ver, module_name, refresh_cycle_seconds=300):
+    The URL is looked up by the first call. Once it is older than about
+    refresh_cycle_seconds (randomly up to refresh_jitter shorter or longer, so
+    that servers started together don't all refresh together), calls keep using
+    it while a background thread looks it up again. A failed background lookup
+    is retried after min_backoff_seconds, doubling on each further failure up
+    to max_backoff_seconds.
+
+    If a call through the cached URL fails, the URL is looked up again straight
+    away and the call retried once, as the service may have moved.
+
+    A client is kept for each URL and token, for up to max_clients of them.
+    '''
+
+    def __init__(self, sw_url, service_ver, module_name, refresh_cycle_seconds=300,
+                 refresh_jitter=0.1, min_backoff_seconds=1, max_backoff_seconds=300,
+                 max_clients=100):
         self.sw_url = sw_url
         self.service_ver = service_ver
         self.module_name = module_name
         self.refresh_cycle_seconds = refresh_cycle_seconds
+        self.refresh_jitter = refresh_jitter
+        self.min_backoff_seconds = min_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_clients = max_clients
         self.cached_url = None
         self.last_refresh_time = None
+        self.next_refresh_time = None
+        self.failed_refreshes = 0
+        self._lock = threading.Lock()
+        self._lookup_lock = threading.Lock()
+        self._refreshing = False
+        self._clients = OrderedDict()
 
     def call_method(self, method, params_array, token):
         was_url_refreshed = False
-        if (not self.cached_url) or (time.time() - self.last_refresh_time >
-                                     self.refresh_cycle_seconds):
-            self._lookup_url()
-            was_url_refreshed = True
+        url = self.cached_url
+        if not url:
+            with self._lookup_lock:
+                # another caller may have looked it up while this one waited
+                url = self.cached_url
+                if not url:
+                    url = self._lookup_url()
+                    was_url_refreshed = True
+        else:
+            self._refresh_if_stale()
         try:
-            return self._call(method, params_array, token)
+            return self._call(url, method, params_array, token)
         except:
             if was_url_refreshed:
                 raise  # Forwarding error with no changes
             else:
-                self._lookup_url()
-                return self._call(method, params_array, token)
+                url = self._lookup_url()
+                return self._call(url, method, params_array, token)
+
+    def _refresh_if_stale(self):
+        with self._lock:
+            if self._refreshing or time.time() < self.next_refresh_time:
+                return
+            self._refreshing = True
+        thread = threading.Thread(target=self._refresh, name='DynamicServiceCache refresh')
+        thread.daemon = True
+        thread.start()
+
+    def _refresh(self):
+        try:
+            self._lookup_url()
+        except Exception:
+            # keep serving the old URL, and try again later
+            with self._lock:
+                self.failed_refreshes += 1
+                backoff = min(self.max_backoff_seconds,
+                              self.min_backoff_seconds * 2 ** (self.failed_refreshes - 1))
+                self.next_refresh_time = time.time() + self._jitter(backoff)
+        finally:
+            with self._lock:
+                self._refreshing = False
 
     def _lookup_url(self):
         bc = _BaseClient(url=self.sw_url, lookup_url=False)
-        self.cached_url = bc.call_method('ServiceWizard.get_service_status',
-                                         [{'module_name': self.module_name,
-                                           'version': self.service_ver}])['url']
-        self.last_refresh_time = time.time()
-
-    def _call(self, method, params_array, token):
-        bc = _BaseClient(url=self.cached_url, token=token, lookup_url=False)
-        return bc.call_method(self.module_name + '.' + method, params_array)
+        url = bc.call_method('ServiceWizard.get_service_status',
+                             [{'module_name': self.module_name,
+                               'version': self.service_ver}])['url']
+        with self._lock:
+            self.cached_url = url
+            self.last_refresh_time = time.time()
+            self.next_refresh_time = self.last_refresh_time + \
+                self._jitter(self.refresh_cycle_seconds)
+            self.failed_refreshes = 0
+        return url
+
+    def _jitter(self, seconds):
+        return seconds * (1 + self.refresh_jitter * (2 * random.random() - 1))
+
+    def _call(self, url, method, params_array, token):
+        return self._get_client(url, token).call_method(self.module_name + '.' + method,
+                                                        params_array)
+
+    def _get_client(self, url, token):
+        key = (url, hashlib.sha256(token.encode('utf-8')).hexdigest() if token else None)
+        with self._lock:
+            bc = self._clients.get(key)
+            if bc is not None:
+                self._clients.move_to_end(key)
+                return bc
+        bc = _BaseClient(url=url, token=token, lookup_url=False)
+        with self._lock:
+            self._clients[key] = bc
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        return bc
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from SetAPI import util
+
+
+class ObjectInfoCache:
+    '''
+    A process-wide cache of Workspace object_info tuples.
+
+    Objects addressed by an absolute, versioned reference (ws/obj/ver) can never
+    change, so their info tuples can be reused across requests and users. Entries
+    are keyed by the full versioned reference path used to look the object up and
+    evicted in LRU order once the estimated size of the cache exceeds max_bytes.
+
+    Serving a cached info must not bypass Workspace permissions, so a cached entry
+    is only returned to a token that recently proved it can read the workspace at
+    the head of the reference path. These accessibility records expire after
+    access_ttl_seconds, after which the next lookup goes back to the Workspace.
+    '''
+
+    _ENTRY_OVERHEAD = 200  # rough per-entry cost of the containers, in bytes
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, access_ttl_seconds=60,
+                 max_access_records=100000):
+        self.max_bytes = max_bytes
+        self.access_ttl_seconds = access_ttl_seconds
+        self.max_access_records = max_access_records
+        self._infos = OrderedDict()
+        self._access = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(obj_selector):
+        '''
+        Returns the cache key for a Workspace ObjectSpecification, or None if the
+        selector does not address an immutable object (e.g. it uses a name, an
+        unversioned ref, or any field other than 'ref').
+        '''
+        if len(obj_selector) != 1:
+            return None
+        ref = obj_selector.get('ref')
+        # a path of one or more absolute, versioned refs: ws/obj/ver;ws/obj/ver;...
+        obj_ref = util.parse_reference(ref)
+        if obj_ref is None or not obj_ref.is_versioned:
+            return None
+        return ref
+
+    @staticmethod
+    def info_to_key(obj_info):
+        return str(obj_info[6]) + '/' + str(obj_info[0]) + '/' + str(obj_info[4])
+
+    def get(self, key, token):
+        '''
+        Returns a copy of the cached info for key if present and the workspace at
+        the head of the path is known to be readable with token, otherwise None.
+        '''
+        with self._lock:
+            entry = self._infos.get(key)
+            if entry is None or not self._is_accessible(token, self._head_wsid(key)):
+                self.misses += 1
+                return None
+            self._infos.move_to_end(key)
+            self.hits += 1
+        return self._copy_info(entry[0])
+
+    def add(self, key, obj_info, token):
+        '''
+        Stores obj_info under key and records that token can read the workspace
+        at the head of the path. Infos fetched without metadata are not stored,
+        as they cannot answer a later includeMetadata lookup.
+        '''
+        if key is None or obj_info is None or obj_info[10] is None:
+            return
+        info = self._copy_info(obj_info)
+        size = self._estimate_size(key, info)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._mark_accessible(token, self._head_wsid(key))
+            old = self._infos.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._infos[key] = (info, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._infos.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def mark_accessible(self, token, wsid):
+        with self._lock:
+            self._mark_accessible(token, wsid)
+
+    def size(self):
+        with self._lock:
+            return len(self._infos)
+
+    def total_bytes(self):
+        with self._lock:
+            return self._total_bytes
+
+    def clear(self):
+        with self._lock:
+            self._infos.clear()
+            self._access.clear()
+            self._total_bytes = 0
+
+    def _is_accessible(self, token, wsid):
+        access_key = (self._hash_token(token), wsid)
+        checked = self._access.get(access_key)
+        if checked is None:
+            return False
+        if time.time() - checked > self.access_ttl_seconds:
+            del self._access[access_key]
+            return False
+        return True
+
+    def _mark_accessible(self, token, wsid):
+        access_key = (self._hash_token(token), wsid)
+        self._access.pop(access_key, None)
+        self._access[access_key] = time.time()
+        while len(self._access) > self.max_access_records:
+            self._access.popitem(last=False)
+
+    @staticmethod
+    def _head_wsid(key):
+        return int(key[:key.index('/')])
+
+    @staticmethod
+    def _hash_token(token):
+        if not token:
+            return None
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _copy_info(obj_info):
+        # callers are free to modify the returned info (and its metadata dict)
+        info = list(obj_info)
+        if info[10] is not None:
+            info[10] = dict(info[10])
+        return info
+
+    def _estimate_size(self, key, info):
+        size = self._ENTRY_OVERHEAD + len(key)
+        for field in info[:10]:
+            size += len(str(field))
+        for k, v in info[10].items():
+            size += len(k) + len(str(v))
+        return size
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+from concurrent.futures import Future
+
+from SetAPI import jsoncodec
+
+
+class WorkspaceCallStats:
+    '''
+    Thread safe totals of the RequestWorkspaceClient counters, across requests.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def add(self, counts):
+        with self._lock:
+            for name, count in counts.items():
+                self._counts[name] = self._counts.get(name, 0) + count
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class _InfoBatch:
+    ''' Objects to look up together in a single get_object_info3 call. '''
+
+    def __init__(self):
+        self.selectors = {}
+        self.done = False
+        self.error = None
+
+
+class _SharedCall:
+    ''' A call to one of the SHARED_READ_METHODS, and how many callers wait on it. '''
+
+    def __init__(self):
+        self.future = Future()
+        self.waiters = 0
+
+
+class RequestWorkspaceClient:
+    '''
+    Wraps the Workspace client used by a single SetAPI request, so that the
+    same lookups made by different parts of the request reach the Workspace
+    once:
+
+    - get_object_info3/get_object_info_new only look up the objects that this
+      request has not looked up yet (get_objects2 results count too). Lookups
+      made while another one is in flight are merged into a single call.
+    - a get_objects2 or get_workspace_info call identical to one still in
+      flight waits for it instead of sending the same call again, and gets a
+      copy of its result. Results are not kept once the call is done.
+
+    Any other method is passed straight through. Since it may change objects,
+    a method that is not known to only read (e.g. save_objects) also makes the
+    request forget everything it has looked up so far.
+
+    The calls made, the calls sent to the Workspace and how the rest were
+    saved are counted in stats, and added to totals, if given.
+    '''
+
+    # reads whose results are shared by identical concurrent calls in the request
+    SHARED_READ_METHODS = ['get_objects2', 'get_workspace_info']
+
+    # reads passed straight through, their results are too big or too rarely
+    # repeated to be worth keeping
+    UNSHARED_READ_METHODS = ['list_objects', 'list_workspace_info', 'ver']
+
+    def __init__(self, workspace_client, totals=None):
+        self._ws = workspace_client
+        self._totals = totals
+        self._lock = threading.Condition()
+        # calls to SHARED_READ_METHODS in flight, by method and params
+        self._calls = {}
+        # the info and path of each object selector looked up so far
+        self._infos = {}
+        # the batch that will fetch (or is fetching) each object selector
+        self._info_batches = {}
+        self._pending_batch = None
+        self._batch_in_flight = False
+        self.stats = {'calls': 0, 'workspace_calls': 0, 'reused': 0, 'coalesced': 0,
+                      'merged': 0}
+
+    def __getattr__(self, name):
+        method = getattr(self._ws, name)
+        if name in self.SHARED_READ_METHODS:
+            return lambda params, context=None: self._shared_call(name, method, params, context)
+
+        def call(*args, **kwargs):
+            if name not in self.UNSHARED_READ_METHODS:
+                self._forget()
+            self._count(calls=1, workspace_calls=1)
+            return method(*args, **kwargs)
+        return call
+
+    def get_object_info3(self, params, context=None):
+        infos, paths = self._get_object_infos(params, context)
+        return {'infos': infos, 'paths': paths}
+
+    def get_object_info_new(self, params, context=None):
+        infos, _ = self._get_object_infos(params, context)
+        return infos
+
+    def get_objects2(self, params, context=None):
+        result = self._shared_call('get_objects2', self._ws.get_objects2, params, context)
+        # the infos of the fetched objects answer later info lookups
+        with self._lock:
+            for obj_selector, obj_data in zip(params.get('objects', []), result['data']):
+                if obj_data is not None and obj_data.get('path'):
+                    obj_info = list(obj_data['info'])
+                    if obj_info[10] is not None:
+                        obj_info[10] = dict(obj_info[10])
+                    self._infos.setdefault(self._selector_key(obj_selector),
+                                           (obj_info, list(obj_data['path'])))
+        return result
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self.stats[name] += count
+        if self._totals is not None:
+            self._totals.add(counts)
+
+    def _forget(self):
+        with self._lock:
+            self._calls = {}
+            self._infos = {}
+
+    def _shared_call(self, name, method, params, context):
+        key = (name, json.dumps(params, sort_keys=True))
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _SharedCall()
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+
+        if not leader:
+            self._count(calls=1, coalesced=1)
+            # a copy, callers are free to change their result
+            return jsoncodec.loads(call.future.result())
+
+        self._count(calls=1, workspace_calls=1)
+        try:
+            result = method(params, context)
+        except Exception as e:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.future.set_exception(e)
+            raise
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            waiters = call.waiters
+        # no one else can join the call now, only encode the result for those waiting
+        call.future.set_result(jsoncodec.dumps(result) if waiters else None)
+        return result
+
+    def _get_object_infos(self, params, context):
+        '''
+        Looks up the infos for params['objects'], only sending the objects this
+        request has not looked up yet to the Workspace, and waiting for those
+        already being looked up. Returns the infos and the resolved reference
+        paths, in the same order as the requested objects.
+        '''
+        objects = params.get('objects', [])
+        keys = [self._selector_key(obj_selector) for obj_selector in objects]
+        sent = False
+        waited = False
+        with self._lock:
+            batches = []
+            for key, obj_selector in zip(keys, objects):
+                if key in self._infos:
+                    continue
+                batch = self._info_batches.get(key)
+                if batch is None:
+                    if self._pending_batch is None:
+                        self._pending_batch = _InfoBatch()
+                    batch = self._pending_batch
+                    batch.selectors[key] = obj_selector
+                    self._info_batches[key] = batch
+                if batch not in batches:
+                    batches.append(batch)
+
+            for batch in batches:
+                while not batch.done:
+                    if batch is self._pending_batch and not self._batch_in_flight:
+                        # nothing else in flight, send everything gathered so far
+                        self._pending_batch = None
+                        self._batch_in_flight = True
+                        self._lock.release()
+                        try:
+                            self._send_batch(batch, context)
+                        finally:
+                            self._lock.acquire()
+                            self._batch_in_flight = False
+                            self._lock.notify_all()
+                        sent = True
+                    else:
+                        self._lock.wait()
+                        waited = True
+                if batch.error is not None:
+                    raise batch.error
+
+            found = [self._infos.get(key) for key in keys]
+
+        if sent:
+            self._count(calls=1, workspace_calls=1)
+        else:
+            self._count(calls=1, **{'merged' if waited else 'reused': 1})
+
+        if params.get('ignoreErrors', 0) != 1 and any(f is None for f in found):
+            # let the Workspace raise the error for the objects that could not be found
+            self._count(workspace_calls=1)
+            ret = self._ws.get_object_info3(params, context)
+            return ret['infos'], ret['paths']
+
+        include_metadata = params.get('includeMetadata', 0) == 1
+        infos = []
+        paths = []
+        for f in found:
+            if f is None:
+                infos.append(None)
+                paths.append(None)
+                continue
+            obj_info = list(f[0])
+            if include_metadata:
+                obj_info[10] = dict(obj_info[10]) if obj_info[10] is not None else None
+            else:
+                obj_info[10] = None
+            infos.append(obj_info)
+            paths.append(list(f[1]))
+        return infos, paths
+
+    def _send_batch(self, batch, context):
+        keys = list(batch.selectors)
+        try:
+            # with metadata and without failing, to answer any later lookup
+            ret = self._ws.get_object_info3({'objects': [batch.selectors[k] for k in keys],
+                                             'includeMetadata': 1,
+                                             'ignoreErrors': 1}, context)
+        except Exception as e:
+            batch.error = e
+        else:
+            with self._lock:
+                for key, obj_info, path in zip(keys, ret['infos'], ret['paths']):
+                    if obj_info is not None:
+                        self._infos[key] = (obj_info, path)
+        with self._lock:
+            # objects that could not be found are looked up again if asked for again
+            for key in keys:
+                if self._info_batches.get(key) is batch:
+                    del self._info_batches[key]
+            batch.done = True
+
+    @staticmethod
+    def _selector_key(obj_selector):
+        # most selectors are a bare ref, skip serializing those
+        if len(obj_selector) == 1 and 'ref' in obj_selector:
+            return obj_selector['ref']
+        return json.dumps(obj_selector, sort_keys=True)
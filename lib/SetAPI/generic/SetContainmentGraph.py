@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+
+
+class SetContainmentGraph:
+    '''
+    Which of a list of sets contain which objects, including each other, built
+    once from the item refs of the sets (SetRecords, as populated by
+    GenericSetNavigator). Refs are (wsid, objid, ver) tuples.
+
+    A set is only known to be inside another if both are in the list. Items
+    are fixed versions saved before the set that lists them, so sets can't
+    contain each other in a cycle. Every query is linear in the size of the
+    graph or better.
+    '''
+
+    def __init__(self, set_list):
+        self.sets = {}
+        for s in set_list:
+            self.sets[s.info.ref] = s
+        # object ref -> refs of the sets listing it as an item
+        self._containers = {}
+        # set ref -> refs of the sets among its items
+        self._child_sets = {}
+        for set_ref, s in self.sets.items():
+            children = []
+            for item_ref in s.item_refs:
+                containers = self._containers.setdefault(item_ref, [])
+                if containers and containers[-1] == set_ref:
+                    # listed twice by the same set
+                    continue
+                containers.append(set_ref)
+                if item_ref in self.sets:
+                    children.append(item_ref)
+            self._child_sets[set_ref] = children
+
+    def roots(self):
+        ''' The sets that no other set in the graph contains, in list order. '''
+        return [s for set_ref, s in self.sets.items() if set_ref not in self._containers]
+
+    def depths(self):
+        '''
+        Returns a dict of set ref -> depth, 0 for the roots and otherwise one
+        more than the shallowest set containing it.
+        '''
+        depths = {}
+        queue = deque()
+        for set_ref in self.sets:
+            if set_ref not in self._containers:
+                depths[set_ref] = 0
+                queue.append(set_ref)
+        while queue:
+            set_ref = queue.popleft()
+            for child_ref in self._child_sets[set_ref]:
+                if child_ref not in depths:
+                    depths[child_ref] = depths[set_ref] + 1
+                    queue.append(child_ref)
+        return depths
+
+    def containing_sets(self, ref, transitive=False):
+        '''
+        Returns the refs of the sets that list the object ref as an item, and
+        if transitive, the sets containing those, and so on.
+        '''
+        direct = self._containers.get(ref, [])
+        if not transitive:
+            return list(direct)
+        found = []
+        seen = set()
+        stack = list(direct)
+        while stack:
+            set_ref = stack.pop()
+            if set_ref in seen:
+                continue
+            seen.add(set_ref)
+            found.append(set_ref)
+            stack.extend(self._containers.get(set_ref, []))
+        return found
+
+    def members(self, set_ref):
+        '''
+        Returns the refs of every object in the set, including the items of
+        the sets inside it, each once.
+        '''
+        found = []
+        seen = set()
+        stack = [set_ref]
+        while stack:
+            for item_ref in self.sets[stack.pop()].item_refs:
+                if item_ref in seen:
+                    continue
+                seen.add(item_ref)
+                found.append(item_ref)
+                if item_ref in self.sets:
+                    stack.append(item_ref)
+        return found
@@ -1,4 +1,4 @@
-from SetAPI import util
+from SetAPI import jsoncodec, tracing, util
 
 
 class SetInterfaceV1:
@@ -6,6 +6,7 @@ class SetInterfaceV1:
     def __init__(self, workspace_client):
         self.ws = workspace_client
 
+    @tracing.traced
     def save_set(self, set_type, provenance, params):
         '''
         Save a set object to the Workspace using the set_type provided (e.g. set_type=KBaseSets.ReadsSet)
@@ -15,6 +16,46 @@ class SetInterfaceV1:
         results = self.ws.save_objects(save_params)
         return results
 
+    @tracing.traced
+    def save_sets(self, sets, provenance, chunk_size=100, chunk_max_bytes=50000000):
+        '''
+        Save many (set_type, params) sets, batched per workspace into save_objects calls
+        of at most chunk_size objects and about chunk_max_bytes. Returns their infos.
+        Each call is atomic, but a failure in a later call does not undo the earlier ones.
+        '''
+        # save_objects saves to one workspace, so group the sets by workspace
+        groups = {}
+        for idx, (set_type, params) in enumerate(sets):
+            self._check_save_set_params(params)
+            save_params = self._build_ws_save_obj_params(set_type, provenance, params)
+            ws_key = ('id', save_params['id']) if 'id' in save_params else \
+                ('workspace', save_params['workspace'])
+            groups.setdefault(ws_key, []).append((idx, save_params['objects'][0]))
+
+        infos = [None] * len(sets)
+        for (ws_param, ws), objects in groups.items():
+            for chunk in self._chunk_objects(objects, chunk_size, chunk_max_bytes):
+                chunk_infos = self.ws.save_objects({ws_param: ws,
+                                                    'objects': [o for _, o in chunk]})
+                for (idx, _), info in zip(chunk, chunk_infos):
+                    infos[idx] = info
+        return infos
+
+    def _chunk_objects(self, objects, chunk_size, chunk_max_bytes):
+        chunk = []
+        chunk_bytes = 0
+        for idx, obj in objects:
+            # the bytes sent, as encoded by the Workspace client
+            obj_bytes = len(jsoncodec.dumps(obj['data']))
+            if chunk and (len(chunk) >= chunk_size or chunk_bytes + obj_bytes > chunk_max_bytes):
+                yield chunk
+                chunk = []
+                chunk_bytes = 0
+            chunk.append((idx, obj))
+            chunk_bytes += obj_bytes
+        if chunk:
+            yield chunk
+
     def _check_save_set_params(self, params):
         if 'data' not in params:
             raise ValueError('"data" parameter field specifiying the set is required')
@@ -23,6 +64,15 @@ class SetInterfaceV1:
                 '"workspace" or "workspace_id" or "workspace_name" parameter field is required')
         if 'output_object_name' not in params:
             raise ValueError('"output_object_name" parameter field is required')
+        items = params['data'].get('items') if isinstance(params['data'], dict) else None
+        if isinstance(items, list):
+            invalid_refs = util.find_invalid_references(
+                [item.get('ref') if isinstance(item, dict) else None for item in items])
+            if invalid_refs:
+                raise ValueError('Set items must have valid workspace references, these are not: ' +
+                                 ', '.join(str(ref) for ref in invalid_refs[:10]) +
+                                 (' and ' + str(len(invalid_refs) - 10) + ' more'
+                                  if len(invalid_refs) > 10 else ''))
 
     def _build_ws_save_obj_params(self, set_type, provenance, params):
 
@@ -47,13 +97,16 @@ class SetInterfaceV1:
 
         return save_params
 
+    @tracing.traced
     def get_set(self, ref, include_item_info=False, ref_path_to_set=[],
-                include_set_item_ref_paths=False):
+                include_set_item_ref_paths=False, ws_data=None):
         """
         Get a set object from the Workspace using the set_type provided (e.g. set_type=KBaseSets.ReadsSet)
+        ws_data - the set if already fetched with get_set_object
         """
         obj_selector = util.build_ws_obj_selector(ref, ref_path_to_set)
-        ws_data = self._get_set_from_ws(obj_selector)
+        if ws_data is None:
+            ws_data = self._get_set_from_ws(obj_selector)
 
         if include_item_info:
             self._populate_item_object_info(ws_data, ref_path_to_set)
@@ -64,6 +117,104 @@ class SetInterfaceV1:
 
         return ws_data
 
+    @tracing.traced
+    def get_sets(self, params, normalizers=None):
+        """
+        Get many KBaseSets sets with one get_objects2 call, normalizers maps a type
+        (e.g. KBaseSets.ReadsSet) to the normalization of its get_*_set_v1 method.
+        """
+        self._check_get_sets_params(params)
+        include_item_info = params.get('include_item_info', 0) == 1
+        include_set_item_ref_paths = params.get('include_set_item_ref_paths', 0) == 1
+
+        results = []
+        selectors = []
+        for set_ref in params['set_refs']:
+            results.append({'ref': set_ref['ref']})
+            if util.check_reference(set_ref['ref']):
+                selectors.append(util.build_ws_obj_selector(
+                    set_ref['ref'], set_ref.get('ref_path_to_set', [])))
+            else:
+                selectors.append(None)
+                results[-1]['error'] = '"ref" must be a valid workspace reference'
+
+        to_fetch = [idx for idx, selector in enumerate(selectors) if selector is not None]
+        fetched = []
+        if to_fetch:
+            fetched = self.ws.get_objects2({'objects': [selectors[idx] for idx in to_fetch],
+                                            'ignoreErrors': 1})['data']
+        sets = []  # (result, selector, ref_path_to_set) of the sets fetched
+        for idx, obj_data in zip(to_fetch, fetched):
+            if obj_data is None:
+                results[idx]['error'] = ('Set ' + results[idx]['ref'] + ' does not exist or ' +
+                                         'is not accessible')
+            elif not obj_data['info'][2].startswith('KBaseSets.'):
+                results[idx]['error'] = ('Object ' + results[idx]['ref'] + ' is not a ' +
+                                         'KBaseSets set, its type is ' + obj_data['info'][2])
+            else:
+                results[idx]['data'] = obj_data['data']
+                results[idx]['info'] = obj_data['info']
+                sets.append((results[idx], selectors[idx],
+                             params['set_refs'][idx].get('ref_path_to_set', [])))
+
+        if include_item_info:
+            self._populate_items_object_info(sets)
+
+        if include_set_item_ref_paths:
+            for result, selector, _ in sets:
+                util.populate_item_object_ref_paths(result['data']['items'], selector)
+
+        for result, _, _ in sets:
+            normalize = (normalizers or {}).get(result['info'][2].split('-')[0])
+            if normalize is not None:
+                result.update(normalize({'data': result['data'], 'info': result['info']}))
+
+        return {'sets': results}
+
+    def _check_get_sets_params(self, params):
+        if 'set_refs' not in params or not isinstance(params['set_refs'], list):
+            raise ValueError('"set_refs" field providing a list of set refs is required')
+        for set_ref in params['set_refs']:
+            if 'ref' not in set_ref:
+                raise ValueError('"ref" field in each object of "set_refs" list is required')
+        for flag in ['include_item_info', 'include_set_item_ref_paths']:
+            if params.get(flag, 0) not in [0, 1]:
+                raise ValueError('"' + flag + '" parameter field can only be set to 0 or 1')
+
+    @tracing.traced
+    def _populate_items_object_info(self, sets):
+        # the same item is often in several sets, only look each one up once
+        selector_refs = []
+        selector_idx = {}
+        for result, _, ref_path_to_set in sets:
+            for item in result['data']['items']:
+                ref = util.build_ws_obj_selector(item['ref'],
+                                                 ref_path_to_set + [item['ref']])['ref']
+                if ref not in selector_idx:
+                    selector_idx[ref] = len(selector_refs)
+                    selector_refs.append(ref)
+        if not selector_refs:
+            return
+
+        # an item that can't be looked up gets a null info
+        obj_info_list = self.ws.get_object_info_new({
+            'objects': [{'ref': ref} for ref in selector_refs],
+            'includeMetadata': 1,
+            'ignoreErrors': 1})
+        for result, _, ref_path_to_set in sets:
+            for item in result['data']['items']:
+                ref = util.build_ws_obj_selector(item['ref'],
+                                                 ref_path_to_set + [item['ref']])['ref']
+                item['info'] = obj_info_list[selector_idx[ref]]
+
+    @tracing.traced
+    def get_set_object(self, ref, ref_path_to_set=[]):
+        """
+        Fetch the data and info of a set object of any type, for getters that
+        dispatch on the type. Pass the result to get_set as ws_data.
+        """
+        return self._get_set_from_ws(util.build_ws_obj_selector(ref, ref_path_to_set))
+
     def _get_set_from_ws(self, selector):
 
         # typedef structure {
@@ -79,6 +230,7 @@ class SetInterfaceV1:
 
         return {'data': data, 'info': info}
 
+    @tracing.traced
     def _populate_item_object_info(self, set, ref_path_to_set):
 
         items = set['data']['items']
@@ -90,9 +242,12 @@ class SetInterfaceV1:
                 util.build_ws_obj_selector(item['ref'], ref_path_to_item))
 
         if len(objects) > 0:
+            # an item that can't be looked up (e.g. deleted) gets a null info
+            # instead of failing the whole set
             obj_info_list = self.ws.get_object_info_new({
                 'objects': objects,
-                'includeMetadata': 1})
+                'includeMetadata': 1,
+                'ignoreErrors': 1})
 
             for k in range(0, len(obj_info_list)):
                 items[k]['info'] = obj_info_list[k]
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from SetAPI import util
+
+
+class ObjectInfoRecord:
+    '''
+    A compact form of a Workspace object_info tuple, for holding many of them,
+    e.g. every set in a large workspace. The strings that repeat across objects
+    (type, workspace name, saved by) are interned, and the ref is a tuple of
+    ints. Records are shared, so they must not be modified.
+    '''
+
+    __slots__ = ('objid', 'name', 'type', 'save_date', 'version', 'saved_by', 'wsid',
+                 'workspace', 'chsum', 'size', 'meta')
+
+    def __init__(self, obj_info):
+        (self.objid, self.name, obj_type, self.save_date, self.version, saved_by, self.wsid,
+         workspace, self.chsum, self.size, self.meta) = obj_info
+        self.type = sys.intern(obj_type)
+        self.saved_by = sys.intern(saved_by)
+        self.workspace = sys.intern(workspace)
+
+    @property
+    def ref(self):
+        return (self.wsid, self.objid, self.version)
+
+    def to_info(self, include_metadata=True):
+        ''' Returns a new object_info list, with or without the metadata. '''
+        meta = None
+        if include_metadata and self.meta is not None:
+            meta = dict(self.meta)
+        return [self.objid, self.name, self.type, self.save_date, self.version, self.saved_by,
+                self.wsid, self.workspace, self.chsum, self.size, meta]
+
+
+class SetRecord:
+    '''
+    A set found while listing sets: its ObjectInfoRecord, and once known, the
+    refs of its items as (wsid, objid, version) tuples.
+    '''
+
+    __slots__ = ('info', 'item_refs')
+
+    def __init__(self, info, item_refs=None):
+        self.info = info
+        self.item_refs = item_refs
+
+    def to_dict(self, include_metadata=True):
+        ''' Returns the set in the shape list_sets and get_set_items return it. '''
+        return {'ref': ref_to_str(self.info.ref),
+                'info': self.info.to_info(include_metadata),
+                'items': [{'ref': '%s/%s/%s' % ref} for ref in self.item_refs]}
+
+
+def ref_to_str(ref):
+    return '%s/%s/%s' % ref
+
+
+def parse_ref(ref_str):
+    ''' Parses an absolute, versioned ref (wsid/objid/ver) as a tuple of ints. '''
+    obj_ref = util.parse_reference(ref_str)
+    return (obj_ref.ws, obj_ref.obj, obj_ref.ver)
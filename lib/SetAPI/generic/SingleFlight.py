@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import threading
+from concurrent.futures import Future
+
+from SetAPI import jsoncodec
+
+
+class _Call:
+    ''' A call in flight, and how many callers wait on it. '''
+
+    def __init__(self):
+        self.future = Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    '''
+    Lets concurrent callers that need the same result, e.g. many requests for
+    the same immutable object, share one call: the first caller for a key makes
+    the call and the others wait for its result. A key is forgotten as soon as
+    its call finishes, so nothing is cached.
+
+    Results must be JSON serializable, the waiting callers each get their own
+    copy, encoded only if there are any. If the call fails, the callers that were waiting on it make their
+    own call instead, as the error may only apply to the first caller.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        # calls answered with another caller's result
+        self.shared = 0
+
+    def do(self, key, fn):
+        '''
+        Returns (result, shared) where result is fn() or the result of the
+        call already in flight for key, and shared says which.
+        '''
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    break
+                call.waiters += 1
+            try:
+                result = jsoncodec.loads(call.future.result())
+            except Exception:
+                continue
+            with self._lock:
+                self.shared += 1
+            return result, True
+
+        try:
+            result = fn()
+        except Exception as e:
+            with self._lock:
+                del self._calls[key]
+            call.future.set_exception(e)
+            raise
+        with self._lock:
+            del self._calls[key]
+            waiters = call.waiters
+        # no one else can join the call now, only encode the result for those waiting
+        call.future.set_result(jsoncodec.dumps(result) if waiters else None)
+        return result, False
@@ -1,17 +1,42 @@
-from collections import deque
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from SetAPI import tracing
 
 
 class WorkspaceListObjectsIterator:
 
-    # ws_info - optional workspace info tuple (if is not defined then either ws_id 
+    # objects per object id seen in earlier scans, keyed by (ws_id, type filter),
+    # shared by all iterators in the process to size the first windows of a scan
+    _known_densities = OrderedDict()
+    _known_densities_lock = threading.Lock()
+    _MAX_KNOWN_DENSITIES = 10000
+
+    # ws_info - optional workspace info tuple (if is not defined then either ws_id
     #    or ws_name should be provided),
-    # ws_id/ws_name - optional workspace identification (if neither is defined 
+    # ws_id/ws_name - optional workspace identification (if neither is defined
     #    then ws_info should be provided),
-    # list_objects_params - optional structure with such Woskspace.ListObjectsParams 
+    # list_objects_params - optional structure with such Woskspace.ListObjectsParams
     #    as 'type' or 'before', 'after', 'showHidden', 'includeMetadata' and so on,
     #    wherein there is no need to set 'ids' or 'workspaces' or 'min/maxObjectID'.
+    # object_filter - optional function taking an object info tuple, only objects
+    #    for which it returns True are returned (and counted against global_limit).
+    # prefetch - number of object id windows to request ahead of the one being
+    #    iterated over, in parallel. 0 (default) loads each window only when the
+    #    previous one is used up. At most prefetch + 1 windows are held in memory.
+    # adaptive - if True, the object id window is sized from the density of objects
+    #    seen in the workspaces so far (or in earlier scans), so that each
+    #    list_objects call returns about part_size objects: sparse workspaces get
+    #    wide windows, dense ones narrow windows, within min/max_part_size.
+    # result_limit - the maximum number of objects list_objects returns per call.
+    #    A window that hits it is split in two and fetched again.
+    # min_object_id - the first object id to list in each workspace, e.g. to only
+    #    list the objects saved since an earlier scan.
     def __init__(self, ws_client, ws_info_list=None, ws_id=None, ws_name=None,
-                 list_objects_params={}, part_size=10000, global_limit=100000):
+                 list_objects_params={}, part_size=10000, global_limit=100000,
+                 object_filter=None, prefetch=0, adaptive=False, min_part_size=1000,
+                 max_part_size=1000000, result_limit=10000, min_object_id=1):
         self.ws = ws_client
         if not ws_info_list:
             if (not ws_id) and (not ws_name):
@@ -34,12 +59,28 @@ class WorkspaceListObjectsIterator:
                     break
             blocks.append(block)
         self.block_iter = blocks.__iter__()
+        self.block = None
+        self.max_obj_ids = {ws_info[0]: ws_info[4] for ws_info in ws_info_list}
         self.list_objects_params = list_objects_params
+        self.start_obj_id = min_object_id
         self.min_obj_id = -1
         self.max_obj_count = -1
         self.part_size = part_size
         self.global_limit = global_limit
         self.total_counter = 0
+        self.object_filter = object_filter
+        self.prefetch = prefetch
+        self.adaptive = adaptive
+        self.min_part_size = min_part_size
+        self.max_part_size = max_part_size
+        self.result_limit = result_limit
+        self.type_filter = list_objects_params.get('type')
+        self.scan_stats = {}  # ws_id -> [objects seen, object ids scanned] in this scan
+        self.scan_stats_lock = threading.Lock()
+        self.pending_parts = deque()  # futures of prefetched windows, in order
+        self.executor = None
+        if prefetch > 0:
+            self.executor = ThreadPoolExecutor(max_workers=prefetch)
         self.part_iter = self._load_next_part()
         pass
 
@@ -50,27 +91,124 @@ class WorkspaceListObjectsIterator:
     def __next__(self):
         while self.part_iter is not None:
             try:
-                self.total_counter += 1
-                if self.total_counter > self.global_limit:
-                    raise StopIteration
-                return next(self.part_iter)
+                obj_info = next(self.part_iter)
             except StopIteration:
                 self.part_iter = self._load_next_part()
+                continue
+            self.total_counter += 1
+            if self.total_counter > self.global_limit:
+                self.close()
+                break
+            return obj_info
         raise StopIteration
 
+    def close(self):
+        """
+        Stops any prefetching that is still going on. Called automatically once
+        the iterator is exhausted.
+        """
+        self.part_iter = None
+        while self.pending_parts:
+            self.pending_parts.popleft().cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
     def _load_next_part(self):
+        if self.executor is None:
+            list_params = self._next_list_params()
+            if list_params is None:
+                return None
+            return self._list_objects(list_params).__iter__()
+
+        # keep up to prefetch windows in flight ahead of the one handed out
+        while len(self.pending_parts) < self.prefetch + 1:
+            list_params = self._next_list_params()
+            if list_params is None:
+                break
+            self.pending_parts.append(self.executor.submit(tracing.wrap(self._list_objects), list_params))
+        if not self.pending_parts:
+            self.close()
+            return None
+        return self.pending_parts.popleft().result().__iter__()
+
+    def _next_list_params(self):
+        """
+        Returns the list_objects parameters for the next object id window, or
+        None when all blocks of workspaces have been covered.
+        """
         if self.min_obj_id < 0 or self.min_obj_id > self.max_obj_count:
             try:
-                block = next(self.block_iter)
-                self.list_objects_params['ids'] = [ws_info[0] for ws_info in block]
+                self.block = next(self.block_iter)
             except StopIteration:
                 return None
-            last_ws_info = block[len(block) - 1]
-            self.min_obj_id = 1
+            last_ws_info = self.block[len(self.block) - 1]
+            self.min_obj_id = self.start_obj_id
             self.max_obj_count = last_ws_info[4]
-        max_obj_id = self.min_obj_id + self.part_size - 1
-        self.list_objects_params['minObjectID'] = self.min_obj_id
-        self.list_objects_params['maxObjectID'] = max_obj_id
-        self.min_obj_id += self.part_size  # For next load cycle
-        ret = self.ws.list_objects(self.list_objects_params)
-        return ret.__iter__()
+        window_size = self.part_size
+        if self.adaptive:
+            window_size = self._get_adaptive_window_size()
+        max_obj_id = self.min_obj_id + window_size - 1
+        list_params = dict(self.list_objects_params)
+        list_params['ids'] = [ws_info[0] for ws_info in self.block]
+        list_params['minObjectID'] = self.min_obj_id
+        list_params['maxObjectID'] = max_obj_id
+        self.min_obj_id += window_size  # For next load cycle
+        return list_params
+
+    def _get_adaptive_window_size(self):
+        # expected objects per object id over the workspaces not yet exhausted
+        density = 0.0
+        for ws_info in self.block:
+            if ws_info[4] >= self.min_obj_id:
+                density += self._get_density(ws_info[0])
+        if density <= 0:
+            return self.max_part_size
+        window_size = int(self.part_size / density)
+        return max(self.min_part_size, min(self.max_part_size, window_size))
+
+    def _get_density(self, ws_id):
+        with self.scan_stats_lock:
+            stats = self.scan_stats.get(ws_id)
+        if stats and stats[1] > 0:
+            return stats[0] / float(stats[1])
+        with self._known_densities_lock:
+            # unknown workspaces are assumed to be dense, as with a fixed window
+            return self._known_densities.get((ws_id, self.type_filter), 1.0)
+
+    def _list_objects(self, list_params):
+        ret = self.ws.list_objects(list_params)
+        min_obj_id = list_params['minObjectID']
+        max_obj_id = list_params['maxObjectID']
+        if len(ret) >= self.result_limit and max_obj_id > min_obj_id:
+            # the Workspace may have cut the result short, fetch each half instead
+            middle = (min_obj_id + max_obj_id) // 2
+            lower_params = dict(list_params, maxObjectID=middle)
+            upper_params = dict(list_params, minObjectID=middle + 1)
+            return self._list_objects(lower_params) + self._list_objects(upper_params)
+        if self.adaptive:
+            self._record_density(list_params['ids'], min_obj_id, max_obj_id, ret)
+        if self.object_filter:
+            ret = [obj_info for obj_info in ret if self.object_filter(obj_info)]
+        return ret
+
+    def _record_density(self, ws_ids, min_obj_id, max_obj_id, obj_info_list):
+        counts = {}
+        for obj_info in obj_info_list:
+            counts[obj_info[6]] = counts.get(obj_info[6], 0) + 1
+        densities = {}
+        with self.scan_stats_lock:
+            for ws_id in ws_ids:
+                scanned = min(max_obj_id, self.max_obj_ids[ws_id]) - min_obj_id + 1
+                if scanned <= 0:
+                    continue
+                stats = self.scan_stats.setdefault(ws_id, [0, 0])
+                stats[0] += counts.get(ws_id, 0)
+                stats[1] += scanned
+                densities[(ws_id, self.type_filter)] = stats[0] / float(stats[1])
+        with self._known_densities_lock:
+            for key, density in densities.items():
+                self._known_densities.pop(key, None)
+                self._known_densities[key] = density
+            while len(self._known_densities) > self._MAX_KNOWN_DENSITIES:
+                self._known_densities.popitem(last=False)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class WorkspaceSetIndex:
+    '''
+    A process-wide index of the sets found in each workspace, so that list_sets
+    does not have to scan a workspace again when it has not changed.
+
+    Each entry is a dict with keys:
+    * max_obj_id - the workspace's max object id when the entry was built
+    * mod_date - the workspace's modification date when the entry was built
+    * scanned_at - time of the last full scan of the workspace
+    * sets - dict of object id -> SetRecord, with metadata and item refs
+
+    Entries are never modified once stored, updates store a new entry, so they can
+    be read without holding the lock. An entry older than max_age_seconds is
+    dropped so that the workspace gets a full scan again; changes an incremental
+    update can't see (e.g. a set being hidden) are picked up then.
+    '''
+
+    def __init__(self, max_workspaces=1000, max_age_seconds=600):
+        self.max_workspaces = max_workspaces
+        self.max_age_seconds = max_age_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ws_id):
+        '''
+        Returns the entry for the workspace, or None if there is none or it is
+        too old to be updated incrementally.
+        '''
+        with self._lock:
+            entry = self._entries.get(ws_id)
+            if entry is None:
+                return None
+            if time.time() - entry['scanned_at'] > self.max_age_seconds:
+                del self._entries[ws_id]
+                return None
+            self._entries.move_to_end(ws_id)
+            return entry
+
+    def put(self, ws_id, entry):
+        with self._lock:
+            self._entries.pop(ws_id, None)
+            self._entries[ws_id] = entry
+            while len(self._entries) > self.max_workspaces:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def is_current(entry, ws_info):
+        ''' True if nothing was saved or changed in the workspace since entry was built. '''
+        return entry['max_obj_id'] == ws_info[4] and entry['mod_date'] == ws_info[3]
+
+    @staticmethod
+    def build_entry(ws_info, sets, scanned_at=None):
+        '''
+        Builds an index entry for the workspace described by ws_info from a list
+        of SetRecords with their item refs (as built by GenericSetNavigator).
+        '''
+        return {
+            'max_obj_id': ws_info[4],
+            'mod_date': ws_info[3],
+            'scanned_at': scanned_at if scanned_at is not None else time.time(),
+            'sets': {s.info.objid: s for s in sets}
+        }
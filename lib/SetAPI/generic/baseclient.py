@@ -11,6 +11,9 @@ import json as _json
 import requests as _requests
 import random as _random
 import os as _os
+import threading as _threading
+from requests.adapters import HTTPAdapter as _HTTPAdapter
+from urllib3.util.retry import Retry as _Retry
 
 try:
     from configparser import ConfigParser as _ConfigParser  # py 3
@@ -28,6 +31,66 @@ _AJ = 'application/json'
 _URL_SCHEME = frozenset(['http', 'https'])
 
 
+_pool_lock = _threading.Lock()
+_pool_config = {'pool_size': 10, 'max_retries': 0, 'backoff_factor': 0,
+                'keep_alive': True, 'accept_compressed': True}
+_sessions = {}
+
+
+def configure_connection_pool(pool_size=None, max_retries=None,
+                              backoff_factor=None, keep_alive=None,
+                              accept_compressed=None):
+    '''
+    Configure the HTTP connection pools shared by every client in this
+    process. Pools are kept per service host, so all clients talking to the
+    same service reuse the same keep-alive connections.
+    pool_size - the maximum number of idle connections kept per host.
+    max_retries - the number of times a request is retried when a connection
+        to the service can't be established. Requests that reached the
+        service are never retried.
+    backoff_factor - the urllib3 backoff factor applied between retries.
+    keep_alive - set to False to close connections after each request.
+    accept_compressed - ask services for gzip or deflate compressed responses,
+        which are decompressed as they're read. Set to False to ask for
+        uncompressed responses.
+    Existing pools are closed and rebuilt on next use.
+    '''
+    with _pool_lock:
+        for key, value in (('pool_size', pool_size),
+                           ('max_retries', max_retries),
+                           ('backoff_factor', backoff_factor),
+                           ('keep_alive', keep_alive),
+                           ('accept_compressed', accept_compressed)):
+            if value is not None:
+                _pool_config[key] = value
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _get_session(url):
+    parsed = _urlparse(url)
+    key = parsed.scheme + '://' + parsed.netloc
+    with _pool_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _requests.Session()
+            retries = _Retry(total=_pool_config['max_retries'],
+                             connect=_pool_config['max_retries'], read=0,
+                             redirect=0, status=0,
+                             backoff_factor=_pool_config['backoff_factor'])
+            adapter = _HTTPAdapter(pool_connections=1,
+                                   pool_maxsize=_pool_config['pool_size'],
+                                   max_retries=retries)
+            session.mount(key, adapter)
+            if not _pool_config['keep_alive']:
+                session.headers['Connection'] = 'close'
+            session.headers['Accept-Encoding'] = (
+                'gzip, deflate' if _pool_config['accept_compressed'] else 'identity')
+            _sessions[key] = session
+        return session
+
+
 def _get_token(user_id, password, auth_svc):
     # This is bandaid helper function until we get a full
     # KBase python auth client released
@@ -93,6 +156,49 @@ class _JSONObjectEncoder(_json.JSONEncoder):
         return _json.JSONEncoder.default(self, obj)
 
 
+class _StdlibJSONCodec(object):
+
+    def dumps(self, obj):
+        return _json.dumps(obj, cls=_JSONObjectEncoder).encode('utf-8')
+
+    def loads(self, data):
+        return _json.loads(data)
+
+
+_json_codec = _StdlibJSONCodec()
+
+
+def configure_json_codec(codec=None):
+    '''
+    Set the JSON codec used by every client in this process to encode requests
+    and decode responses. A codec has dumps(obj), returning UTF-8 encoded
+    bytes, and loads(data), taking bytes. None restores the json module.
+    '''
+    global _json_codec
+    _json_codec = codec if codec is not None else _StdlibJSONCodec()
+
+
+_call_observer = None
+
+
+def configure_call_observer(observer=None):
+    '''
+    Set a function called after every service call made by a client in this
+    process, with the service method (e.g. 'Workspace.get_objects2'), the
+    seconds taken, the request and response body sizes in bytes as sent over
+    the wire (so compressed, if the response was) and whether the call failed.
+    None removes it.
+    '''
+    global _call_observer
+    _call_observer = observer
+
+
+def _wire_length(ret):
+    # the body bytes read from the socket, before any decompression
+    tell = getattr(getattr(ret, 'raw', None), 'tell', None)
+    return tell() if tell is not None else len(ret.content)
+
+
 class BaseClient(object):
     '''
     The KBase base client.
@@ -171,14 +277,28 @@ class BaseClient(object):
                 raise ValueError('context is not type dict as required.')
             arg_hash['context'] = context
 
-        body = _json.dumps(arg_hash, cls=_JSONObjectEncoder)
-        ret = _requests.post(url, data=body, headers=self._headers,
-                             timeout=self.timeout,
-                             verify=not self.trust_all_ssl_certificates)
+        body = _json_codec.dumps(arg_hash)
+        start = time.time()
+        ret = None
+        error = False
+        try:
+            ret = _get_session(url).post(
+                url, data=body, headers=self._headers, timeout=self.timeout,
+                verify=not self.trust_all_ssl_certificates)
+            return self._get_result(ret)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            if _call_observer is not None:
+                _call_observer(method, time.time() - start, len(body),
+                               _wire_length(ret) if ret is not None else 0, error)
+
+    def _get_result(self, ret):
         ret.encoding = 'utf-8'
         if ret.status_code == 500:
             if ret.headers.get(_CT) == _AJ:
-                err = ret.json()
+                err = _json_codec.loads(ret.content)
                 if 'error' in err:
                     raise ServerError(**err['error'])
                 else:
@@ -187,7 +307,7 @@ class BaseClient(object):
                 raise ServerError('Unknown', 0, ret.text)
         if not ret.ok:
             ret.raise_for_status()
-        resp = ret.json()
+        resp = _json_codec.loads(ret.content)
         if 'result' not in resp:
             raise ServerError('Unknown', 0, 'An unknown server error occurred')
         if not resp['result']:
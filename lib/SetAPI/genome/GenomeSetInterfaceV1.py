@@ -1,3 +1,4 @@
+from SetAPI import tracing
 from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
 
 
@@ -7,6 +8,7 @@ class GenomeSetInterfaceV1:
         self.ws = workspace_client
         self.setInterface = SetInterfaceV1(workspace_client)
 
+    @tracing.traced
     def save_genome_set(self, ctx, params):
         """
         by default save 'KBaseSets.GenomeSet'
@@ -34,6 +36,7 @@ class GenomeSetInterfaceV1:
             'set_info': info
         }
 
+    @tracing.traced
     def _validate_genome_set_data(self, data, save_search_set):
         # TODO: add checks that only one copy of each genome data is in the set
         if save_search_set:
@@ -53,6 +56,7 @@ class GenomeSetInterfaceV1:
             if 'description' not in data:
                 data['description'] = ''
 
+    @tracing.traced
     def get_genome_set(self, ctx, params):
         self._check_get_genome_set_params(params)
 
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+'''
+JSON encoding and decoding for the server and the Workspace clients.
+
+A codec has dumps(obj), which returns UTF-8 encoded bytes, and loads(data),
+which takes bytes or str. orjson is used when it is installed, as it encodes
+large responses such as list_sets results several times faster than the json
+module and writes bytes directly, and the json module otherwise.
+'''
+import itertools
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    ''' Encodes the types json can't: sets, and objects with a toJSONable method. '''
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'toJSONable'):
+        return obj.toJSONable()
+    raise TypeError('Object of type %s is not JSON serializable' % type(obj).__name__)
+
+
+class StdlibJSONCodec:
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=_default).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    '''
+    Falls back to the json module for what orjson refuses but json accepts:
+    integers over 64 bits, and NaN and Infinity when decoding. orjson encodes
+    NaN and Infinity as null.
+    '''
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ValueError('orjson is not installed')
+        self._stdlib = StdlibJSONCodec()
+
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return self._stdlib.dumps(obj)
+
+    def loads(self, data):
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            return self._stdlib.loads(data)
+
+
+CODECS = {StdlibJSONCodec.name: StdlibJSONCodec,
+          OrjsonCodec.name: OrjsonCodec}
+
+
+def get_codec(name='auto'):
+    '''
+    Returns a new codec by name, 'json' or 'orjson'. 'auto' (or None) gives
+    orjson if it's installed and json otherwise.
+    '''
+    if name in (None, '', 'auto'):
+        name = OrjsonCodec.name if orjson is not None else StdlibJSONCodec.name
+    if name not in CODECS:
+        raise ValueError('Unknown JSON codec "' + name + '", expected one of: auto, ' +
+                         ', '.join(sorted(CODECS)))
+    return CODECS[name]()
+
+
+_codec = get_codec()
+
+
+def set_codec(codec):
+    ''' Sets the codec used by dumps and loads in this module. '''
+    global _codec
+    _codec = codec
+
+
+def dumps(obj):
+    return _codec.dumps(obj)
+
+
+def loads(data):
+    return _codec.loads(data)
+
+
+def iterdumps(obj, chunk_size=256 * 1024, split_depth=4):
+    '''
+    Encodes obj like dumps, but yields the JSON in chunks of about chunk_size
+    bytes, so a large result is never held encoded in full. Lists and dicts
+    down to split_depth levels are encoded a member at a time, anything deeper
+    in one piece, so a chunk can overrun chunk_size by one such piece. Always
+    yields at least one chunk.
+    '''
+    pieces = []
+    size = 0
+    yielded = False
+    for piece in _iterencode(obj, split_depth):
+        pieces.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield b''.join(pieces)
+            yielded = True
+            pieces = []
+            size = 0
+    if pieces or not yielded:
+        yield b''.join(pieces)
+
+
+def dumps_chunked(obj, chunk_size=256 * 1024, split_depth=4):
+    '''
+    Returns obj encoded as bytes if it fits in one chunk, otherwise an
+    iterator of chunks from iterdumps, of which only the first is encoded
+    yet. An error encoding a later chunk is raised while iterating.
+    '''
+    chunks = iterdumps(obj, chunk_size, split_depth)
+    first = next(chunks)
+    second = next(chunks, None)
+    if second is None:
+        return first
+    return itertools.chain((first, second), chunks)
+
+
+def _iterencode(obj, depth):
+    if depth > 0 and obj and isinstance(obj, (list, tuple)):
+        separator = b'['
+        for item in obj:
+            yield separator
+            yield from _iterencode(item, depth - 1)
+            separator = b','
+        yield b']'
+    elif depth > 0 and obj and isinstance(obj, dict) and all(
+            type(key) is str for key in obj):
+        separator = b'{'
+        for key, value in obj.items():
+            yield separator + _codec.dumps(key) + b':'
+            yield from _iterencode(value, depth - 1)
+            separator = b','
+        yield b'}'
+    else:
+        yield _codec.dumps(obj)
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+'''
+Counters, histograms and gauges describing the service, kept in memory and
+exposed in the Prometheus text format (GET /metrics on the server) and in the
+status method.
+
+The metrics are kept per process: with several uwsgi workers, each scrape of
+/metrics only covers the worker that happened to answer it.
+'''
+import threading
+from bisect import bisect_left
+
+# seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Workspace calls made by one request
+CALL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+HELP = {
+    'setapi_requests_total': 'JSON-RPC requests handled, by method',
+    'setapi_request_errors_total': 'JSON-RPC requests that returned an error, by method',
+    'setapi_request_duration_seconds': 'Time to handle a JSON-RPC request, by method',
+    'setapi_request_bytes_total': 'JSON-RPC request body bytes received, by method',
+    'setapi_response_bytes_total': 'JSON-RPC response body bytes sent, by method',
+    'setapi_request_workspace_calls': 'Workspace calls made by one JSON-RPC request, by method',
+    'setapi_request_workspace_calls_total':
+        'Workspace calls made by JSON-RPC requests, by method and Workspace method',
+    'setapi_outbound_calls_total': 'Calls made to other services, by service method',
+    'setapi_outbound_call_errors_total': 'Calls made to other services that failed',
+    'setapi_outbound_call_duration_seconds': 'Time taken by calls to other services',
+    'setapi_outbound_request_bytes_total': 'Request body bytes sent to other services',
+    'setapi_outbound_response_bytes_total':
+        'Response body bytes received from other services, as sent (compressed or not)',
+}
+
+
+class _Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # one more for the observations over the last bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    '''
+    Thread safe. Labels are given as a tuple of (name, value) pairs, e.g.
+    (('method', 'list_sets'),). Gauges, and counters kept elsewhere such as the
+    cache hit counts, are read when the metrics are, from functions returning
+    either a number or a dict of labels -> number.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        # name -> (function, metric type)
+        self._collected = {}
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            key = (name, labels)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=(), buckets=LATENCY_BUCKETS):
+        with self._lock:
+            key = (name, labels)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def add_gauge(self, name, fn, help_text=None):
+        self._add_collected(name, fn, 'gauge', help_text)
+
+    def add_counter(self, name, fn, help_text=None):
+        ''' Like add_gauge, for values that only ever go up. '''
+        self._add_collected(name, fn, 'counter', help_text)
+
+    def _add_collected(self, name, fn, metric_type, help_text):
+        with self._lock:
+            self._collected[name] = (fn, metric_type)
+        if help_text:
+            HELP.setdefault(name, help_text)
+
+    def observe_request(self, method, seconds, bytes_in, bytes_out, error=False,
+                        workspace_calls=None):
+        '''
+        Records a JSON-RPC request. workspace_calls is a dict of Workspace
+        method -> the number of calls the request made to it.
+        '''
+        labels = (('method', method),)
+        self.inc('setapi_requests_total', labels)
+        if error:
+            self.inc('setapi_request_errors_total', labels)
+        self.observe('setapi_request_duration_seconds', seconds, labels)
+        self.inc('setapi_request_bytes_total', labels, bytes_in)
+        if bytes_out:
+            self.add_response_bytes(method, bytes_out)
+        if workspace_calls is not None:
+            self.observe('setapi_request_workspace_calls', sum(workspace_calls.values()),
+                         labels, CALL_COUNT_BUCKETS)
+            for ws_method, count in workspace_calls.items():
+                self.inc('setapi_request_workspace_calls_total',
+                         (('method', method), ('workspace_method', ws_method)), count)
+
+    def add_response_bytes(self, method, bytes_out):
+        self.inc('setapi_response_bytes_total', (('method', method),), bytes_out)
+
+    def observe_outbound_call(self, service_method, seconds, bytes_sent, bytes_received,
+                              error):
+        ''' Records a call to another service, see baseclient.configure_call_observer. '''
+        labels = (('method', service_method),)
+        self.inc('setapi_outbound_calls_total', labels)
+        if error:
+            self.inc('setapi_outbound_call_errors_total', labels)
+        self.observe('setapi_outbound_call_duration_seconds', seconds, labels)
+        self.inc('setapi_outbound_request_bytes_total', labels, bytes_sent)
+        self.inc('setapi_outbound_response_bytes_total', labels, bytes_received)
+
+    def _read_collected(self):
+        ''' Returns a dict of name -> (metric type, dict of labels -> value). '''
+        with self._lock:
+            collected = list(self._collected.items())
+        values = {}
+        for name, (fn, metric_type) in collected:
+            value = fn()
+            values[name] = (metric_type, value if isinstance(value, dict) else {(): value})
+        return values
+
+    def snapshot(self):
+        '''
+        Returns the metrics as a JSON serializable dict of metric name ->
+        list of samples, each a dict of its labels plus 'value' (counters and
+        gauges) or 'count', 'sum' and 'buckets' (histograms).
+        '''
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = [(key, list(h.buckets), list(h.counts), h.sum, h.count)
+                          for key, h in self._histograms.items()]
+        result = {}
+        for (name, labels), value in counters:
+            result.setdefault(name, []).append(dict(labels, value=value))
+        for (name, labels), buckets, counts, total, count in histograms:
+            cumulative = []
+            running = 0
+            for le, bucket_count in zip(buckets, counts):
+                running += bucket_count
+                cumulative.append([le, running])
+            result.setdefault(name, []).append(dict(labels, count=count, sum=total,
+                                                    buckets=cumulative))
+        for name, (_, samples) in self._read_collected().items():
+            result[name] = [dict(labels, value=value) for labels, value in samples.items()]
+        return result
+
+    def to_prometheus(self):
+        ''' Returns the metrics in the Prometheus text exposition format. '''
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(((key, list(h.buckets), list(h.counts), h.sum, h.count)
+                                 for key, h in self._histograms.items()),
+                                key=lambda h: h[0])
+        lines = []
+        described = set()
+
+        def describe(name, metric_type):
+            if name not in described:
+                described.add(name)
+                if name in HELP:
+                    lines.append('# HELP %s %s' % (name, HELP[name]))
+                lines.append('# TYPE %s %s' % (name, metric_type))
+
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append('%s%s %s' % (name, _format_labels(labels), _format_value(value)))
+        for (name, labels), buckets, counts, total, count in histograms:
+            describe(name, 'histogram')
+            running = 0
+            for le, bucket_count in zip(buckets, counts):
+                running += bucket_count
+                lines.append('%s_bucket%s %d' % (
+                    name, _format_labels(labels + (('le', _format_value(le)),)), running))
+            lines.append('%s_bucket%s %d' % (name, _format_labels(labels + (('le', '+Inf'),)),
+                                             count))
+            lines.append('%s_sum%s %s' % (name, _format_labels(labels), _format_value(total)))
+            lines.append('%s_count%s %d' % (name, _format_labels(labels), count))
+        for name, (metric_type, samples) in sorted(self._read_collected().items()):
+            describe(name, metric_type)
+            for labels, value in sorted(samples.items()):
+                lines.append('%s%s %s' % (name, _format_labels(labels), _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\')
+                                       .replace('"', '\\"').replace('\n', '\\n'))
+                          for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class CallCounts:
+    ''' Thread safe counts of calls by method name, e.g. the Workspace calls of a request. '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def add(self, method):
+        with self._lock:
+            self._counts[method] = self._counts.get(method, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class CountingClient:
+    ''' Wraps a service client, counting each method called on it in a CallCounts. '''
+
+    def __init__(self, client, counts):
+        self._client = client
+        self._counts = counts
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if name.startswith('_') or not callable(method):
+            return method
+
+        def call(*args, **kwargs):
+            self._counts.add(name)
+            return method(*args, **kwargs)
+        return call
@@ -1,5 +1,5 @@
 from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
-from SetAPI import util
+from SetAPI import tracing, util
 
 
 class ReadsSetInterfaceV1:
@@ -7,6 +7,7 @@ class ReadsSetInterfaceV1:
         self.ws = workspace_client
         self.setInterface = SetInterfaceV1(workspace_client)
 
+    @tracing.traced
     def save_reads_set(self, ctx, params):
         if 'data' in params:
             self._validate_reads_set_data(params['data'])
@@ -24,6 +25,7 @@ class ReadsSetInterfaceV1:
             'set_info': info
         }
 
+    @tracing.traced
     def _validate_reads_set_data(self, data):
         # TODO: add checks that only one copy of each reads data is in the set
         # TODO?: add checks that reads data list is homogenous (no mixed single/paired-end libs)
@@ -38,9 +40,10 @@ class ReadsSetInterfaceV1:
         if 'description' not in data:
             data['description'] = ''
 
+    @tracing.traced
     def get_reads_set(self, ctx, params):
 
-        set_type, obj_spec = self._check_get_reads_set_params(params)
+        obj_spec = self._check_get_reads_set_params(params)
 
         include_item_info = False
         if params.get("include_item_info", 0) == 1:
@@ -55,19 +58,22 @@ class ReadsSetInterfaceV1:
         if 'ref_path_to_set' in params and len(params['ref_path_to_set']) > 0:
             ref_path_to_set = params['ref_path_to_set']
 
+        obj_data = self.setInterface.get_set_object(params['ref'], ref_path_to_set)
+        set_type = obj_data["info"][2]
+
         # If this is a KBaseSets.ReadsSet, do as normal.
         if "KBaseSets" in set_type:
             set_data = self.setInterface.get_set(
                 params['ref'],
                 include_item_info,
                 ref_path_to_set,
-                include_set_item_ref_paths
+                include_set_item_ref_paths,
+                ws_data=obj_data
             )
             return self._normalize_read_set_data(set_data)
 
-        # Otherwise, fetch the SampleSet info from the workspace and go on from there.
+        # Otherwise, it's a SampleSet, go on from there.
         elif "KBaseRNASeq.RNASeqSampleSet" in set_type:
-            obj_data = self.ws.get_objects2({"objects": [obj_spec]})["data"][0]
             obj = obj_data["data"]
             obj_info = obj_data["info"]
             desc = obj.get("sampleset_desc", "")
@@ -120,12 +126,8 @@ class ReadsSetInterfaceV1:
             if params['include_item_info'] not in [0, 1]:
                 raise ValueError('"include_item_info" parameter field can only be set to 0 or 1')
 
-        obj_spec = util.build_ws_obj_selector(params.get('ref'),
-                                              params.get('ref_path_to_set', []))
-
-        info = self.ws.get_object_info3({"objects": [obj_spec]})
-
-        return info["infos"][0][2], obj_spec
+        return util.build_ws_obj_selector(params.get('ref'),
+                                          params.get('ref_path_to_set', []))
 
     def _normalize_read_set_data(self, set_data):
         # make sure that optional/missing fields are filled in or are defined
@@ -2,6 +2,8 @@ import requests
 import json
 import uuid
 
+from SetAPI import util
+
 
 class SamplesSearchUtils():
 
@@ -41,7 +43,10 @@ class SamplesSearchUtils():
         sample_set_ref = params['ref']
         sort_by, extra_must, start, limit = self._parse_inputs(params)
 
-        (workspace_id, object_id, version) = sample_set_ref.split('/')
+        obj_ref = util.parse_reference(sample_set_ref)
+        if obj_ref is None or obj_ref.path or not obj_ref.is_versioned:
+            raise ValueError('"ref" must be a versioned reference to a sample set (ws/obj/ver)')
+        (workspace_id, object_id, version) = obj_ref.ws, obj_ref.obj, obj_ref.ver
         # we use namespace 'WSVER' for versioned elasticsearch index.
         ss_id = f'WSVER::{workspace_id}:{object_id}:{version}'
 
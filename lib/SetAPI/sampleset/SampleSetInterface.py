@@ -5,7 +5,7 @@ An interface for handling sample sets
 import traceback
 import os
 from pprint import pprint
-from SetAPI import util
+from SetAPI import tracing, util
 
 class SampleSetInterface:
 
@@ -33,6 +33,7 @@ class SampleSetInterface:
             error_msg += 'are not matching ConditionSet conditions: {}'.format(conditions)
             raise ValueError(error_msg)
 
+    @tracing.traced
     def create_sample_set(self, ctx, params):
 
         params["sample_ids"] = []
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+'''
+Timing spans, to see where a request spends its time. The server starts a
+Trace for a request when asked to (see request-tracing in deploy.cfg), the
+Impl methods, the stages of the set interfaces and every service call record
+spans into it, and the server logs the breakdown and returns it in the
+X-SetAPI-Timing response header.
+
+The trace is held in a context variable, so code doesn't need to pass it
+around. Work handed to a thread pool joins the trace if the function is
+wrapped with wrap(). When no trace is active, span() returns a shared no-op
+and traced functions are called directly.
+'''
+import contextvars
+import functools
+import threading
+import time
+
+# (trace, index of the enclosing span or None)
+_current = contextvars.ContextVar('setapi_trace', default=None)
+
+
+class Trace:
+    ''' The spans recorded while handling one request. '''
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration = None
+        self._lock = threading.Lock()
+        # [name, index of the enclosing span, start, duration]
+        self.spans = []
+        self._token = None
+
+    def _add(self, name, parent, start, duration=None):
+        with self._lock:
+            self.spans.append([name, parent, start, duration])
+            return len(self.spans) - 1
+
+    def breakdown(self):
+        '''
+        Returns a list of (name, count, total ms) for each span name, in the
+        order they were first entered. Spans run concurrently add up, so the
+        total of a name can be more than the time of the request.
+        '''
+        totals = {}
+        with self._lock:
+            spans = list(self.spans)
+        for name, _, _, duration in spans:
+            if duration is None:
+                continue
+            count, total = totals.get(name, (0, 0.0))
+            totals[name] = (count + 1, total + duration)
+        return [(name, count, total * 1000) for name, (count, total) in totals.items()]
+
+    def to_header(self):
+        ''' The breakdown as a header value, in the style of Server-Timing. '''
+        parts = []
+        if self.duration is not None:
+            parts.append('total;dur=%.1f' % (self.duration * 1000))
+        for name, count, total_ms in self.breakdown():
+            parts.append('%s;dur=%.1f;count=%d' % (name, total_ms, count))
+        return ', '.join(parts)
+
+    def to_log_message(self):
+        parts = ['%s %dx %.1f ms' % (name, count, total_ms)
+                 for name, count, total_ms in self.breakdown()]
+        total = ' %.1f ms' % (self.duration * 1000) if self.duration is not None else ''
+        return 'timing %s%s: %s' % (self.name, total, ', '.join(parts))
+
+
+class _Span:
+
+    __slots__ = ('_trace', '_parent', '_name', '_index', '_token')
+
+    def __init__(self, trace, parent, name):
+        self._trace = trace
+        self._parent = parent
+        self._name = name
+
+    def __enter__(self):
+        self._index = self._trace._add(self._name, self._parent, time.perf_counter())
+        self._token = _current.set((self._trace, self._index))
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        _current.reset(self._token)
+        span = self._trace.spans[self._index]
+        span[3] = time.perf_counter() - span[2]
+        return False
+
+
+class _NoSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def start_trace(name):
+    ''' Starts a trace in the current context, end it with stop_trace. '''
+    trace = Trace(name)
+    trace._token = _current.set((trace, None))
+    return trace
+
+
+def stop_trace(trace):
+    if trace is None:
+        return
+    trace.duration = time.perf_counter() - trace.start
+    _current.reset(trace._token)
+
+
+def span(name):
+    ''' A context manager recording the time spent in it as a span. '''
+    current = _current.get()
+    if current is None:
+        return _NO_SPAN
+    return _Span(current[0], current[1], name)
+
+
+def record(name, seconds):
+    ''' Records a span that ended just now, e.g. from a callback timing a call. '''
+    current = _current.get()
+    if current is not None:
+        current[0]._add(name, current[1], time.perf_counter() - seconds, seconds)
+
+
+def traced(fn):
+    ''' Decorates a function or method to record each call as a span. '''
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        current = _current.get()
+        if current is None:
+            return fn(*args, **kwargs)
+        with _Span(current[0], current[1], name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def wrap(fn):
+    '''
+    Returns fn bound to a copy of the current context, so the spans it records
+    when run on another thread join the current trace. Call once per
+    submission, a context can't run on two threads at once.
+    '''
+    if _current.get() is None:
+        return fn
+    return functools.partial(contextvars.copy_context().run, fn)
@@ -3,20 +3,105 @@ This module contains some utility functions for the SetAPI.
 """
 import os
 import re
+from collections import namedtuple
+from functools import lru_cache
 
 from installed_clients.DataFileUtilClient import DataFileUtil
 
+# an object reference: xx/yy/zz or xx/yy, where xx and yy are ids or names
+_OBJ_REF_REGEX = re.compile(r"^((\d+)|[A-Za-z].*)\/((\d+)|[A-Za-z].*)(\/\d+)?$")
+
+# any number of numeric references or reference paths, each followed by a newline
+_NUMERIC_REFS_REGEX = re.compile(r"(?:\d+/\d+(?:/\d+)?(?:;\d+/\d+(?:/\d+)?)*\n)*")
+
+
+class ObjectRef(namedtuple('ObjectRef', ['ws', 'obj', 'ver', 'path'])):
+    """
+    A parsed object reference. ws and obj are ints for ids and strings for names,
+    ver is an int or None, and path holds the ObjectRefs leading to the object
+    when it was given as a reference path (ref;ref;...).
+    """
+    __slots__ = ()
+
+    @property
+    def is_versioned(self):
+        """ True if the reference, and any path to it, can only ever point to one object. """
+        return isinstance(self.ws, int) and isinstance(self.obj, int) and \
+            self.ver is not None and all(p.is_versioned for p in self.path)
+
+
+def parse_reference(ref):
+    """
+    Parses an object reference (xx/yy/zz or xx/yy) or reference path. Returns an
+    ObjectRef for the last object on the path, or None if ref is not valid.
+    Results are cached and shared, ObjectRefs can't be modified.
+    """
+    if not isinstance(ref, str):
+        return None
+    return _parse_reference(ref)
+
+
+@lru_cache(maxsize=65536)
+def _parse_reference(ref):
+    if ';' not in ref:
+        return _parse_single_reference(ref)
+    path = []
+    for element in ref.split(';'):
+        obj_ref = _parse_single_reference(element)
+        if obj_ref is None:
+            return None
+        path.append(obj_ref)
+    return path[-1]._replace(path=tuple(path[:-1]))
+
+
+def _parse_single_reference(ref):
+    parts = ref.split('/')
+    if len(parts) == 3:
+        if not parts[2].isdecimal():
+            return None
+        ver = int(parts[2])
+    elif len(parts) == 2:
+        ver = None
+    else:
+        return None
+    ws_obj = []
+    for part in parts[:2]:
+        # ids are the common case, names must start with a letter
+        if part.isdecimal():
+            ws_obj.append(int(part))
+        elif part[:1].isascii() and part[:1].isalpha() and '\n' not in part:
+            ws_obj.append(part)
+        else:
+            return None
+    return ObjectRef(ws_obj[0], ws_obj[1], ver, ())
+
 
 def check_reference(ref):
     """
     Returns True if ref looks like an actual object reference: xx/yy/zz or xx/yy
     Returns False otherwise.
     """
-    obj_ref_regex = re.compile("^((\d+)|[A-Za-z].*)\/((\d+)|[A-Za-z].*)(\/\d+)?$")
-    # obj_ref_regex = re.compile("^(?P<wsid>\d+)\/(?P<objid>\d+)(\/(?P<ver>\d+))?$")
-    if ref is None or not obj_ref_regex.match(ref):
-        return False
-    return True
+    obj_ref = parse_reference(ref)
+    if obj_ref is not None and not obj_ref.path:
+        return True
+    # names may contain slashes, which only the full pattern allows for
+    return isinstance(ref, str) and _OBJ_REF_REGEX.match(ref) is not None
+
+
+def find_invalid_references(refs):
+    """
+    Returns those of refs (in order) that are neither an object reference nor a
+    reference path. The usual case, all ids, is checked in a single pass over
+    all the refs.
+    """
+    if not refs:
+        return []
+    if all(isinstance(ref, str) for ref in refs):
+        joined = '\n'.join(refs) + '\n'
+        # a newline inside a ref would throw the count off
+        if joined.count('\n') == len(refs) and _NUMERIC_REFS_REGEX.fullmatch(joined):
+            return []
+    return [ref for ref in refs if not check_reference(ref) and parse_reference(ref) is None]
 
 
 def build_ws_obj_selector(ref, ref_path_to_set):
@@ -32,8 +117,9 @@ def populate_item_object_ref_paths(set_items, obj_selector):
     Called when include_set_item_ref_paths is set.
     Add a field ref_path to each item in set
     """
+    path_prefix = obj_selector['ref'] + ';'
     for set_item in set_items:
-        set_item["ref_path"] = obj_selector['ref'] + ';' + set_item['ref']
+        set_item["ref_path"] = path_prefix + set_item['ref']
     return set_items
 
 
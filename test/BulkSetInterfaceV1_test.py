@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from SetAPI.generic.BulkSetInterfaceV1 import BulkSetInterfaceV1
+from util import make_workspace
+
+# two Expressions (1/1/1, 1/2/1) on genome 1/100/1, and one (1/3/1) on genome 1/200/1
+EXPRESSIONS = [(1, objid, 'KBaseRNASeq.RNASeqExpression-1.0', None, {'genome_id': genome_ref})
+               for objid, genome_ref in ((1, '1/100/1'), (2, '1/100/1'), (3, '1/200/1'))]
+
+
+def expression_set(name, refs, workspace=1):
+    return {'set_type': 'KBaseSets.ExpressionSet', 'workspace': workspace,
+            'output_object_name': name,
+            'data': {'items': [{'ref': ref} for ref in refs]}}
+
+
+class BulkSetInterfaceV1Test(unittest.TestCase):
+
+    ctx = {'provenance': [{'service': 'SetAPI', 'method': 'save_sets'}]}
+
+    def test_save_sets(self):
+        ws = make_workspace(EXPRESSIONS)
+        ret = BulkSetInterfaceV1(ws).save_sets(self.ctx, {'sets': [
+            expression_set('a', ['1/1/1', '1/2/1']),
+            expression_set('b', ['1/2/1']),
+            expression_set('c', ['1/3/1'], workspace='ws2')
+        ]})['sets']
+
+        self.assertEqual([s['set_ref'] for s in ret], ['1/4/1', '1/5/1', '2/1/1'])
+        self.assertEqual(ret[2]['set_info'][2], 'KBaseSets.ExpressionSet')
+        # items looked up once each, then one save per workspace
+        self.assertEqual(ws.calls, [
+            ('get_object_info3', ['1/1/1', '1/2/1', '1/3/1']),
+            ('save_objects', ['a', 'b']),
+            ('save_objects', ['c'])
+        ])
+
+    def test_save_sets_chunks(self):
+        ws = make_workspace(EXPRESSIONS)
+        sets = [expression_set('s' + str(i), ['1/1/1']) for i in range(5)]
+        ret = BulkSetInterfaceV1(ws, chunk_size=2).save_sets(self.ctx, {'sets': sets})['sets']
+
+        self.assertEqual(len(ret), 5)
+        self.assertEqual([c for c in ws.calls if c[0] == 'save_objects'], [
+            ('save_objects', ['s0', 's1']),
+            ('save_objects', ['s2', 's3']),
+            ('save_objects', ['s4'])
+        ])
+
+    def test_save_sets_invalid_saves_nothing(self):
+        ws = make_workspace(EXPRESSIONS)
+        bsi = BulkSetInterfaceV1(ws)
+        with self.assertRaisesRegex(ValueError, 'Set 1 \\("b"\\) is not valid'):
+            bsi.save_sets(self.ctx, {'sets': [expression_set('a', ['1/1/1']),
+                                              expression_set('b', ['1/1/1', '1/3/1'])]})
+        with self.assertRaisesRegex(ValueError, 'does not exist or is not accessible'):
+            bsi.save_sets(self.ctx, {'sets': [expression_set('a', ['1/99/1'])]})
+        self.assertNotIn('save_objects', [c[0] for c in ws.calls])
+
+    def test_save_sets_bad_params(self):
+        bsi = BulkSetInterfaceV1(make_workspace(EXPRESSIONS))
+        with self.assertRaises(ValueError):
+            bsi.save_sets(self.ctx, {})
+        with self.assertRaises(ValueError):
+            bsi.save_sets(self.ctx, {'sets': [{'set_type': 'KBaseSets.NotASet', 'data': {}}]})
+        with self.assertRaises(ValueError):
+            bsi.save_sets(self.ctx, {'sets': [{'set_type': 'KBaseSets.ReadsSet'}]})
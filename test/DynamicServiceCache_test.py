@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+from unittest import mock
+
+from SetAPI.generic.DynamicServiceCache import DynamicServiceCache
+
+
+class FakeBaseClient:
+    """ Stands in for BaseClient: answers Service Wizard lookups and service calls. """
+
+    wizard_up = True
+    service_url = 'http://service/1'
+    lookups = 0
+    created = 0
+    refreshed = threading.Event()
+
+    def __init__(self, url=None, token=None, lookup_url=False):
+        self.url = url
+        FakeBaseClient.created += 1
+
+    def call_method(self, method, params):
+        if method == 'ServiceWizard.get_service_status':
+            FakeBaseClient.lookups += 1
+            try:
+                if not FakeBaseClient.wizard_up:
+                    raise ConnectionError('Service Wizard is down')
+                return {'url': FakeBaseClient.service_url}
+            finally:
+                FakeBaseClient.refreshed.set()
+        return [self.url]
+
+
+@mock.patch('SetAPI.generic.DynamicServiceCache._BaseClient', FakeBaseClient)
+class DynamicServiceCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        FakeBaseClient.wizard_up = True
+        FakeBaseClient.service_url = 'http://service/1'
+        FakeBaseClient.lookups = 0
+        FakeBaseClient.created = 0
+        FakeBaseClient.refreshed.clear()
+
+    def _wait_for_refresh(self, cache):
+        FakeBaseClient.refreshed.wait(5)
+        while cache._refreshing:
+            pass
+        FakeBaseClient.refreshed.clear()
+
+    def test_stale_url_refreshed_in_background(self):
+        cache = DynamicServiceCache('http://wizard', 'release', 'Service')
+        self.assertEqual(cache.call_method('method', [], 'token1'), ['http://service/1'])
+        self.assertEqual(cache.call_method('method', [], 'token1'), ['http://service/1'])
+        self.assertEqual(FakeBaseClient.lookups, 1)
+        # one client for the wizard lookup, one for the service and token
+        self.assertEqual(FakeBaseClient.created, 2)
+
+        FakeBaseClient.service_url = 'http://service/2'
+        cache.next_refresh_time = 0
+        FakeBaseClient.refreshed.clear()
+        # the stale URL is served while the new one is looked up
+        self.assertEqual(cache.call_method('method', [], 'token1'), ['http://service/1'])
+        self._wait_for_refresh(cache)
+        self.assertEqual(cache.call_method('method', [], 'token1'), ['http://service/2'])
+        self.assertEqual(FakeBaseClient.lookups, 2)
+
+    def test_backoff_while_wizard_down(self):
+        cache = DynamicServiceCache('http://wizard', 'release', 'Service',
+                                    min_backoff_seconds=10, refresh_jitter=0)
+        cache.call_method('method', [], None)
+        FakeBaseClient.wizard_up = False
+        backoffs = []
+        for _ in range(3):
+            cache.next_refresh_time = 0
+            FakeBaseClient.refreshed.clear()
+            with mock.patch('SetAPI.generic.DynamicServiceCache.time.time', return_value=1000):
+                self.assertEqual(cache.call_method('method', [], None), ['http://service/1'])
+                self._wait_for_refresh(cache)
+            backoffs.append(cache.next_refresh_time - 1000)
+        self.assertEqual(backoffs, [10, 20, 40])
+
+        FakeBaseClient.wizard_up = True
+        cache.next_refresh_time = 0
+        cache.call_method('method', [], None)
+        self._wait_for_refresh(cache)
+        self.assertEqual(cache.failed_refreshes, 0)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from SetAPI.generic.CachedWorkspaceClient import CachedWorkspaceClient
+from SetAPI.generic.ObjectInfoCache import ObjectInfoCache
+from util import FakeWorkspace, make_info
+
+
+def info_requests(fake_ws):
+    return [refs for method, refs in fake_ws.calls if method == 'get_object_info3']
+
+
+class ObjectInfoCacheTest(unittest.TestCase):
+
+    def test_cache_key(self):
+        self.assertEqual(ObjectInfoCache.cache_key({'ref': '1/2/3'}), '1/2/3')
+        self.assertEqual(ObjectInfoCache.cache_key({'ref': '1/2/3;4/5/6'}), '1/2/3;4/5/6')
+        self.assertIsNone(ObjectInfoCache.cache_key({'ref': '1/2'}))
+        self.assertIsNone(ObjectInfoCache.cache_key({'ref': 'ws/obj/3'}))
+        self.assertIsNone(ObjectInfoCache.cache_key({'ref': '1/2/3', 'included': ['/a']}))
+
+    def test_versioned_refs_are_served_from_cache(self):
+        cache = ObjectInfoCache()
+        fake_ws = FakeWorkspace()
+        for _ in range(3):
+            fake_ws.save(1, 2, 'KBaseFile.SingleEndLibrary-2.0', meta={'key': 'value'})
+        fake_ws.save(1, 4, 'KBaseFile.SingleEndLibrary-2.0')
+        fake_ws.save(1, 8, 'KBaseFile.SingleEndLibrary-2.0')
+        for _ in range(7):
+            fake_ws.save(5, 6, 'KBaseFile.SingleEndLibrary-2.0')
+        ws = CachedWorkspaceClient(fake_ws, cache, token='token1')
+        params = {'objects': [{'ref': '1/2/3'}, {'ref': '1/4/1;5/6/7'}, {'ref': '1/8'}],
+                  'includeMetadata': 1}
+        first = ws.get_object_info3(params)
+        second = ws.get_object_info3(params)
+        self.assertEqual(first, second)
+        # the unversioned ref is never cached
+        self.assertEqual(info_requests(fake_ws), [['1/2/3', '1/4/1;5/6/7', '1/8'], ['1/8']])
+        self.assertEqual(second['paths'][1], ['1/4/1', '5/6/7'])
+
+        # results are copies, callers can't corrupt the cache
+        infos = ws.get_object_info_new({'objects': [{'ref': '1/2/3'}], 'includeMetadata': 1})
+        infos[0][10]['key'] = 'changed'
+        infos = ws.get_object_info_new({'objects': [{'ref': '1/2/3'}], 'includeMetadata': 1})
+        self.assertEqual(infos[0][10], {'key': 'value'})
+
+        # no metadata requested, none returned
+        infos = ws.get_object_info_new({'objects': [{'ref': '1/2/3'}]})
+        self.assertIsNone(infos[0][10])
+        self.assertEqual(len(info_requests(fake_ws)), 2)
+
+    def test_other_tokens_must_prove_access(self):
+        cache = ObjectInfoCache()
+        fake_ws = FakeWorkspace()
+        fake_ws.save(1, 2, 'KBaseFile.SingleEndLibrary-2.0')
+        params = {'objects': [{'ref': '1/2/1'}], 'includeMetadata': 1}
+        CachedWorkspaceClient(fake_ws, cache, token='token1').get_object_info3(params)
+        CachedWorkspaceClient(fake_ws, cache, token='token2').get_object_info3(params)
+        CachedWorkspaceClient(fake_ws, cache, token='token2').get_object_info3(params)
+        self.assertEqual(info_requests(fake_ws), [['1/2/1'], ['1/2/1']])
+
+        cache.access_ttl_seconds = -1
+        CachedWorkspaceClient(fake_ws, cache, token='token1').get_object_info3(params)
+        self.assertEqual(len(info_requests(fake_ws)), 3)
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        cache = ObjectInfoCache(max_bytes=1000)
+        for objid in range(1, 11):
+            cache.add('1/' + str(objid) + '/1', make_info(1, objid, meta={'key': 'value'}),
+                      'token')
+        self.assertLessEqual(cache.total_bytes(), 1000)
+        self.assertLess(cache.size(), 10)
+        self.assertIsNone(cache.get('1/1/1', 'token'))
+        self.assertIsNotNone(cache.get('1/10/1', 'token'))
+
+    def test_large_lookups_are_chunked(self):
+        fake_ws = FakeWorkspace()
+        for objid in range(1, 36):
+            fake_ws.save(1, objid, 'KBaseFile.SingleEndLibrary-2.0')
+        ws = CachedWorkspaceClient(fake_ws, ObjectInfoCache(), token='token1',
+                                   chunk_size=10, max_parallel_chunks=3)
+        refs = ['1/' + str(objid) + '/1' for objid in range(1, 36)]
+        infos = ws.get_object_info_new({'objects': [{'ref': ref} for ref in refs]})
+        self.assertEqual(sorted(len(refs) for refs in info_requests(fake_ws)), [5, 10, 10, 10])
+        self.assertEqual(['1/' + str(o[0]) + '/' + str(o[4]) for o in infos], refs)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+
+from SetAPI.generic.RequestWorkspaceClient import RequestWorkspaceClient, WorkspaceCallStats
+from util import make_workspace
+
+# workspace 1 holds objects 1 to 9
+GENOMES = [(1, objid, 'KBaseGenomes.Genome-17.0', {'items': []}, {'key': 'value'})
+           for objid in range(1, 10)]
+
+
+class RequestWorkspaceClientTest(unittest.TestCase):
+
+    def test_info_lookups_reused(self):
+        ws = make_workspace(GENOMES)
+        totals = WorkspaceCallStats()
+        rws = RequestWorkspaceClient(ws, totals=totals)
+
+        rws.get_objects2({'objects': [{'ref': '1/1/1'}]})
+        ret = rws.get_object_info3({'objects': [{'ref': '1/1/1'}, {'ref': '1/2/1'}],
+                                    'includeMetadata': 1})
+        self.assertEqual([i[0] for i in ret['infos']], [1, 2])
+        self.assertEqual(ret['infos'][0][10], {'key': 'value'})
+        infos = rws.get_object_info_new({'objects': [{'ref': '1/2/1'}, {'ref': '1/1/1'}]})
+        self.assertEqual([i[0] for i in infos], [2, 1])
+        self.assertIsNone(infos[0][10])
+
+        self.assertEqual(ws.calls, [('get_objects2', ['1/1/1']),
+                                    ('get_object_info3', ['1/2/1'])])
+        self.assertEqual(rws.stats, {'calls': 3, 'workspace_calls': 2, 'reused': 1,
+                                     'coalesced': 0, 'merged': 0})
+        self.assertEqual(totals.snapshot(), {'calls': 3, 'workspace_calls': 2, 'reused': 1})
+
+    def test_concurrent_fetches_coalesced(self):
+        ws = make_workspace(GENOMES)
+        ws.gates['get_objects2'] = threading.Event()
+        rws = RequestWorkspaceClient(ws)
+        results = []
+
+        def fetch():
+            results.append(rws.get_objects2({'objects': [{'ref': '1/1/1'}]}))
+
+        threads = [threading.Thread(target=fetch) for _ in range(2)]
+        threads[0].start()
+        while not ws.calls:
+            time.sleep(0.001)
+        threads[1].start()
+        while not any(call.waiters for call in list(rws._calls.values())):
+            time.sleep(0.001)
+        ws.gates['get_objects2'].set()
+        for t in threads:
+            t.join()
+        # each caller gets its own copy of the result
+        results[0]['data'][0]['data']['items'].append('changed')
+        self.assertEqual(results[1]['data'][0]['data'], {'items': []})
+
+        # a call made once the first is done is sent again
+        rws.get_objects2({'objects': [{'ref': '1/1/1'}]})
+        self.assertEqual(len(ws.calls), 2)
+        self.assertEqual(rws.stats, {'calls': 3, 'workspace_calls': 2, 'reused': 0,
+                                     'coalesced': 1, 'merged': 0})
+
+    def test_errors(self):
+        ws = make_workspace(GENOMES)
+        rws = RequestWorkspaceClient(ws)
+        infos = rws.get_object_info_new({'objects': [{'ref': '1/1/1'}, {'ref': '1/99/1'}],
+                                         'ignoreErrors': 1})
+        self.assertIsNone(infos[1])
+        with self.assertRaisesRegex(ValueError, 'does not exist'):
+            rws.get_object_info_new({'objects': [{'ref': '1/99/1'}]})
+
+    def test_write_forgets(self):
+        ws = make_workspace(GENOMES)
+        rws = RequestWorkspaceClient(ws)
+        rws.get_object_info_new({'objects': [{'ref': '1/1/1'}]})
+        rws.save_objects({'id': 1, 'objects': [{'name': 'a', 'type': 'KBaseGenomes.Genome-17.0'}]})
+        rws.get_object_info_new({'objects': [{'ref': '1/1/1'}]})
+        self.assertEqual([c[0] for c in ws.calls],
+                         ['get_object_info3', 'save_objects', 'get_object_info3'])
+
+    def test_concurrent_lookups_merged(self):
+        ws = make_workspace(GENOMES)
+        ws.gates['get_object_info3'] = threading.Event()
+        rws = RequestWorkspaceClient(ws)
+        results = {}
+
+        def lookup(name, refs):
+            results[name] = rws.get_object_info_new({'objects': [{'ref': r} for r in refs]})
+
+        first = threading.Thread(target=lookup, args=('first', ['1/1/1']))
+        first.start()
+        while not ws.calls:
+            time.sleep(0.001)
+        # these wait for the first call to finish, then go together in a single call
+        others = [threading.Thread(target=lookup, args=('second', ['1/1/1', '1/2/1'])),
+                  threading.Thread(target=lookup, args=('third', ['1/2/1', '1/3/1']))]
+        for t in others:
+            t.start()
+        while len(rws._info_batches) < 3:
+            time.sleep(0.001)
+        ws.gates['get_object_info3'].set()
+        for t in [first] + others:
+            t.join()
+
+        self.assertEqual([i[0] for i in results['second']], [1, 2])
+        self.assertEqual([i[0] for i in results['third']], [2, 3])
+        self.assertEqual(len(ws.calls), 2)
+        self.assertEqual(sorted(ws.calls[1][1]), ['1/2/1', '1/3/1'])
+        self.assertEqual(rws.stats, {'calls': 3, 'workspace_calls': 2, 'reused': 0,
+                                     'coalesced': 0, 'merged': 1})
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import tempfile
+import unittest
+from wsgiref.util import setup_testing_defaults
+
+from SetAPI.metrics import CallCounts
+
+
+class SetAPIServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # SetAPIServer builds its Impl from the deployment config when imported
+        with tempfile.NamedTemporaryFile('w', suffix='.cfg', delete=False) as cfg:
+            cfg.write('[SetAPI]\n'
+                      'workspace-url = http://localhost:1\n'
+                      'service-wizard = http://localhost:1\n'
+                      'kbase-endpoint = http://localhost:1\n'
+                      'auth-service-url = http://localhost:1\n'
+                      'request-tracing = on-request\n'
+                      'metrics-endpoint = true\n')
+        os.environ['KB_DEPLOYMENT_CONFIG'] = cfg.name
+        from SetAPI import SetAPIServer
+        cls.application = SetAPIServer.application
+
+    def call(self, body, headers=None):
+        body = json.dumps(body).encode('utf-8')
+        environ = {'REQUEST_METHOD': 'POST', 'CONTENT_LENGTH': str(len(body)),
+                   'wsgi.input': io.BytesIO(body)}
+        environ.update(headers or {})
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status_line, response_headers):
+            response['status'] = status_line
+            response['headers'] = dict(response_headers)
+
+        response['body'] = json.loads(b''.join(self.application(environ, start_response)))
+        return response
+
+    def test_error_with_timing(self):
+        response = self.call({'version': '1.1', 'id': '1', 'method': 'SetAPI.get_reads_set_v1',
+                              'params': [{}]},
+                             {'HTTP_X_SETAPI_TIMING': '1'})
+        self.assertTrue(response['status'].startswith('500'))
+        self.assertEqual(response['body']['id'], '1')
+        self.assertIn('"ref" parameter field specifiying the reads set is required',
+                      response['body']['error']['message'])
+        self.assertTrue(response['headers']['X-SetAPI-Timing'].startswith('total;dur='))
+
+    def test_unknown_methods_share_a_metrics_label(self):
+        for name in ('no_such_method_1', 'no_such_method_2'):
+            response = self.call({'version': '1.1', 'id': '1', 'method': 'SetAPI.' + name,
+                                  'params': [{}]})
+            self.assertEqual(response['body']['error']['name'], 'Method not found')
+        self.call({'version': '1.1', 'id': '1', 'method': 'SetAPI.status', 'params': [{}]})
+        labels = [s['method'] for s in
+                  self.application.metrics.snapshot()['setapi_requests_total']]
+        self.assertNotIn('no_such_method_1', labels)
+        self.assertIn('unknown', labels)
+        self.assertIn('status', labels)
+
+    def test_streamed_response_failure_is_counted(self):
+        def chunks():
+            yield b'["x",'
+            raise TypeError('not encodable')
+        ctx = {'workspace_calls': CallCounts(), 'client_ip': None, 'user_id': None,
+               'module': 'SetAPI', 'method': 'list_sets', 'call_id': '1'}
+        response = self.application.record_request('list_sets', ctx, 0, 0, '200 OK', chunks())
+        self.assertEqual(next(response), b'["x",')
+        with self.assertRaises(TypeError):
+            next(response)
+        errors = self.application.metrics.snapshot()['setapi_request_errors_total']
+        self.assertIn({'method': 'list_sets', 'value': 1}, errors)
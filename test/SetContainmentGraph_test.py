@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from SetAPI.generic.SetContainmentGraph import SetContainmentGraph
+from SetAPI.generic.SetRecords import ObjectInfoRecord, SetRecord
+
+
+def make_set(objid, item_objids):
+    info = ObjectInfoRecord([objid, 'set' + str(objid), 'KBaseSets.ReadsSet-2.0',
+                             '2017-01-01T00:00:00+0000', 1, 'someuser', 1, 'ws1', 'chsum', 10,
+                             {}])
+    return SetRecord(info, tuple((1, i, 1) for i in item_objids))
+
+
+class SetContainmentGraphTest(unittest.TestCase):
+    """
+    Set 10 holds set 11, which holds set 12. Set 20 holds set 12 too. Objects
+    1 to 4 are reads.
+    """
+
+    def setUp(self):
+        self.graph = SetContainmentGraph([make_set(10, [11, 1]),
+                                          make_set(11, [12, 2, 2]),
+                                          make_set(12, [3]),
+                                          make_set(20, [12, 4])])
+
+    def test_roots(self):
+        self.assertEqual([s.info.objid for s in self.graph.roots()], [10, 20])
+
+    def test_depths(self):
+        self.assertEqual(self.graph.depths(), {(1, 10, 1): 0, (1, 20, 1): 0,
+                                               (1, 11, 1): 1, (1, 12, 1): 1})
+
+    def test_containing_sets(self):
+        self.assertEqual(self.graph.containing_sets((1, 2, 1)), [(1, 11, 1)])
+        self.assertEqual(sorted(self.graph.containing_sets((1, 3, 1), transitive=True)),
+                         [(1, 10, 1), (1, 11, 1), (1, 12, 1), (1, 20, 1)])
+        self.assertEqual(self.graph.containing_sets((1, 99, 1)), [])
+
+    def test_members(self):
+        self.assertEqual(sorted(self.graph.members((1, 10, 1))),
+                         [(1, 1, 1), (1, 2, 1), (1, 3, 1), (1, 11, 1), (1, 12, 1)])
+        self.assertEqual(self.graph.members((1, 12, 1)), [(1, 3, 1)])
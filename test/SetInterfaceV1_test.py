@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
+from SetAPI.reads.ReadsSetInterfaceV1 import ReadsSetInterfaceV1
+from util import make_workspace
+
+# workspace 1 holds a ReadsSet (1/10/1) and a GenomeSet (1/11/1) sharing item 1/1/1,
+# and a Genome (1/2/1) that is not a set
+OBJECTS = [(1, 1, 'KBaseFile.PairedEndLibrary-2.0'),
+           (1, 2, 'KBaseGenomes.Genome-17.0'),
+           (1, 3, 'KBaseGenomes.Genome-17.0'),
+           (1, 10, 'KBaseSets.ReadsSet-2.0',
+            {'description': '', 'items': [{'ref': '1/1/1', 'label': 'a'}]}),
+           (1, 11, 'KBaseSets.GenomeSet-1.0',
+            {'description': '', 'items': [{'ref': '1/1/1', 'label': 'b'},
+                                          {'ref': '1/3/1', 'label': 'c'}]})]
+
+
+class SetInterfaceV1Test(unittest.TestCase):
+
+    def test_get_sets(self):
+        ws = make_workspace(OBJECTS)
+        ret = SetInterfaceV1(ws).get_sets({
+            'set_refs': [{'ref': '1/10/1'}, {'ref': '1/99/1'}, {'ref': '1/2/1'},
+                         {'ref': '1/11/1', 'ref_path_to_set': ['1/2/1', '1/11/1']},
+                         {'ref': 'not a ref'}],
+            'include_item_info': 1,
+            'include_set_item_ref_paths': 1
+        })['sets']
+
+        self.assertEqual([s['ref'] for s in ret], ['1/10/1', '1/99/1', '1/2/1', '1/11/1',
+                                                   'not a ref'])
+        self.assertEqual(ret[0]['info'][2], 'KBaseSets.ReadsSet-2.0')
+        self.assertEqual(ret[0]['data']['items'][0]['info'][0], 1)
+        self.assertEqual(ret[0]['data']['items'][0]['ref_path'], '1/10/1;1/1/1')
+        self.assertIn('does not exist or is not accessible', ret[1]['error'])
+        self.assertIn('is not a KBaseSets set', ret[2]['error'])
+        self.assertNotIn('data', ret[2])
+        self.assertEqual([i['ref_path'] for i in ret[3]['data']['items']],
+                         ['1/2/1;1/11/1;1/1/1', '1/2/1;1/11/1;1/3/1'])
+        self.assertIn('must be a valid workspace reference', ret[4]['error'])
+
+        # one call for the sets, one for the items, each item asked for once per path
+        self.assertEqual(ws.calls, [
+            ('get_objects2', ['1/10/1', '1/99/1', '1/2/1', '1/2/1;1/11/1']),
+            ('get_object_info_new', ['1/1/1', '1/2/1;1/11/1;1/1/1', '1/2/1;1/11/1;1/3/1'])
+        ])
+
+    def test_get_sets_reads_set(self):
+        ws = make_workspace(OBJECTS)
+        rsi = ReadsSetInterfaceV1(ws)
+        params = {'ref': '1/10/1', 'include_item_info': 1, 'include_set_item_ref_paths': 1}
+        ret = SetInterfaceV1(ws).get_sets(
+            {'set_refs': [{'ref': '1/10/1'}], 'include_item_info': 1,
+             'include_set_item_ref_paths': 1},
+            normalizers={'KBaseSets.ReadsSet': rsi._normalize_read_set_data})['sets']
+        self.assertEqual({'data': ret[0]['data'], 'info': ret[0]['info']},
+                         rsi.get_reads_set({}, params))
+
+        # each set goes through the normalizer of its own type only
+        def add_count(set_data):
+            set_data['data']['item_count'] = len(set_data['data']['items'])
+            return set_data
+        ret = SetInterfaceV1(ws).get_sets({'set_refs': [{'ref': '1/10/1'}, {'ref': '1/11/1'}]},
+                                          normalizers={'KBaseSets.ReadsSet': add_count})['sets']
+        self.assertEqual(ret[0]['data']['item_count'], 1)
+        self.assertNotIn('item_count', ret[1]['data'])
+
+    def test_get_sets_bad_params(self):
+        si = SetInterfaceV1(make_workspace(OBJECTS))
+        with self.assertRaises(ValueError):
+            si.get_sets({})
+        with self.assertRaises(ValueError):
+            si.get_sets({'set_refs': [{'ref_path_to_set': []}]})
+        with self.assertRaises(ValueError):
+            si.get_sets({'set_refs': [], 'include_item_info': 2})
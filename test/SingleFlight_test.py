@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+
+from SetAPI.generic.CachedWorkspaceClient import CachedWorkspaceClient
+from SetAPI.generic.ObjectInfoCache import ObjectInfoCache
+from SetAPI.generic.SingleFlight import SingleFlight
+from util import make_workspace
+
+# objects 1/10/1 and 2/10/1, workspace 2 can only be read with 'token1'
+SETS = [(wsid, 10, 'KBaseSets.ExpressionSet-2.0', {'items': []}) for wsid in (1, 2)]
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def _fetch_concurrently(self, refs, tokens, ignore_errors=0):
+        cache = ObjectInfoCache()
+        single_flight = SingleFlight()
+        workspaces = [make_workspace(SETS, token=token, private={2: 'token1'})
+                      for token in tokens]
+        for ws in workspaces:
+            # so concurrent calls overlap
+            ws.gates['get_objects2'] = threading.Event()
+        results = [None] * len(tokens)
+
+        def fetch(idx):
+            ws = CachedWorkspaceClient(workspaces[idx], cache, token=tokens[idx],
+                                       single_flight=single_flight)
+            try:
+                results[idx] = ws.get_objects2({'objects': [{'ref': ref} for ref in refs],
+                                                'ignoreErrors': ignore_errors})
+            except ValueError as e:
+                results[idx] = e
+
+        threads = [threading.Thread(target=fetch, args=(idx,)) for idx in range(len(tokens))]
+        threads[0].start()
+        while not workspaces[0].calls:
+            time.sleep(0.001)
+        for t in threads[1:]:
+            t.start()
+        # give the others time to join the first call
+        time.sleep(0.2)
+        for ws in workspaces:
+            ws.gates['get_objects2'].set()
+        for t in threads:
+            t.join()
+        return workspaces, results, single_flight
+
+    def test_concurrent_fetches_shared(self):
+        workspaces, results, single_flight = self._fetch_concurrently(
+            ['1/10/1'], ['token1', 'token1', 'token2'])
+        self.assertEqual(single_flight.shared, 2)
+        self.assertEqual([r['data'][0]['info'][0] for r in results], [10, 10, 10])
+        results[1]['data'][0]['data']['items'].append('changed')
+        self.assertEqual(results[2]['data'][0]['data'], {'items': []})
+        # only the other token needs its access checked
+        self.assertEqual([[method for method, _ in ws.calls] for ws in workspaces],
+                         [['get_objects2'], [], ['get_object_info3']])
+
+    def test_shared_result_needs_access(self):
+        workspaces, results, _ = self._fetch_concurrently(['2/10/1'], ['token1', 'token2'])
+        self.assertEqual(results[0]['data'][0]['info'][0], 10)
+        self.assertIsInstance(results[1], ValueError)
+
+    def test_shared_result_ignore_errors(self):
+        workspaces, results, single_flight = self._fetch_concurrently(
+            ['1/10/1', '1/9/1', '2/10/1'], ['token1', 'token1', 'token2'], ignore_errors=1)
+        self.assertEqual(single_flight.shared, 2)
+        self.assertEqual([[d['info'][0] if d else None for d in r['data']] for r in results],
+                         [[10, None, 10], [10, None, 10], [10, None, None]])
+
+    def test_failed_call_not_shared(self):
+        single_flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            single_flight.do('key', lambda: int('x'))
+        self.assertEqual(single_flight.do('key', lambda: {'a': 1}), ({'a': 1}, False))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import mock
+
+from SetAPI.authclient import KBaseAuth, TokenCache
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code == 200
+        self.reason = 'OK' if self.ok else 'Unauthorized'
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class TokenCacheTest(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = TokenCache(maxsize=2)
+        cache.add_valid_token('token1', 'user1')
+        cache.add_valid_token('token2', 'user2')
+        self.assertEqual(cache.get_user('token1'), 'user1')
+        # token2 is now the least recently used
+        cache.add_valid_token('token3', 'user3')
+        self.assertIsNone(cache.get_user('token2'))
+        self.assertEqual(cache.get_user('token1'), 'user1')
+        self.assertEqual(cache.get_user('token3'), 'user3')
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_expiry(self):
+        cache = TokenCache(ttl_sec=10, invalid_ttl_sec=1)
+        with mock.patch('SetAPI.authclient._time.time', return_value=100):
+            cache.add_valid_token('token1', 'user1')
+            cache.add_invalid_token('bad', 'Invalid token')
+        with mock.patch('SetAPI.authclient._time.time', return_value=105):
+            self.assertEqual(cache.get('token1'), ('user1', None))
+            self.assertIsNone(cache.get('bad'))
+        with mock.patch('SetAPI.authclient._time.time', return_value=111):
+            self.assertIsNone(cache.get('token1'))
+
+    def test_auth_client_caches_valid_and_invalid_tokens(self):
+        auth = KBaseAuth('http://auth')
+        responses = {'good': FakeResponse(200, {'user_id': 'user1'}),
+                     'bad': FakeResponse(401, {'error': {'message': 'Invalid token'}})}
+        with mock.patch('SetAPI.authclient._requests.post',
+                        side_effect=lambda url, data: responses[data['token']]) as post:
+            for _ in range(3):
+                self.assertEqual(auth.get_user('good'), 'user1')
+                with self.assertRaisesRegex(ValueError, 'Invalid token'):
+                    auth.get_user('bad')
+        self.assertEqual(post.call_count, 2)
+
+    def test_auth_service_errors_not_cached(self):
+        for status_code in (503, 429, 400):
+            auth = KBaseAuth('http://auth')
+            with mock.patch('SetAPI.authclient._requests.post',
+                            return_value=FakeResponse(status_code,
+                                                      {'error': {'message': 'Down'}})) as post:
+                for _ in range(2):
+                    with self.assertRaises(ValueError):
+                        auth.get_user('token1')
+            self.assertEqual(post.call_count, 2)
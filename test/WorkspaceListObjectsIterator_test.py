@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from SetAPI.generic.WorkspaceListObjectsIterator import WorkspaceListObjectsIterator
+from util import make_workspace
+
+
+def numbered_objects(max_objids, step=1):
+    """
+    Objects 1..max_objids[wsid] (or only every step-th one) of each workspace wsid, odd
+    ids are ReadsSets.
+    """
+    return [(wsid, objid, 'KBaseSets.ReadsSet-2.0' if objid % 2 else 'KBaseGenomes.Genome-8.2')
+            for wsid, max_objid in max_objids.items()
+            for objid in range(step, max_objid + 1, step)]
+
+
+def list_calls(ws):
+    return [params for method, params in ws.calls if method == 'list_objects']
+
+
+class WorkspaceListObjectsIteratorTest(unittest.TestCase):
+
+    def list_all(self, ws, **kwargs):
+        return [(o[6], o[0]) for o in WorkspaceListObjectsIterator(
+            ws, ws_info_list=ws.list_workspace_info({}), **kwargs)]
+
+    def test_windows(self):
+        ws = make_workspace(numbered_objects({1: 25, 2: 3}))
+        objects = self.list_all(ws, part_size=10)
+        self.assertEqual(len(objects), 28)
+        self.assertEqual(len(set(objects)), 28)
+        self.assertEqual([(c['minObjectID'], c['maxObjectID']) for c in list_calls(ws)],
+                         [(1, 10), (1, 10), (11, 20), (21, 30)])
+
+    def test_filter_and_global_limit(self):
+        ws = make_workspace(numbered_objects({1: 100}))
+        objects = self.list_all(ws, part_size=10, global_limit=30,
+                                object_filter=lambda o: o[2].startswith('KBaseSets.ReadsSet-'))
+        self.assertEqual(objects, [(1, objid) for objid in range(1, 60, 2)])
+
+    def test_prefetch_keeps_order(self):
+        max_objids = {wsid: wsid * 7 for wsid in range(1, 10)}
+        ws = make_workspace(numbered_objects(max_objids))
+        expected = self.list_all(ws, part_size=10)
+        ws = make_workspace(numbered_objects(max_objids), delay=0.01)
+        objects = self.list_all(ws, part_size=10, prefetch=4)
+        self.assertEqual(objects, expected)
+
+    def test_adaptive_windows(self):
+        # a sparse workspace is covered with a few wide windows
+        ws = make_workspace(numbered_objects({101: 100000}, step=100))
+        objects = self.list_all(ws, part_size=100, adaptive=True,
+                                min_part_size=10, max_part_size=100000)
+        self.assertEqual(len(objects), 1000)
+        self.assertLess(len(list_calls(ws)), 20)
+
+        # later scans of the same workspace start with the density already known
+        ws = make_workspace(numbered_objects({101: 100000}, step=100))
+        objects = self.list_all(ws, part_size=100, adaptive=True,
+                                min_part_size=10, max_part_size=100000)
+        self.assertEqual(len(objects), 1000)
+        self.assertEqual(list_calls(ws)[0]['maxObjectID'], 10000)
+
+    def test_truncated_windows_are_split(self):
+        ws = make_workspace(numbered_objects({201: 100}), result_limit=30)
+        objects = self.list_all(ws, part_size=100, result_limit=30)
+        self.assertEqual(objects, [(201, objid) for objid in range(1, 101)])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from SetAPI.generic.GenericSetNavigator import GenericSetNavigator
+from SetAPI.generic.WorkspaceSetIndex import WorkspaceSetIndex
+from util import FakeWorkspace
+
+
+class WorkspaceSetIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ws = FakeWorkspace()
+        self.save(1, 'KBaseFile.SingleEndLibrary-2.0')
+        self.save(2, 'KBaseSets.ReadsSet-2.0', ['1/1/1'])
+        self.index = WorkspaceSetIndex()
+
+    def save(self, objid, obj_type, refs=()):
+        self.ws.save(1, objid, obj_type, meta={'description': 'obj' + str(objid)}, refs=refs)
+
+    def methods_called(self):
+        return [method for method, _ in self.ws.calls]
+
+    def list_sets(self, **params):
+        params['workspace'] = 'ws1'
+        gsn = GenericSetNavigator(self.ws, set_index=self.index)
+        self.ws.calls = []
+        return gsn.list_sets(params)['sets']
+
+    def test_unchanged_workspace_is_not_scanned_again(self):
+        first = self.list_sets()
+        self.assertEqual([s['ref'] for s in first], ['1/2/1'])
+        self.assertEqual(first[0]['items'], [{'ref': '1/1/1'}])
+        self.assertIsNone(first[0]['info'][10])
+        second = self.list_sets()
+        self.assertEqual(second, first)
+        self.assertEqual(self.methods_called(), ['get_workspace_info'])
+
+        # callers get copies, metadata only when asked for
+        second[0]['items'].append({'ref': '1/9/1'})
+        third = self.list_sets(include_metadata=1)
+        self.assertEqual(third[0]['items'], [{'ref': '1/1/1'}])
+        self.assertEqual(third[0]['info'][10], {'description': 'obj2'})
+
+    def test_changes_are_picked_up_incrementally(self):
+        self.list_sets()
+        self.save(3, 'KBaseSets.AssemblySet-1.0', [])
+        self.save(2, 'KBaseSets.ReadsSet-2.0', ['1/1/1'])
+        sets = self.list_sets()
+        self.assertEqual(sorted(s['ref'] for s in sets), ['1/2/2', '1/3/1'])
+        # only objects above the old max object id are listed
+        self.assertEqual(self.methods_called().count('list_objects'), 1)
+
+        self.ws.delete(1, 3)
+        self.save(4, 'KBaseFile.SingleEndLibrary-2.0')
+        sets = self.list_sets()
+        self.assertEqual([s['ref'] for s in sets], ['1/2/2'])
+        self.assertEqual([s['ref'] for s in self.list_sets(types=['KBaseSets.AssemblySet'])], [])
+
+    def test_old_entries_are_rescanned(self):
+        self.list_sets()
+        self.index.max_age_seconds = -1
+        self.list_sets()
+        self.assertIn('list_objects', self.methods_called())
+
+    def test_pages(self):
+        for objid in range(3, 8):
+            self.save(objid, 'KBaseSets.AssemblySet-1.0', [])
+        gsn = GenericSetNavigator(self.ws, set_index=self.index)
+        refs = []
+        params = {'workspace': 'ws1', 'limit': 2}
+        while True:
+            ret = gsn.list_sets(params)
+            self.assertLessEqual(len(ret['sets']), 2)
+            refs.extend(s['ref'] for s in ret['sets'])
+            if 'next_cursor' not in ret:
+                break
+            params['cursor'] = ret['next_cursor']
+        self.assertEqual(refs, ['1/' + str(objid) + '/1' for objid in range(2, 8)])
+
+    def test_types_without_index(self):
+        self.save(3, 'KBaseSets.AssemblySet-1.0', [])
+        self.save(4, 'KBaseSets.GenomeSet-2.0', [])
+        gsn = GenericSetNavigator(self.ws)
+        for types, type_filters in [
+                (['KBaseSets.ReadsSet', 'KBaseSets.GenomeSet'],
+                 ['KBaseSets.ReadsSet', 'KBaseSets.GenomeSet']),
+                (['KBaseSets.ReadsSet', 'KBaseSets.GenomeSet', 'KBaseSets.AssemblySet'],
+                 [None])]:
+            self.ws.calls = []
+            sets = gsn.list_sets({'workspace': 'ws1', 'types': types})['sets']
+            self.assertEqual(len(sets), len(types))
+            # one or two types are filtered by the Workspace, one pass each
+            self.assertEqual([params.get('type') for method, params in self.ws.calls
+                              if method == 'list_objects'], type_filters)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from installed_clients import baseclient
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers every call with an empty result (padded and gzipped on /gzip), or
+    drops the connection on /drop.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['content-length']))
+        self.server.requests.append((self.path, self.client_address))
+        if self.path == '/drop':
+            self.close_connection = True
+            return
+        body = json.dumps({'version': '1.1', 'result': [{}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        if self.path == '/gzip':
+            body = gzip.compress(body + b' ' * 10000)
+            self.send_header('content-encoding', 'gzip')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BaseClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:%d' % self.server.server_port
+        baseclient.configure_connection_pool(pool_size=4, max_retries=3)
+
+    def tearDown(self):
+        baseclient.configure_connection_pool(pool_size=10, max_retries=0)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_session_reused(self):
+        client = baseclient.BaseClient(self.url + '/a', ignore_authrc=True)
+        other = baseclient.BaseClient(self.url + '/b', ignore_authrc=True)
+        for c in (client, other, client):
+            self.assertEqual(c.call_method('Service.method', [{}]), {})
+        session = baseclient._get_session(self.url + '/c')
+        self.assertIs(session, baseclient._get_session(self.url + '/a'))
+        adapter = session.get_adapter(self.url)
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual((adapter.max_retries.connect, adapter.max_retries.read), (3, 0))
+        # all three calls went over the same keep-alive connection
+        self.assertEqual(len(set(addr for _, addr in self.server.requests)), 1)
+
+    def test_read_failure_not_retried(self):
+        client = baseclient.BaseClient(self.url + '/drop', ignore_authrc=True)
+        with self.assertRaises(Exception):
+            client.call_method('Service.method', [{}])
+        self.assertEqual([path for path, _ in self.server.requests], ['/drop'])
+
+    def test_observer_sees_wire_bytes(self):
+        calls = []
+        baseclient.configure_call_observer(lambda *args: calls.append(args))
+        try:
+            client = baseclient.BaseClient(self.url + '/gzip', ignore_authrc=True)
+            self.assertEqual(client.call_method('Service.method', [{}]), {})
+        finally:
+            baseclient.configure_call_observer()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(0 < calls[0][3] < 1000)
+        self.assertFalse(calls[0][4])
@@ -0,0 +1,172 @@
+"""
+Serves the in-memory FakeWorkspace of the unit tests (see test/util.py) over
+JSON-RPC from a local HTTP server, for benchmarking the SetAPI without a KBase
+deployment.
+
+populate() fills a FakeWorkspace with synthetic sets. The server can add a
+fixed plus random latency to each call, and gzip responses for clients that
+ask for it. Calls, request bytes and response bytes (as sent) are counted per
+method.
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from util import FakeWorkspace, info_to_ref  # noqa: E402
+
+
+# item types saved into the synthetic sets, by set type
+SET_ITEM_TYPES = {
+    'KBaseSets.ReadsSet-2.0': 'KBaseFile.PairedEndLibrary-2.0',
+    'KBaseSets.AssemblySet-1.0': 'KBaseGenomeAnnotations.Assembly-6.0',
+    'KBaseSets.GenomeSet-1.0': 'KBaseGenomes.Genome-17.0',
+    'KBaseSets.ExpressionSet-2.0': 'KBaseRNASeq.RNASeqExpression-5.0',
+    'KBaseSets.ReadsAlignmentSet-2.0': 'KBaseRNASeq.RNASeqAlignment-9.0',
+    'KBaseSets.FeatureSetSet-1.0': 'KBaseCollections.FeatureSet-4.0',
+    'KBaseSets.DifferentialExpressionMatrixSet-1.0':
+        'KBaseFeatureValues.DifferentialExpressionMatrix-1.0'
+}
+
+# the Workspace methods the SetAPI uses
+METHODS = ['get_workspace_info', 'list_workspace_info', 'list_objects', 'get_object_info3',
+           'get_object_info_new', 'get_objects2', 'save_objects']
+
+
+def populate(workspace, num_workspaces=1, sets_per_type=5, items_per_set=10,
+             other_objects=0, set_types=None):
+    """
+    Fills workspaces 1 to num_workspaces of a FakeWorkspace, each with
+    sets_per_type sets of each of set_types (by default every KBaseSets type),
+    each set with its own items_per_set items, plus other_objects unrelated
+    objects. Returns the names of the workspaces and the refs of the sets by type.
+    """
+    set_types = set_types or sorted(SET_ITEM_TYPES)
+    ws_names = []
+    set_refs = defaultdict(list)
+    for wsid in range(1, num_workspaces + 1):
+        ws_names.append('ws' + str(wsid))
+        objids = iter(range(1, 1000000000))
+        for obj_idx in range(other_objects):
+            workspace.save(wsid, next(objids), 'KBaseGenomes.ContigSet-3.0',
+                           {'id': str(obj_idx)}, {'Size': '1'}, name='other_' + str(obj_idx))
+        for set_type in set_types:
+            short_type = set_type.split('.')[1].split('-')[0]
+            for set_idx in range(sets_per_type):
+                items = []
+                for item_idx in range(items_per_set):
+                    name = short_type + '_' + str(set_idx) + '_item_' + str(item_idx)
+                    info = workspace.save(wsid, next(objids), SET_ITEM_TYPES[set_type],
+                                          {'id': name}, {'Name': name}, name=name)
+                    items.append({'ref': info_to_ref(info),
+                                  'label': 'label_' + str(item_idx)})
+                info = workspace.save(wsid, next(objids), set_type,
+                                      {'description': 'benchmark set', 'items': items},
+                                      {'description': 'benchmark set',
+                                       'item_count': str(items_per_set)},
+                                      refs=[item['ref'] for item in items],
+                                      name=short_type + '_' + str(set_idx))
+                set_refs[set_type].append(info_to_ref(info))
+    workspace.calls = []
+    return ws_names, dict(set_refs)
+
+
+class FakeWorkspaceServer:
+    """
+    Serves a FakeWorkspace over HTTP on localhost, in a background thread:
+
+        server = FakeWorkspaceServer(FakeWorkspace())
+        server.start()
+        ws_url = server.url
+        ...
+        server.stop()
+
+    latency - seconds added to every call, plus up to jitter seconds at random
+    """
+
+    def __init__(self, fake_workspace, host='localhost', port=0, gzip_responses=False,
+                 latency=0.0, jitter=0.0):
+        self.workspace = fake_workspace
+        self.gzip_responses = gzip_responses
+        self.latency = latency
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self.reset_stats()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+        self.url = 'http://{}:{}/'.format(host, self._httpd.server_address[1])
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = defaultdict(int)
+            self.bytes_in = defaultdict(int)
+            self.bytes_out = defaultdict(int)
+            # the calls the FakeWorkspace records are not needed here
+            self.workspace.calls = []
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def call(self, method, params):
+        """ Runs one JSON-RPC method, after the configured latency. """
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.random() * self.jitter)
+        if method not in METHODS:
+            raise ValueError('No such method: Workspace.' + method)
+        return getattr(self.workspace, method)(*params)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # headers and body are written separately, don't let them wait on acks
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                req = json.loads(body)
+                method = req.get('method', '').split('.')[-1]
+                status = 200
+                try:
+                    resp = {'version': '1.1', 'id': req.get('id'),
+                            'result': [server.call(method, req.get('params', []))]}
+                except ValueError as e:
+                    status = 500
+                    resp = {'version': '1.1', 'id': req.get('id'),
+                            'error': {'name': 'JSONRPCError', 'code': -32500,
+                                      'message': str(e), 'error': str(e)}}
+                out = json.dumps(resp).encode('utf-8')
+                compressed = (server.gzip_responses and
+                              'gzip' in self.headers.get('Accept-Encoding', ''))
+                if compressed:
+                    out = gzip.compress(out, 6)
+                with server._lock:
+                    server.calls[method] += 1
+                    server.bytes_in[method] += len(body)
+                    server.bytes_out[method] += len(out)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if compressed:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
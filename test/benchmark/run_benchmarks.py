@@ -0,0 +1,281 @@
+"""
+Benchmarks the SetAPI against the fake Workspace of the unit tests, served over
+HTTP in this process (see FakeWorkspaceServer.py), so performance can be measured without a KBase
+deployment.
+
+Each scenario calls one SetAPI method repeatedly, either directly on SetAPIImpl
+or through the WSGI Application, and reports the latency percentiles, and per
+call, the number of Workspace calls and the bytes sent to and received from
+the Workspace, plus the size of the SetAPI response.
+
+Run from this directory with the SetAPI lib on the path, e.g.:
+
+    PYTHONPATH=../../lib python run_benchmarks.py --workspaces 5 --items-per-set 100 \\
+        --latency-ms 20 --iterations 20 --mode both
+
+With --concurrency N, N clients call each scenario at the same time, as when
+many users open the same shared narrative.
+
+Settings from deploy.cfg can be overridden with --config, e.g.
+--config list-objects-prefetch=0 --config set-index-max-workspaces=0.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from wsgiref.util import setup_testing_defaults
+
+from FakeWorkspaceServer import FakeWorkspace, FakeWorkspaceServer, populate
+
+# get_*_set_v1 method for each set type
+GET_SET_METHODS = {
+    'KBaseSets.ReadsSet-2.0': 'get_reads_set_v1',
+    'KBaseSets.AssemblySet-1.0': 'get_assembly_set_v1',
+    'KBaseSets.GenomeSet-1.0': 'get_genome_set_v1',
+    'KBaseSets.ExpressionSet-2.0': 'get_expression_set_v1',
+    'KBaseSets.ReadsAlignmentSet-2.0': 'get_reads_alignment_set_v1',
+    'KBaseSets.FeatureSetSet-1.0': 'get_feature_set_set_v1',
+    'KBaseSets.DifferentialExpressionMatrixSet-1.0': 'get_differential_expression_matrix_set_v1'
+}
+
+# the same settings as deploy.cfg, without the KBase endpoints
+DEFAULT_CONFIG = {
+    'object-info-cache-max-bytes': '67108864',
+    'object-info-cache-access-ttl-seconds': '60',
+    'object-info-chunk-size': '1000',
+    'object-info-max-parallel-chunks': '4',
+    'workspace-request-coalescing': 'true',
+    'workspace-single-flight': 'true',
+    'http-pool-size': '10',
+    'http-max-retries': '2',
+    'http-retry-backoff-factor': '0.2',
+    'http-keep-alive': 'true',
+    'http-accept-compressed': 'true',
+    'json-codec': 'auto',
+    'batch-concurrency': 'true',
+    'batch-max-workers': '10',
+    'batch-max-per-request': '5',
+    'auth-token-cache-size': '2000',
+    'auth-token-cache-ttl-seconds': '300',
+    'auth-invalid-token-cache-ttl-seconds': '30',
+    'response-compression': 'true',
+    'response-compression-min-bytes': '1024',
+    'response-compression-stream-bytes': '1048576',
+    'response-compression-level': '6',
+    'response-chunk-bytes': '262144',
+    'metrics-endpoint': 'true',
+    'request-tracing': 'on-request',
+    'list-objects-prefetch': '4',
+    'list-objects-adaptive-window': 'true',
+    'save-sets-chunk-size': '100',
+    'save-sets-chunk-max-bytes': '50000000',
+    'set-index-max-workspaces': '1000',
+    'set-index-max-age-seconds': '600'
+}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    idx = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[idx]
+
+
+def build_scenarios(ws_names, set_refs):
+    """ Returns a list of (name, method, params) to benchmark. """
+    all_refs = [ref for refs in set_refs.values() for ref in refs]
+    scenarios = [
+        ('list_sets', 'list_sets', {'workspaces': ws_names}),
+        ('list_sets, one type', 'list_sets',
+         {'workspaces': ws_names, 'types': ['KBaseSets.ReadsSet']}),
+        ('list_sets, two types', 'list_sets',
+         {'workspaces': ws_names, 'types': ['KBaseSets.ReadsSet', 'KBaseSets.GenomeSet']}),
+        ('list_sets+item_info', 'list_sets',
+         {'workspaces': ws_names, 'include_set_item_info': 1}),
+        ('list_sets+item_info, page of 10', 'list_sets',
+         {'workspaces': ws_names, 'include_set_item_info': 1, 'limit': 10}),
+        ('get_set_items', 'get_set_items',
+         {'set_refs': [{'ref': ref} for ref in all_refs[:20]]}),
+        ('get_sets+item_info', 'get_sets',
+         {'set_refs': [{'ref': ref} for ref in all_refs[:20]], 'include_item_info': 1})
+    ]
+    for set_type in sorted(set_refs):
+        scenarios.append((GET_SET_METHODS[set_type] + '+item_info', GET_SET_METHODS[set_type],
+                          {'ref': set_refs[set_type][0], 'include_item_info': 1}))
+    return scenarios
+
+
+class ImplRunner:
+    """ Calls methods directly on a SetAPIImpl. """
+
+    name = 'impl'
+
+    def __init__(self, config):
+        from SetAPI.SetAPIImpl import SetAPI
+        self.impl = SetAPI(config)
+
+    def call(self, method, params):
+        ctx = {'token': None, 'provenance': [{'service': 'SetAPI', 'method': method,
+                                              'method_params': [params]}]}
+        result = getattr(self.impl, method)(ctx, params)
+        # encoded as the server would, so the codec is part of the timing
+        return len(self.impl.json_codec.dumps(result))
+
+
+class WSGIRunner:
+    """ Sends JSON-RPC requests through the SetAPIServer WSGI Application. """
+
+    name = 'wsgi'
+
+    def __init__(self, config):
+        # SetAPIServer builds its Impl from the deployment config when imported
+        with tempfile.NamedTemporaryFile('w', suffix='.cfg', delete=False) as cfg:
+            cfg.write('[SetAPI]\n')
+            for key, value in config.items():
+                cfg.write(key + ' = ' + value + '\n')
+        os.environ['KB_DEPLOYMENT_CONFIG'] = cfg.name
+        from SetAPI import SetAPIServer
+        self.application = SetAPIServer.application
+
+    def call(self, method, params):
+        body = json.dumps({'version': '1.1', 'id': '1', 'method': 'SetAPI.' + method,
+                           'params': [params]}).encode('utf-8')
+        environ = {'REQUEST_METHOD': 'POST', 'CONTENT_LENGTH': str(len(body)),
+                   'wsgi.input': io.BytesIO(body)}
+        setup_testing_defaults(environ)
+        status = []
+
+        def start_response(status_line, headers):
+            status.append(status_line)
+
+        response = b''.join(self.application(environ, start_response))
+        if not status[0].startswith('200'):
+            raise RuntimeError(method + ' failed: ' + response.decode('utf-8'))
+        return len(response)
+
+
+def run_scenario(runner, server, method, params, iterations, warmup, concurrency=1):
+    for _ in range(warmup):
+        runner.call(method, params)
+    server.reset_stats()
+    latencies = []
+    response_bytes = []
+
+    def run_calls():
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response_bytes.append(runner.call(method, params))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=run_calls) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # per call, over all the clients
+    iterations = len(latencies)
+    response_bytes = sum(response_bytes)
+    return {
+        'p50_ms': percentile(latencies, 50),
+        'p90_ms': percentile(latencies, 90),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies),
+        'ws_calls': sum(server.calls.values()) / float(iterations),
+        'ws_calls_by_method': {m: c / float(iterations) for m, c in server.calls.items()},
+        'ws_bytes_sent': sum(server.bytes_in.values()) / float(iterations),
+        'ws_bytes_received': sum(server.bytes_out.values()) / float(iterations),
+        'response_bytes': response_bytes / float(iterations)
+    }
+
+
+def print_results(runner_name, results):
+    print('\n' + runner_name)
+    header = '{:<55} {:>9} {:>9} {:>9} {:>9} {:>10} {:>10} {:>10}'
+    row = '{:<55} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>10.1f} {:>10.1f} {:>10.1f}'
+    print(header.format('scenario', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'ws calls',
+                        'ws KB', 'resp KB'))
+    for name, r in results:
+        print(row.format(name, r['p50_ms'], r['p90_ms'], r['p99_ms'], r['max_ms'], r['ws_calls'],
+                         (r['ws_bytes_sent'] + r['ws_bytes_received']) / 1024.0,
+                         r['response_bytes'] / 1024.0))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workspaces', type=int, default=3)
+    parser.add_argument('--sets-per-type', type=int, default=5)
+    parser.add_argument('--items-per-set', type=int, default=20)
+    parser.add_argument('--other-objects', type=int, default=100,
+                        help='objects per workspace that are not in any set')
+    parser.add_argument('--latency-ms', type=float, default=0,
+                        help='latency added to every Workspace call')
+    parser.add_argument('--jitter-ms', type=float, default=0,
+                        help='up to this much random latency added to every Workspace call')
+    parser.add_argument('--ws-gzip', action='store_true',
+                        help='the fake Workspace gzips responses for clients that accept it')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='untimed calls made before each scenario')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='clients calling each scenario at the same time')
+    parser.add_argument('--mode', choices=['impl', 'wsgi', 'both'], default='impl')
+    parser.add_argument('--scenario', action='append',
+                        help='only run scenarios whose name contains this, can be repeated')
+    parser.add_argument('--config', action='append', default=[],
+                        help='key=value to override a deploy.cfg setting, can be repeated')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    fake_ws = FakeWorkspace()
+    ws_names, set_refs = populate(fake_ws, num_workspaces=args.workspaces,
+                                  sets_per_type=args.sets_per_type,
+                                  items_per_set=args.items_per_set,
+                                  other_objects=args.other_objects)
+    server = FakeWorkspaceServer(fake_ws, gzip_responses=args.ws_gzip,
+                                 latency=args.latency_ms / 1000.0,
+                                 jitter=args.jitter_ms / 1000.0).start()
+
+    config = dict(DEFAULT_CONFIG)
+    config.update({
+        'workspace-url': server.url,
+        'service-wizard': server.url,
+        'kbase-endpoint': server.url.rstrip('/'),
+        'auth-service-url': server.url
+    })
+    for override in args.config:
+        key, value = override.split('=', 1)
+        config[key.strip()] = value.strip()
+
+    runner_classes = {'impl': [ImplRunner], 'wsgi': [WSGIRunner],
+                      'both': [ImplRunner, WSGIRunner]}[args.mode]
+    scenarios = build_scenarios(ws_names, set_refs)
+    if args.scenario:
+        scenarios = [s for s in scenarios if any(f in s[0] for f in args.scenario)]
+
+    all_results = {}
+    try:
+        for runner_class in runner_classes:
+            runner = runner_class(config)
+            results = []
+            for name, method, params in scenarios:
+                results.append((name, run_scenario(runner, server, method, params,
+                                                   args.iterations, args.warmup,
+                                                   args.concurrency)))
+            print_results(runner.name, results)
+            all_results[runner.name] = dict(results)
+    finally:
+        server.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'results': all_results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import gzip
+import os
+import unittest
+import zlib
+
+from SetAPI import compression
+
+
+class CompressionTest(unittest.TestCase):
+
+    def test_choose_encoding(self):
+        self.assertIsNone(compression.choose_encoding(None))
+        self.assertIsNone(compression.choose_encoding(''))
+        self.assertIsNone(compression.choose_encoding('br, identity'))
+        self.assertEqual(compression.choose_encoding('gzip, deflate, br'), 'gzip')
+        self.assertEqual(compression.choose_encoding('deflate'), 'deflate')
+        self.assertEqual(compression.choose_encoding('x-gzip'), 'gzip')
+        self.assertEqual(compression.choose_encoding('gzip;q=0.5, deflate'), 'deflate')
+        self.assertEqual(compression.choose_encoding('GZIP ; Q=0.8'), 'gzip')
+        self.assertIsNone(compression.choose_encoding('gzip;q=0, deflate;q=0'))
+        self.assertEqual(compression.choose_encoding('*'), 'gzip')
+        self.assertEqual(compression.choose_encoding('*, gzip;q=0'), 'deflate')
+        self.assertIsNone(compression.choose_encoding('gzip;q=x'))
+
+    def test_compress(self):
+        body = b'{"result": [' + b'["KBaseFile.PairedEndLibrary-2.0", "user"], ' * 1000 + b']}'
+        gzipped = compression.compress(body, 'gzip')
+        self.assertLess(len(gzipped), len(body) / 10)
+        self.assertEqual(gzip.decompress(gzipped), body)
+        self.assertEqual(zlib.decompress(compression.compress(body, 'deflate')), body)
+
+    def test_compress_chunks(self):
+        # random bytes don't compress, so output is produced for every chunk
+        body = os.urandom(100000) + b'x' * 100000
+        for encoding, decompress in (('gzip', gzip.decompress), ('deflate', zlib.decompress)):
+            chunks = list(compression.compress_chunks(body, encoding, chunk_size=10000))
+            self.assertGreater(len(chunks), 2)
+            self.assertEqual(decompress(b''.join(chunks)), body)
+        self.assertEqual(gzip.decompress(b''.join(compression.compress_chunks(b'', 'gzip'))),
+                         b'')
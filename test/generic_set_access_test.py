@@ -126,6 +126,19 @@ class SetAPITest(unittest.TestCase):
             set_api.list_sets(ctx, {'workspace': 12345, 'include_set_item_info': 'foo'})
         self.assertIn('"include_set_item_info" field must be set to 0 or 1', str(err.exception))
 
+        with self.assertRaises(ValueError) as err:
+            set_api.list_sets(ctx, {'workspace': 12345, 'types': ['KBaseGenomes.Genome']})
+        self.assertIn('"types" field contains an unsupported set type', str(err.exception))
+
+        with self.assertRaises(ValueError) as err:
+            set_api.list_sets(ctx, {'workspace': 12345, 'limit': -1})
+        self.assertIn('"limit" field must be a non-negative integer', str(err.exception))
+
+        with self.assertRaises(ValueError) as err:
+            set_api.list_sets(ctx, {'workspace': 12345, 'cursor': 'not a cursor'})
+        self.assertIn('"cursor" field must be a next_cursor returned by list_sets',
+                      str(err.exception))
+
     def test_list_sets(self):
         workspace = self.getWsName()
         setAPI = self.getImpl()
@@ -199,6 +212,33 @@ class SetAPITest(unittest.TestCase):
                 self.assertTrue('ref_path' in item)
                 self.assertEqual(item['ref_path'], s['ref'] + ';' + item['ref'])
 
+        # Only list the requested set types
+        res4 = setAPI.list_sets(self.getContext(), {
+                'workspace': workspace,
+                'types': ['KBaseSets.ReadsSet']
+            })[0]
+        self.assertEqual(len(res4['sets']), len(self.setNames))
+        res5 = setAPI.list_sets(self.getContext(), {
+                'workspace': workspace,
+                'types': ['KBaseSets.AssemblySet', 'KBaseSets.GenomeSet']
+            })[0]
+        self.assertEqual(len(res5['sets']), 0)
+
+        # Page through the sets one at a time, item info only comes with the page
+        paged_refs = []
+        params = {'workspace': workspace, 'limit': 1, 'include_set_item_info': 1}
+        while True:
+            page = setAPI.list_sets(self.getContext(), params)[0]
+            self.assertLessEqual(len(page['sets']), 1)
+            for s in page['sets']:
+                self.assertTrue('info' in s['items'][0])
+            paged_refs.extend(s['ref'] for s in page['sets'])
+            if 'next_cursor' not in page:
+                break
+            params['cursor'] = page['next_cursor']
+        self.assertEqual(sorted(paged_refs), sorted(s['ref'] for s in res2['sets']))
+        self.assertEqual(len(set(paged_refs)), len(self.setNames))
+
         self.unit_test_get_set_items()
 
     def test_bulk_list_sets(self):
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+import json
+import math
+import unittest
+
+from SetAPI import jsoncodec
+from installed_clients import baseclient
+
+
+class Versioned:
+
+    def toJSONable(self):
+        return {'ver': 1}
+
+
+class JSONCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.codecs = [jsoncodec.get_codec('json')]
+        if jsoncodec.orjson is not None:
+            self.codecs.append(jsoncodec.get_codec('orjson'))
+
+    def test_round_trip(self):
+        obj = {'result': [{'ref': '1/2/3', 'info': [2, 'réads', None, 1.5, True, {}]}],
+               'version': '1.1'}
+        for codec in self.codecs:
+            encoded = codec.dumps(obj)
+            self.assertIsInstance(encoded, bytes, codec.name)
+            self.assertEqual(json.loads(encoded), obj, codec.name)
+            self.assertEqual(codec.loads(encoded), obj, codec.name)
+            self.assertEqual(codec.loads(encoded.decode('utf-8')), obj, codec.name)
+
+    def test_extra_types(self):
+        for codec in self.codecs:
+            self.assertEqual(json.loads(codec.dumps({'a': {1}, 'b': frozenset(['x']),
+                                                     'c': Versioned()})),
+                             {'a': [1], 'b': ['x'], 'c': {'ver': 1}}, codec.name)
+            with self.assertRaises(TypeError):
+                codec.dumps({'a': object()})
+
+    def test_what_orjson_refuses(self):
+        for codec in self.codecs:
+            self.assertEqual(codec.loads(codec.dumps([2 ** 70])), [2 ** 70], codec.name)
+            self.assertTrue(math.isnan(codec.loads(b'[NaN]')[0]), codec.name)
+            with self.assertRaises(ValueError):
+                codec.loads(b'{"method": ')
+
+    def test_get_codec(self):
+        expected = 'orjson' if jsoncodec.orjson is not None else 'json'
+        self.assertEqual(jsoncodec.get_codec().name, expected)
+        self.assertEqual(jsoncodec.get_codec('auto').name, expected)
+        with self.assertRaisesRegex(ValueError, 'Unknown JSON codec "fast"'):
+            jsoncodec.get_codec('fast')
+
+    def test_configure_baseclient(self):
+        codec = jsoncodec.get_codec('json')
+        baseclient.configure_json_codec(codec)
+        try:
+            self.assertIs(baseclient._json_codec, codec)
+        finally:
+            baseclient.configure_json_codec()
+        self.assertEqual(baseclient._json_codec.dumps({'a': {1}}), b'{"a": [1]}')
+
+    def test_iterdumps(self):
+        result = {'version': '1.1', 'id': '1',
+                  'result': [{'sets': [{'ref': '1/%s/1' % i, 'info': [i, 'réads', {'n': '1'}],
+                                        'items': [{'ref': '1/2/3'}] * 50}
+                                       for i in range(200)],
+                              'empty': [], 'nums': {1, 2}}]}
+        for codec in self.codecs:
+            jsoncodec.set_codec(codec)
+            try:
+                chunks = list(jsoncodec.iterdumps(result, chunk_size=4096))
+                self.assertGreater(len(chunks), 10, codec.name)
+                self.assertTrue(all(len(c) < 3 * 4096 for c in chunks), codec.name)
+                decoded = json.loads(b''.join(chunks))
+                self.assertEqual(sorted(decoded['result'][0].pop('nums')), [1, 2])
+                del result['result'][0]['nums']
+                self.assertEqual(decoded, result, codec.name)
+                result['result'][0]['nums'] = {1, 2}
+
+                # non string keys are left to the codec
+                self.assertEqual(json.loads(b''.join(jsoncodec.iterdumps({'a': [1, {2: 'b'}]}))),
+                                 {'a': [1, {'2': 'b'}]})
+                self.assertEqual(list(jsoncodec.iterdumps([])), [b'[]'])
+            finally:
+                jsoncodec.set_codec(jsoncodec.get_codec())
+
+    def test_dumps_chunked(self):
+        class Unencodable:
+            pass
+        self.assertEqual(jsoncodec.dumps_chunked([1, 2], chunk_size=100), b'[1,2]')
+        result = ['x' * 100] * 10
+        chunks = jsoncodec.dumps_chunked(result, chunk_size=100)
+        self.assertEqual(json.loads(b''.join(chunks)), result)
+
+        # chunks are encoded as they are read, so an error after the first
+        # two is raised while reading them
+        result.append(Unencodable())
+        chunks = jsoncodec.dumps_chunked(result, chunk_size=100)
+        self.assertTrue(next(chunks).startswith(b'["xxx'))
+        with self.assertRaises(TypeError):
+            list(chunks)
+        with self.assertRaises(TypeError):
+            jsoncodec.dumps_chunked([Unencodable()] + result, chunk_size=100)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+from unittest import mock
+
+from installed_clients import baseclient
+from SetAPI.metrics import CallCounts, CountingClient, Metrics
+from util import FakeWorkspace
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.headers = {'content-type': 'application/json'}
+        self.content = json.dumps(body).encode('utf-8')
+        self.text = self.content.decode('utf-8')
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_requests(self):
+        metrics = Metrics()
+        metrics.observe_request('list_sets', 0.03, 100, 2000,
+                                workspace_calls={'list_objects': 3, 'get_objects2': 1})
+        metrics.observe_request('list_sets', 2, 100, 0, error=True, workspace_calls={})
+        metrics.add_response_bytes('list_sets', 500)
+        metrics.add_counter('setapi_cache_hits_total', lambda: 7, 'Cache hits')
+        metrics.add_gauge('setapi_cache_size', lambda: 3)
+        metrics.add_gauge('setapi_calls', lambda: {(('kind', 'reused'),): 2})
+
+        text = metrics.to_prometheus()
+        for line in ['# TYPE setapi_requests_total counter',
+                     'setapi_requests_total{method="list_sets"} 2',
+                     'setapi_request_errors_total{method="list_sets"} 1',
+                     'setapi_response_bytes_total{method="list_sets"} 2500',
+                     '# TYPE setapi_request_duration_seconds histogram',
+                     'setapi_request_duration_seconds_bucket{method="list_sets",le="0.05"} 1',
+                     'setapi_request_duration_seconds_bucket{method="list_sets",le="2.5"} 2',
+                     'setapi_request_duration_seconds_bucket{method="list_sets",le="+Inf"} 2',
+                     'setapi_request_duration_seconds_count{method="list_sets"} 2',
+                     'setapi_request_workspace_calls_bucket{method="list_sets",le="5"} 2',
+                     'setapi_request_workspace_calls_total{method="list_sets",'
+                     'workspace_method="list_objects"} 3',
+                     '# HELP setapi_cache_hits_total Cache hits',
+                     '# TYPE setapi_cache_hits_total counter',
+                     'setapi_cache_hits_total 7',
+                     '# TYPE setapi_cache_size gauge',
+                     'setapi_cache_size 3',
+                     'setapi_calls{kind="reused"} 2']:
+            self.assertIn(line + '\n', text)
+
+        snapshot = metrics.snapshot()
+        json.dumps(snapshot)
+        self.assertEqual(snapshot['setapi_requests_total'], [{'method': 'list_sets', 'value': 2}])
+        duration = snapshot['setapi_request_duration_seconds'][0]
+        self.assertEqual((duration['count'], duration['sum']), (2, 2.03))
+        self.assertEqual(snapshot['setapi_cache_hits_total'], [{'value': 7}])
+
+    def test_label_escaping(self):
+        metrics = Metrics()
+        metrics.inc('setapi_requests_total', (('method', 'a"b\\c'),))
+        self.assertIn('setapi_requests_total{method="a\\"b\\\\c"} 1\n', metrics.to_prometheus())
+
+    def test_counting_client(self):
+        counts = CallCounts()
+        ws = CountingClient(FakeWorkspace(), counts)
+        ws.get_objects2({'objects': []})
+        ws.get_objects2({'objects': []})
+        self.assertEqual(ws.list_objects({'ids': [1]}), [])
+        self.assertIsNone(ws.token)
+        self.assertEqual(counts.snapshot(), {'get_objects2': 2, 'list_objects': 1})
+
+    def test_baseclient_call_observer(self):
+        calls = []
+        baseclient.configure_call_observer(lambda *args: calls.append(args))
+        session = mock.Mock()
+        try:
+            client = baseclient.BaseClient('http://ws', ignore_authrc=True)
+            with mock.patch.object(baseclient, '_get_session', return_value=session):
+                session.post.return_value = FakeResponse(200, {'result': [{'data': []}]})
+                self.assertEqual(client.call_method('Workspace.get_objects2', [{}]),
+                                 {'data': []})
+                # a call made while handling another error still succeeds
+                try:
+                    raise ValueError('retrying')
+                except ValueError:
+                    client.call_method('Workspace.get_objects2', [{}])
+                session.post.return_value = FakeResponse(
+                    500, {'error': {'name': 'JSONRPCError', 'code': -32500,
+                                    'message': 'no access', 'error': ''}})
+                with self.assertRaises(baseclient.ServerError):
+                    client.call_method('Workspace.get_objects2', [{}])
+        finally:
+            baseclient.configure_call_observer()
+        self.assertEqual([(c[0], c[4]) for c in calls],
+                         [('Workspace.get_objects2', False), ('Workspace.get_objects2', False),
+                          ('Workspace.get_objects2', True)])
+        self.assertEqual(calls[0][2], len(session.post.call_args_list[0][1]['data']))
+        self.assertEqual(calls[0][3], len(b'{"result": [{"data": []}]}'))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from SetAPI import tracing
+
+
+class Stage:
+
+    @tracing.traced
+    def run(self, executor):
+        with tracing.span('Workspace.get_objects2'):
+            time.sleep(0.01)
+        tracing.record('Workspace.get_object_info3', 0.02)
+        futures = [executor.submit(tracing.wrap(self.fetch), i) for i in range(2)]
+        return [f.result() for f in futures]
+
+    @tracing.traced
+    def fetch(self, i):
+        tracing.record('Workspace.list_objects', 0.005)
+        return i
+
+
+class TracingTest(unittest.TestCase):
+
+    def test_trace(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            trace = tracing.start_trace('get_set')
+            try:
+                self.assertEqual(Stage().run(executor), [0, 1])
+            finally:
+                tracing.stop_trace(trace)
+        breakdown = {name: (count, ms) for name, count, ms in trace.breakdown()}
+        self.assertEqual({name: count for name, (count, _) in breakdown.items()},
+                         {'Stage.run': 1, 'Workspace.get_objects2': 1,
+                          'Workspace.get_object_info3': 1, 'Stage.fetch': 2,
+                          'Workspace.list_objects': 2})
+        self.assertGreaterEqual(breakdown['Workspace.get_objects2'][1], 10)
+        self.assertAlmostEqual(breakdown['Workspace.get_object_info3'][1], 20)
+        self.assertGreaterEqual(trace.duration, 0.01)
+
+        # spans made on the pool join the span that submitted them
+        names = [s[0] for s in trace.spans]
+        run = names.index('Stage.run')
+        self.assertEqual([s[1] for s in trace.spans if s[0] == 'Stage.fetch'], [run, run])
+        self.assertIsNone(trace.spans[run][1])
+
+        header = trace.to_header()
+        self.assertTrue(header.startswith('total;dur='))
+        self.assertIn('Stage.fetch;dur=', header)
+        self.assertIn(';count=2', header)
+        self.assertIn('Workspace.list_objects 2x', trace.to_log_message())
+
+    def test_no_trace(self):
+        self.assertIs(tracing.span('a'), tracing.span('b'))
+        with tracing.span('a'):
+            tracing.record('b', 1)
+        fn = Stage().fetch
+        self.assertIs(tracing.wrap(fn), fn)
+        self.assertEqual(fn(3), 3)
+        tracing.stop_trace(None)
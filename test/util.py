@@ -1,6 +1,12 @@
 """
 Some utility functions to help with testing. These mainly add fake objects to use in making sets.
 """
+import copy
+import random
+import re
+import threading
+import time
+
 from installed_clients.DataFileUtilClient import DataFileUtil
 
 
@@ -247,3 +253,188 @@ def make_fake_object(obj, obj_type, name, workspace_name, workspace_client):
             }]
         })[0]
     )
+
+
+def make_info(wsid, objid, ver=1, obj_type='KBaseFile.SingleEndLibrary-2.0', meta=None,
+              name=None):
+    """
+    Makes a Workspace ObjectInfo list for the unit tests that don't need a Workspace.
+    """
+    return [objid, name or 'obj' + str(objid), obj_type, '2017-01-01T00:00:00+0000', ver,
+            'someuser', wsid, 'ws' + str(wsid), 'chsum', 10, meta]
+
+
+def make_workspace(objects=(), **kwargs):
+    """
+    Returns a FakeWorkspace holding objects, each a tuple of FakeWorkspace.save
+    arguments, with no calls recorded. kwargs are passed to FakeWorkspace.
+    """
+    ws = FakeWorkspace(**kwargs)
+    for obj in objects:
+        ws.save(*obj)
+    ws.calls = []
+    return ws
+
+
+class FakeWorkspace:
+    """
+    A Workspace client kept in memory, for the unit tests of the code wrapping one and
+    the benchmark server. Objects are added with save(), workspace N is named wsN.
+    Every call is recorded in calls as (method, refs of the objects asked for), or
+    (method, params) for calls that don't take objects.
+    token - the token the client is used with, see private
+    private - dict of workspace id -> the only token that can read it
+    gates - dict of method -> threading.Event the calls to that method wait for
+    delay - the most seconds a list_objects call sleeps for, a random amount each time
+    result_limit - the most objects a list_objects call returns
+    """
+
+    def __init__(self, token=None, private=None, delay=0, result_limit=10000):
+        self.token = token
+        self.private = private or {}
+        self.gates = {}
+        self.delay = delay
+        self.result_limit = result_limit
+        # (wsid, objid) -> list of versions, each a dict of info, data and refs
+        self.objects = {}
+        self.mod_counts = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def save(self, wsid, objid, obj_type, data=None, meta=None, refs=(), name=None):
+        """ Saves a new version of wsid/objid, returns its info. """
+        with self._lock:
+            versions = self.objects.setdefault((wsid, objid), [])
+            info = make_info(wsid, objid, len(versions) + 1, obj_type,
+                             meta if meta is not None else {}, name)
+            versions.append({'info': info, 'data': data if data is not None else {},
+                             'refs': list(refs)})
+            self.mod_counts[wsid] = self.mod_counts.get(wsid, 0) + 1
+            return list(info)
+
+    def delete(self, wsid, objid):
+        del self.objects[(wsid, objid)]
+        self.mod_counts[wsid] = self.mod_counts.get(wsid, 0) + 1
+
+    def _record(self, method, detail):
+        with self._lock:
+            self.calls.append((method, detail))
+        gate = self.gates.get(method)
+        if gate is not None:
+            gate.wait()
+
+    def _wsid(self, params):
+        if 'id' in params:
+            return int(params['id'])
+        return self._wsid_of(params['workspace'])
+
+    @staticmethod
+    def _wsid_of(ws):
+        # an id, or a name like ws1
+        return int(ws) if str(ws).isdigit() else int(str(ws)[2:])
+
+    def _resolve(self, ref):
+        """
+        Returns the version dict of the last object in a ref path and the path as
+        versioned refs, or raises ValueError.
+        """
+        path = []
+        for part in ref.split(';'):
+            wsid, objid, ver = ([int(x) for x in part.split('/')] + [0])[:3]
+            if self.private.get(wsid, self.token) != self.token:
+                raise ValueError('Object ' + part + ' cannot be accessed')
+            versions = self.objects.get((wsid, objid))
+            if not versions or ver > len(versions):
+                raise ValueError('Object ' + part + ' does not exist')
+            version = versions[ver - 1] if ver else versions[-1]
+            path.append('%d/%d/%d' % (wsid, objid, version['info'][4]))
+        return version, path
+
+    def _lookup(self, params):
+        """ Returns _resolve() of each of params['objects'], None for errors if ignored. """
+        found = []
+        for o in params['objects']:
+            try:
+                found.append(self._resolve(o['ref']))
+            except ValueError:
+                if params.get('ignoreErrors', 0) != 1:
+                    raise
+                found.append(None)
+        return found
+
+    def _info(self, version, include_metadata):
+        info = list(version['info'])
+        info[10] = dict(info[10]) if include_metadata else None
+        return info
+
+    def _ws_info(self, wsid):
+        max_objid = max([objid for w, objid in self.objects if w == wsid] or [0])
+        return [wsid, 'ws' + str(wsid), 'someuser', 'date' + str(self.mod_counts.get(wsid, 0)),
+                max_objid, 'a', 'n', 'unlocked', {}]
+
+    def get_workspace_info(self, params, context=None):
+        self._record('get_workspace_info', params)
+        return self._ws_info(self._wsid(params))
+
+    def list_workspace_info(self, params, context=None):
+        self._record('list_workspace_info', params)
+        return [self._ws_info(wsid) for wsid in sorted(self.mod_counts)]
+
+    def list_objects(self, params, context=None):
+        self._record('list_objects', dict(params))
+        if self.delay:
+            time.sleep(random.random() * self.delay)
+        include_metadata = params.get('includeMetadata', 0) == 1
+        wsids = set(params.get('ids', [])) | set(self._wsid_of(ws)
+                                                 for ws in params.get('workspaces', []))
+        # 'Module.Type' matches any version, 'Module.Type-2' any minor version of 2
+        type_match = re.compile(re.escape(params['type']) + r'($|[-.])').match \
+            if 'type' in params else None
+        infos = []
+        for wsid, objid in sorted(self.objects):
+            if wsid not in wsids or \
+                    not params.get('minObjectID', 1) <= objid <= params.get('maxObjectID', objid):
+                continue
+            version = self.objects[(wsid, objid)][-1]
+            if type_match is not None and not type_match(version['info'][2]):
+                continue
+            infos.append(self._info(version, include_metadata))
+        return infos[:self.result_limit]
+
+    def _get_object_infos(self, method, params):
+        self._record(method, [o['ref'] for o in params['objects']])
+        include_metadata = params.get('includeMetadata', 0) == 1
+        found = self._lookup(params)
+        return ([self._info(f[0], include_metadata) if f else None for f in found],
+                [f[1] if f else None for f in found])
+
+    def get_object_info3(self, params, context=None):
+        infos, paths = self._get_object_infos('get_object_info3', params)
+        return {'infos': infos, 'paths': paths}
+
+    def get_object_info_new(self, params, context=None):
+        return self._get_object_infos('get_object_info_new', params)[0]
+
+    def get_objects2(self, params, context=None):
+        self._record('get_objects2', [o['ref'] for o in params['objects']])
+        data = []
+        for found in self._lookup(params):
+            if found is None:
+                data.append(None)
+                continue
+            version, path = found
+            obj_data = {'info': self._info(version, True), 'path': path,
+                        'refs': list(version['refs'])}
+            if params.get('no_data', 0) != 1:
+                obj_data['data'] = copy.deepcopy(version['data'])
+            data.append(obj_data)
+        return {'data': data}
+
+    def save_objects(self, params, context=None):
+        self._record('save_objects', [o['name'] for o in params['objects']])
+        wsid = self._wsid(params)
+        infos = []
+        for o in params['objects']:
+            objid = max([objid for w, objid in self.objects if w == wsid] or [0]) + 1
+            infos.append(self.save(wsid, objid, o['type'], o.get('data'), o.get('meta')))
+        return infos
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from SetAPI import util
+from SetAPI.generic.SetInterfaceV1 import SetInterfaceV1
+
+
+class ReferenceParserTest(unittest.TestCase):
+
+    def test_parse_reference(self):
+        self.assertEqual(util.parse_reference('1/2/3'), (1, 2, 3, ()))
+        self.assertEqual(util.parse_reference('1/2'), (1, 2, None, ()))
+        self.assertEqual(util.parse_reference('myws/myobj'), ('myws', 'myobj', None, ()))
+        ref = util.parse_reference('1/2/3;myws/5')
+        self.assertEqual(ref[:3], ('myws', 5, None))
+        self.assertEqual(ref.path, (util.ObjectRef(1, 2, 3, ()),))
+        # the same parsed ref is handed out again
+        self.assertIs(util.parse_reference('1/2/3'), util.parse_reference('1/2/3'))
+        for bad in [None, '', '1', '1/2/3/4', '1/2/x', '1/_obj', '1/2;', ['1/2/3']]:
+            self.assertIsNone(util.parse_reference(bad), bad)
+
+    def test_is_versioned(self):
+        self.assertTrue(util.parse_reference('1/2/3').is_versioned)
+        self.assertTrue(util.parse_reference('1/2/3;4/5/6').is_versioned)
+        self.assertFalse(util.parse_reference('1/2').is_versioned)
+        self.assertFalse(util.parse_reference('1/2;4/5/6').is_versioned)
+        self.assertFalse(util.parse_reference('ws/2/3').is_versioned)
+
+    def test_check_reference(self):
+        for good in ['1/2/3', '1/2', 'myws/myobj/3', 'myws/my/obj']:
+            self.assertTrue(util.check_reference(good), good)
+        for bad in [None, '1', '1/2/x', '1/2/3;4/5/6', '_ws/1']:
+            self.assertFalse(util.check_reference(bad), bad)
+
+    def test_find_invalid_references(self):
+        self.assertEqual(util.find_invalid_references([]), [])
+        refs = [str(i) + '/' + str(i) + '/1' for i in range(1, 5000)]
+        self.assertEqual(util.find_invalid_references(refs + ['1/2/3;4/5/6']), [])
+        self.assertEqual(util.find_invalid_references(['1/2/3', 'myws/obj', 'bad', None,
+                                                       '1/2\n3/4']),
+                         ['bad', None, '1/2\n3/4'])
+
+    def test_save_set_checks_item_refs(self):
+        with self.assertRaisesRegex(ValueError, 'these are not: bad, None'):
+            SetInterfaceV1(None).save_set('KBaseSets.ReadsSet', [], {
+                'workspace': 1, 'output_object_name': 'set',
+                'data': {'items': [{'ref': '1/2/3'}, {'ref': 'bad'}, {}]}})